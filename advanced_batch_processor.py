@@ -4,27 +4,35 @@ Advanced Batch Processor for TuneForge
 
 This module provides sophisticated batch processing capabilities for audio analysis:
 - Queue management with priority and retry logic
-- Concurrent processing with configurable workers
+- Concurrent processing with configurable or adaptively sized workers
 - Progress persistence and resume capability
 - Resource management and monitoring
+- Per-file time and memory limits via isolated extraction processes
+- Read-ahead of queued files into a bounded buffer for slow/network storage
+- Directory/inode-locality job ordering for cold caches and spinning disks
 - Comprehensive error handling and recovery
 """
 
 import os
 import time
+import heapq
+import bisect
 import asyncio
 import logging
 import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple, Any, Callable
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 import sqlite3
 
 # Import our modules
 from audio_analyzer import AudioAnalyzer
 from audio_analysis_service import AudioAnalysisService
+from worker_autoscaler import WorkerAutoscaler, AutoscaleConfig
+from isolated_extractor import IsolatedFeatureExtractor, TIMEOUT_ERROR, MEMORY_ERROR, CRASH_ERROR
+from audio_prefetcher import AudioPrefetcher
 # Monitoring will be imported dynamically in _progress_monitor to avoid circular imports
 
 # Configure logging
@@ -56,7 +64,9 @@ class ProcessingJob:
     completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
     processing_time: float = 0.0
+    load_time: float = 0.0
     worker_id: Optional[str] = None
+    order_key: Tuple = field(default=(), repr=False, compare=False)
 
 @dataclass
 class ProcessingStats:
@@ -71,13 +81,20 @@ class ProcessingStats:
     average_processing_time: float = 0.0
     success_rate: float = 0.0
     skipped_jobs: int = 0 # Added skipped_jobs to stats
+    current_workers: int = 0
+
+# Queue ordering strategies:
+# - id: track insertion order (legacy)
+# - directory: group by parent directory, then path order
+# - inode: group by parent directory, then inode order within each directory
+ORDERING_STRATEGIES = ('id', 'directory', 'inode')
 
 class AdvancedBatchProcessor:
     """
     Advanced batch processor with queue management and concurrent processing.
     
     Features:
-    - Configurable worker pool
+    - Configurable worker pool with optional autoscaling
     - Priority-based job scheduling
     - Automatic retry with exponential backoff
     - Progress persistence and resume capability
@@ -86,7 +103,12 @@ class AdvancedBatchProcessor:
     """
     
     def __init__(self, db_path: str = None, max_workers: int = 1, 
-                 batch_size: int = 100, checkpoint_interval: int = 50):
+                 batch_size: int = 100, checkpoint_interval: int = 50,
+                 autoscale_config: AutoscaleConfig = None, isolate_extraction: bool = True,
+                 file_timeout: int = 120, memory_limit_mb: int = 1024,
+                 prefetch: bool = False, prefetch_buffer_mb: int = 256,
+                 prefetch_files: int = 16, prefetch_dir: str = None,
+                 ordering: str = 'id', analyzer_settings: Dict[str, Any] = None):
         """
         Initialize the AdvancedBatchProcessor.
         
@@ -95,6 +117,18 @@ class AdvancedBatchProcessor:
             max_workers: Maximum concurrent workers (default 1 for SQLite compatibility)
             batch_size: Number of jobs to process in each batch
             checkpoint_interval: Save progress every N jobs
+            autoscale_config: Enables adaptive worker sizing within these bounds
+                (None keeps a fixed pool of max_workers)
+            isolate_extraction: Run each extraction in a killable worker process
+            file_timeout: Wall-clock limit in seconds per file (isolated mode)
+            memory_limit_mb: Memory limit per extraction process (isolated mode)
+            prefetch: Read queued files ahead of the workers into a local buffer
+            prefetch_buffer_mb: Maximum size of the prefetch buffer
+            prefetch_files: Maximum number of files held in the prefetch buffer
+            prefetch_dir: Directory for the buffer (default: /dev/shm or temp dir)
+            ordering: Queue ordering strategy ('id', 'directory' or 'inode')
+            analyzer_settings: AudioAnalyzer keyword arguments (sample_rate,
+                max_duration, hop_length); defaults to 8000 Hz, 60s, 512
         """
         self.db_path = db_path
         self.max_workers = max_workers
@@ -102,9 +136,30 @@ class AdvancedBatchProcessor:
         self.checkpoint_interval = checkpoint_interval
         
         # Initialize components
-        self.analyzer = AudioAnalyzer(sample_rate=8000, max_duration=60, hop_length=512)
+        self.analyzer_settings = {'sample_rate': 8000, 'max_duration': 60, 'hop_length': 512}
+        if analyzer_settings:
+            self.analyzer_settings.update(analyzer_settings)
+        self.analyzer = AudioAnalyzer(**self.analyzer_settings)
         self.service = AudioAnalysisService(db_path)
         
+        # Per-worker isolated extraction processes
+        self.isolate_extraction = isolate_extraction
+        self.file_timeout = file_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.extractors: Dict[str, IsolatedFeatureExtractor] = {}
+        
+        # Read-ahead buffer, created when processing starts
+        self.prefetch = prefetch
+        self.prefetch_buffer_mb = prefetch_buffer_mb
+        self.prefetch_files = prefetch_files
+        self.prefetch_dir = prefetch_dir
+        self.prefetcher: Optional[AudioPrefetcher] = None
+        
+        if ordering not in ORDERING_STRATEGIES:
+            logger.warning(f"Unknown ordering strategy '{ordering}', using 'id'")
+            ordering = 'id'
+        self.ordering = ordering
+        
         # Processing state
         self.jobs_queue: List[ProcessingJob] = []
         self.active_jobs: Dict[str, ProcessingJob] = {}
@@ -120,6 +175,15 @@ class AdvancedBatchProcessor:
         # Worker management
         self.workers: List[threading.Thread] = []
         self.worker_semaphore = threading.Semaphore(max_workers)
+        self._worker_counter = 0
+        
+        # Adaptive worker sizing
+        self.autoscaler: Optional[WorkerAutoscaler] = None
+        if autoscale_config is not None:
+            self.autoscaler = WorkerAutoscaler(replace(autoscale_config, max_workers=max_workers))
+            self.target_workers = self.autoscaler.initial_workers()
+        else:
+            self.target_workers = max_workers
         
         # Checkpoint and resume
         self.last_checkpoint = 0
@@ -140,24 +204,28 @@ class AdvancedBatchProcessor:
         """
         try:
             # Get tracks from database
-            tracks = self.service.get_tracks_for_analysis(limit=limit or 10000)
+            tracks = self.service.get_tracks_for_analysis(
+                limit=limit or 10000,
+                order_by='id' if self.ordering == 'id' else 'path'
+            )
+            
+            # Create processing jobs, sorted by priority (errors first), then by
+            # the ordering strategy; directory listings happen outside the lock
+            jobs = self._order_jobs([
+                ProcessingJob(
+                    track_id=track['id'],
+                    file_path=track['file_path'],
+                    priority=1 if track['analysis_status'] == 'error' else 3,
+                    status=ProcessingStatus.QUEUED
+                )
+                for track in tracks
+            ])
             
             with self.processing_lock:
-                # Clear existing queue
-                self.jobs_queue.clear()
-                
-                # Create processing jobs
-                for track in tracks:
-                    job = ProcessingJob(
-                        track_id=track['id'],
-                        file_path=track['file_path'],
-                        priority=1 if track['analysis_status'] == 'error' else 3,
-                        status=ProcessingStatus.QUEUED
-                    )
-                    self.jobs_queue.append(job)
-                
-                # Sort by priority (errors first, then by ID)
-                self.jobs_queue.sort(key=lambda j: (j.priority, j.track_id))
+                # Clear existing queue (and any reads prefetched for it)
+                if self.prefetcher and self.jobs_queue:
+                    self.prefetcher.discard([job.file_path for job in self.jobs_queue])
+                self.jobs_queue = jobs
                 
                 self.stats.total_jobs = len(self.jobs_queue)
                 self.stats.start_time = datetime.now()
@@ -169,6 +237,94 @@ class AdvancedBatchProcessor:
             logger.error(f"Error initializing queue: {e}")
             return 0
     
+    def enqueue_tracks(self, tracks: List[Dict[str, Any]]) -> int:
+        """
+        Add tracks to a running queue, e.g. files picked up by the library watcher.
+        
+        Args:
+            tracks: Track dictionaries with 'id', 'file_path' and 'analysis_status'
+            
+        Returns:
+            Number of jobs added
+        """
+        with self.processing_lock:
+            known_ids = self._known_track_ids()
+        
+        # Order only the new jobs, outside the lock: inode ordering lists
+        # directories, which can be slow on network mounts
+        new_jobs = self._order_jobs([
+            ProcessingJob(
+                track_id=track['id'],
+                file_path=track['file_path'],
+                priority=1 if track.get('analysis_status') == 'error' else 3,
+                status=ProcessingStatus.QUEUED
+            )
+            for track in tracks if track['id'] not in known_ids
+        ])
+        if not new_jobs:
+            return 0
+        
+        with self.processing_lock:
+            # Another enqueue may have added some of these in the meantime
+            known_ids = self._known_track_ids()
+            new_jobs = [job for job in new_jobs if job.track_id not in known_ids]
+            if not new_jobs:
+                return 0
+            
+            # The queue is already ordered, so merging keeps it ordered
+            self.jobs_queue = list(heapq.merge(self.jobs_queue, new_jobs, key=lambda j: j.order_key))
+            self.stats.total_jobs += len(new_jobs)
+            if self.prefetcher:
+                self.prefetcher.schedule([job.file_path for job in new_jobs])
+        
+        logger.info(f"Enqueued {len(new_jobs)} new tracks")
+        return len(new_jobs)
+    
+    def _known_track_ids(self) -> set:
+        """Track IDs that are queued, running or already finished (caller holds the lock)"""
+        known_ids = {job.track_id for job in self.jobs_queue}
+        known_ids.update(job.track_id for job in self.active_jobs.values())
+        known_ids.update(job.track_id for job in self.completed_jobs)
+        known_ids.update(job.track_id for job in self.failed_jobs)
+        known_ids.update(job.track_id for job in self.skipped_jobs)
+        return known_ids
+    
+    def _order_jobs(self, jobs: List[ProcessingJob]) -> List[ProcessingJob]:
+        """
+        Order jobs by priority and the configured locality strategy.
+        
+        Sets each job's order_key, so ordered lists can later be merged.
+        Must not be called with processing_lock held.
+        
+        Args:
+            jobs: Jobs to order
+            
+        Returns:
+            Ordered list of jobs
+        """
+        if self.ordering == 'id':
+            for job in jobs:
+                job.order_key = (job.priority, job.track_id)
+        elif self.ordering == 'directory':
+            for job in jobs:
+                job.order_key = (job.priority, os.path.dirname(job.file_path), job.file_path)
+        else:
+            # inode: one directory listing per directory gives every file's inode
+            # without a stat() call per file
+            inodes: Dict[str, int] = {}
+            for directory in {os.path.dirname(j.file_path) for j in jobs}:
+                try:
+                    with os.scandir(directory) as entries:
+                        for entry in entries:
+                            inodes[entry.path] = entry.inode()
+                except OSError as e:
+                    logger.debug(f"Could not list {directory} for inode ordering: {e}")
+            for job in jobs:
+                job.order_key = (job.priority, os.path.dirname(job.file_path),
+                                 inodes.get(job.file_path, 0), job.file_path)
+        
+        return sorted(jobs, key=lambda j: j.order_key)
+    
     def start_processing(self, progress_callback: Callable = None) -> bool:
         """
         Start the batch processing with multiple workers.
@@ -188,17 +344,37 @@ class AdvancedBatchProcessor:
                 logger.warning("Processing already in progress")
                 return False
             
-            logger.info(f"Starting batch processing with {self.max_workers} workers")
+            logger.info(f"Starting batch processing with {self.target_workers} workers"
+                       f"{' (autoscaling up to ' + str(self.max_workers) + ')' if self.autoscaler else ''}")
+            
+            # Start reading queued files ahead of the workers
+            if self.prefetch:
+                try:
+                    self.prefetcher = AudioPrefetcher(
+                        buffer_root=self.prefetch_dir,
+                        max_bytes=self.prefetch_buffer_mb * 1024 * 1024,
+                        max_files=self.prefetch_files
+                    )
+                    with self.processing_lock:
+                        self.prefetcher.schedule([job.file_path for job in self.jobs_queue])
+                except Exception as e:
+                    logger.warning(f"Prefetching disabled: {e}")
+                    self.prefetcher = None
             
             # Start worker threads
-            for i in range(self.max_workers):
-                worker = threading.Thread(
-                    target=self._worker_loop,
-                    args=(f"worker-{i}", progress_callback),
+            with self.processing_lock:
+                for _ in range(self.target_workers):
+                    self._spawn_worker(progress_callback)
+                self.stats.current_workers = len(self.workers)
+            
+            # Start autoscaling thread
+            if self.autoscaler:
+                autoscale_thread = threading.Thread(
+                    target=self._autoscale_loop,
+                    args=(progress_callback,),
                     daemon=True
                 )
-                worker.start()
-                self.workers.append(worker)
+                autoscale_thread.start()
             
             # Start progress monitoring thread
             monitor_thread = threading.Thread(
@@ -231,12 +407,17 @@ class AdvancedBatchProcessor:
             self.shutdown_event.set()
             
             # Wait for workers to finish
-            for worker in self.workers:
+            for worker in list(self.workers):
                 worker.join(timeout=10)
             
             # Clear workers list
             self.workers.clear()
             
+            # Drop the prefetch buffer
+            if self.prefetcher:
+                self.prefetcher.close()
+                self.prefetcher = None
+            
             # Save final checkpoint
             self._save_checkpoint()
             
@@ -250,26 +431,128 @@ class AdvancedBatchProcessor:
             logger.error(f"Error stopping processing: {e}")
             return False
     
-    def _worker_loop(self, worker_id: str, progress_callback: Callable = None):
-        """Main worker loop for processing jobs"""
-        logger.info(f"Worker {worker_id} started")
+    def _spawn_worker(self, progress_callback: Callable = None):
+        """Start one worker thread (caller must hold processing_lock)"""
+        worker_id = f"worker-{self._worker_counter}"
+        self._worker_counter += 1
+        worker = threading.Thread(
+            target=self._worker_loop,
+            args=(worker_id, progress_callback),
+            name=worker_id,
+            daemon=True
+        )
+        self.workers.append(worker)
+        worker.start()
+    
+    def _should_retire_worker(self) -> bool:
+        """Retire the calling worker if the pool is above its target size"""
+        with self.processing_lock:
+            current = threading.current_thread()
+            if len(self.workers) > self.target_workers and current in self.workers:
+                self.workers.remove(current)
+                self.stats.current_workers = len(self.workers)
+                self._update_stats()
+                return True
+            return False
+    
+    def set_worker_count(self, count: int, progress_callback: Callable = None):
+        """
+        Resize the worker pool.
         
-        while not self.shutdown_event.is_set():
+        Extra workers are started immediately; surplus workers exit after
+        finishing their current job.
+        
+        Args:
+            count: Desired number of workers (clamped to 1..max_workers)
+            progress_callback: Callback passed to newly started workers
+        """
+        count = max(1, min(self.max_workers, count))
+        with self.processing_lock:
+            self.target_workers = count
+            while len(self.workers) < count and not self.shutdown_event.is_set():
+                self._spawn_worker(progress_callback)
+            self.stats.current_workers = len(self.workers)
+            self._update_stats()
+    
+    def _recent_decode_fraction(self, sample_size: int = 20) -> Optional[float]:
+        """Share of recent job time spent loading/decoding audio"""
+        recent = self.completed_jobs[-sample_size:]
+        total_time = sum(job.processing_time for job in recent)
+        if total_time <= 0:
+            return None
+        return sum(job.load_time for job in recent) / total_time
+    
+    def _autoscale_loop(self, progress_callback: Callable = None):
+        """Periodically resize the worker pool from throughput and system load"""
+        interval = self.autoscaler.config.interval
+        
+        while not self.shutdown_event.wait(interval):
             try:
-                # Get next job from queue
-                job = self._get_next_job()
-                if not job:
-                    time.sleep(1)  # Wait for jobs
-                    continue
-                
-                # Process the job
-                self._process_job(job, worker_id, progress_callback)
+                with self.processing_lock:
+                    finished = (self.stats.completed_jobs + self.stats.failed_jobs +
+                                self.stats.skipped_jobs)
+                    queue_size = len(self.jobs_queue)
+                    current = len(self.workers)
+                    decode_fraction = self._recent_decode_fraction()
                 
+                target = self.autoscaler.evaluate(current, finished, queue_size, decode_fraction)
+                if target != self.target_workers:
+                    self.set_worker_count(target, progress_callback)
+                    
             except Exception as e:
-                logger.error(f"Worker {worker_id} error: {e}")
-                time.sleep(1)
+                logger.error(f"Autoscaler error: {e}")
+    
+    def _get_extractor(self, worker_id: str):
+        """Get the feature extractor used by a worker"""
+        if not self.isolate_extraction:
+            return self.analyzer
         
-        logger.info(f"Worker {worker_id} stopped")
+        with self.processing_lock:
+            extractor = self.extractors.get(worker_id)
+            if extractor is None:
+                extractor = IsolatedFeatureExtractor(
+                    analyzer_kwargs=self.analyzer_settings,
+                    timeout=self.file_timeout,
+                    memory_limit_mb=self.memory_limit_mb
+                )
+                self.extractors[worker_id] = extractor
+            return extractor
+    
+    def _release_extractor(self, worker_id: str):
+        """Stop the extraction process owned by a worker"""
+        with self.processing_lock:
+            extractor = self.extractors.pop(worker_id, None)
+        if extractor is not None:
+            extractor.close()
+    
+    def _worker_loop(self, worker_id: str, progress_callback: Callable = None):
+        """Main worker loop for processing jobs"""
+        logger.info(f"Worker {worker_id} started")
+        
+        try:
+            while not self.shutdown_event.is_set():
+                try:
+                    # Exit if the pool has been scaled down
+                    if self._should_retire_worker():
+                        logger.info(f"Worker {worker_id} retired by autoscaler")
+                        return
+                    
+                    # Get next job from queue
+                    job = self._get_next_job()
+                    if not job:
+                        time.sleep(1)  # Wait for jobs
+                        continue
+                    
+                    # Process the job
+                    self._process_job(job, worker_id, progress_callback)
+                    
+                except Exception as e:
+                    logger.error(f"Worker {worker_id} error: {e}")
+                    time.sleep(1)
+            
+            logger.info(f"Worker {worker_id} stopped")
+        finally:
+            self._release_extractor(worker_id)
     
     def _get_next_job(self) -> Optional[ProcessingJob]:
         """Get the next job from the queue with proper locking"""
@@ -297,12 +580,21 @@ class AdvancedBatchProcessor:
             # Start timing
             start_time = time.time()
             
-            # Extract features
-            features_result = self.analyzer.extract_all_features(job.file_path)
+            # Extract features (in an isolated process when enabled), reading
+            # the prefetched copy when one is available
+            prefetcher = self.prefetcher
+            analysis_path = prefetcher.acquire(job.file_path) if prefetcher else job.file_path
+            try:
+                features_result = self._get_extractor(worker_id).extract_all_features(analysis_path)
+            finally:
+                if prefetcher:
+                    prefetcher.release(job.file_path)
             
             if not features_result['success']:
                 raise Exception(f"Feature extraction failed: {features_result['error_message']}")
             
+            job.load_time = features_result.get('timings', {}).get('load', 0.0)
+            
             # Store features in database
             extracted_features = features_result['features']
             extracted_features['analysis_version'] = "1.0"
@@ -391,7 +683,10 @@ class AdvancedBatchProcessor:
         with self.processing_lock:
             if job.status == ProcessingStatus.RETRYING:
                 job.status = ProcessingStatus.QUEUED
-                self.jobs_queue.append(job)
+                # Keep the queue ordered so enqueue_tracks can merge into it
+                # (bisect's key= needs Python 3.10)
+                keys = [queued.order_key for queued in self.jobs_queue]
+                self.jobs_queue.insert(bisect.bisect_right(keys, job.order_key), job)
                 self.stats.retrying_jobs -= 1
                 logger.info(f"Job {job.track_id} queued for retry")
     
@@ -454,17 +749,18 @@ class AdvancedBatchProcessor:
             # Calculate success rate
             self.stats.success_rate = (self.stats.completed_jobs / total_processed) * 100
             
-            # Estimate completion time
+            # Estimate completion time at the current concurrency
             if self.stats.average_processing_time > 0:
                 remaining_jobs = self.stats.total_jobs - total_processed
-                estimated_seconds = (remaining_jobs * self.stats.average_processing_time) / self.max_workers
+                concurrency = max(1, self.stats.current_workers or len(self.workers))
+                estimated_seconds = (remaining_jobs * self.stats.average_processing_time) / concurrency
                 self.stats.estimated_completion = datetime.now() + timedelta(seconds=estimated_seconds)
     
     def _calculate_progress(self) -> Dict[str, Any]:
         """Calculate current processing progress"""
         total_processed = self.stats.completed_jobs + self.stats.failed_jobs + self.stats.skipped_jobs
         
-        return {
+        progress = {
             'total_jobs': self.stats.total_jobs,
             'completed_jobs': self.stats.completed_jobs,
             'failed_jobs': self.stats.failed_jobs,
@@ -476,8 +772,14 @@ class AdvancedBatchProcessor:
             'estimated_completion': self.stats.estimated_completion.isoformat() if self.stats.estimated_completion else None,
             'active_workers': len(self.workers),
             'queue_size': len(self.jobs_queue),
-            'skipped_jobs': self.stats.skipped_jobs # Added skipped_jobs to progress
+            'skipped_jobs': self.stats.skipped_jobs, # Added skipped_jobs to progress
+            'target_workers': self.target_workers
         }
+        
+        if self.autoscaler:
+            progress['autoscale'] = self.autoscaler.get_status()
+        
+        return progress
     
     def _save_checkpoint(self):
         """Save processing checkpoint for resume capability"""
@@ -519,7 +821,7 @@ class AdvancedBatchProcessor:
         with self.processing_lock:
             progress = self._calculate_progress()
             
-            return {
+            status = {
                 'status': 'running' if self.workers else 'stopped',
                 'progress': progress,
                 'workers': len(self.workers),
@@ -527,6 +829,19 @@ class AdvancedBatchProcessor:
                 'queue_size': len(self.jobs_queue),
                 'shutdown_requested': self.shutdown_event.is_set()
             }
+            
+            if self.prefetcher:
+                status['prefetch'] = self.prefetcher.get_stats()
+            
+            if self.isolate_extraction:
+                watchdog = {'timeouts': 0, 'memory_kills': 0, 'crashes': 0, 'recycles': 0}
+                for extractor in self.extractors.values():
+                    for key, value in extractor.get_stats().items():
+                        if key in watchdog:
+                            watchdog[key] += value
+                status['watchdog'] = watchdog
+            
+            return status
 
     def _should_skip_file_permanently(self, job: ProcessingJob) -> bool:
         """
@@ -543,8 +858,12 @@ class AdvancedBatchProcessor:
             return True
         
         # Skip files with specific error patterns that indicate corruption
+        # or that hit the isolated extractor's time/memory limits
         error_msg = job.error_message.lower()
         skip_patterns = [
+            TIMEOUT_ERROR.lower(),
+            MEMORY_ERROR.lower(),
+            CRASH_ERROR.lower(),
             'file not found',
             'permission denied',
             'corrupted',
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, request, jsonify, Response, current_app, send_file
+from flask import Blueprint, render_template, request, jsonify, Response, current_app, send_file, stream_with_context
 import requests
 import json
 import configparser
@@ -24,6 +24,10 @@ import uuid
 from datetime import datetime
 import string
 
+from worker_autoscaler import interactive_request
+from track_matching import normalize_string, calculate_similarity, similarity_upper_bound, present_condition
+from version_filter import is_unwanted_version, is_undesirable_suggestion, undesirable_reasons
+
 # --- Logger Setup ---
 LOG_DIR = 'logs'  # This will be relative to the project root (TuneForge/)
 DB_DIR = 'db'    # Database directory
@@ -65,6 +69,7 @@ DEBUG_OLLAMA_RESPONSE = False  # Specific for Ollama response logging, can also
 # --- Navidrome search caching and HTTP session ---
 NAVIDROME_SEARCH_CACHE = OrderedDict()
 NAVIDROME_CACHE_MAX_SIZE = 300
+NAVIDROME_SEARCH_CACHE_LOCK = threading.Lock()  # lookups run in parallel
 try:
     NAVIDROME_SESSION = requests.Session()
 except Exception:
@@ -179,8 +184,8 @@ def save_playlist_history(history_data):
 # --- Debug Logging ---
 _debug_flags_printed = False # Module-level flag to print debug status only once
 
-def debug_log(message, level="INFO", force=False):
-    global DEBUG_ENABLED, _debug_flags_printed
+def _debug_from_config():
+    """Return (raw value, parsed flag) of [APP] Debug, read without the config cache"""
     # Check if debug is enabled in config - avoid circular dependency
     try:
         # Try to get config value directly without going through the full config loading cycle
@@ -198,6 +203,20 @@ def debug_log(message, level="INFO", force=False):
         debug_from_config_str = 'yes'  # Default fallback on any error
     
     debug_from_config = debug_from_config_str.lower() in ('yes', 'true', '1') if isinstance(debug_from_config_str, str) else False
+    return debug_from_config_str, debug_from_config
+
+def debug_log_enabled(level="DEBUG"):
+    """Whether debug_log would write a message of this level (to skip building expensive messages)"""
+    if not DEBUG_ENABLED:
+        return False
+    level_no = logging.getLevelName(level.upper())
+    if isinstance(level_no, int) and not app_file_logger.isEnabledFor(level_no):
+        return False
+    return _debug_from_config()[1]
+
+def debug_log(message, level="INFO", force=False):
+    global DEBUG_ENABLED, _debug_flags_printed
+    debug_from_config_str, debug_from_config = _debug_from_config()
 
     # Print status once
     if not _debug_flags_printed:
@@ -402,10 +421,10 @@ def search_track_in_navidrome(query, navidrome_url, username, password):
     }
     # Build a cache key
     cache_key = (url, tuple(sorted(params.items())))
-    if cache_key in NAVIDROME_SEARCH_CACHE:
-        cached = NAVIDROME_SEARCH_CACHE.pop(cache_key)
-        NAVIDROME_SEARCH_CACHE[cache_key] = cached  # move to end (LRU)
-        return cached
+    with NAVIDROME_SEARCH_CACHE_LOCK:
+        if cache_key in NAVIDROME_SEARCH_CACHE:
+            NAVIDROME_SEARCH_CACHE.move_to_end(cache_key)  # LRU
+            return NAVIDROME_SEARCH_CACHE[cache_key]
     try:
         # Use shared session and a short timeout to avoid long stalls
         response = NAVIDROME_SESSION.get(url, params=params, timeout=4)
@@ -423,9 +442,10 @@ def search_track_in_navidrome(query, navidrome_url, username, password):
                     'source': 'navidrome'
                 })
             # Update LRU cache
-            NAVIDROME_SEARCH_CACHE[cache_key] = tracks
-            if len(NAVIDROME_SEARCH_CACHE) > NAVIDROME_CACHE_MAX_SIZE:
-                NAVIDROME_SEARCH_CACHE.popitem(last=False)
+            with NAVIDROME_SEARCH_CACHE_LOCK:
+                NAVIDROME_SEARCH_CACHE[cache_key] = tracks
+                if len(NAVIDROME_SEARCH_CACHE) > NAVIDROME_CACHE_MAX_SIZE:
+                    NAVIDROME_SEARCH_CACHE.popitem(last=False)
             return tracks
         else:
             # error_message = data.get('subsonic-response', {}).get('error', {}).get('message')
@@ -477,237 +497,74 @@ def create_playlist_in_navidrome(navidrome_url, username, password, playlist_nam
         debug_log(f"Navidrome: JSON decode error for playlist '{playlist_name}': {e}. Response: {response.text[:200] if 'response' in locals() else 'N/A'}", "ERROR", True)
         return None
 
-def normalize_string(text):
-    """Normalize a string for better comparison by removing common suffixes and special characters"""
-    if not text:
-        return ""
-    
-    # Convert to lowercase
-    normalized = text.lower()
-    
-    # Remove common suffixes in parentheses
-    import re
-    normalized = re.sub(r'\s*\([^)]*\)', '', normalized)  # Remove (Live), (Remastered), etc.
-    normalized = re.sub(r'\s*\[[^\]]*\]', '', normalized)  # Remove [Remix], [Album Version], etc.
-    
-    # Remove special characters and extra whitespace
-    normalized = re.sub(r'[^\w\s]', ' ', normalized)  # Replace special chars with spaces
-    normalized = re.sub(r'\s+', ' ', normalized)       # Multiple spaces to single space
-    normalized = normalized.strip()
-    
-    return normalized
-
-def calculate_similarity(str1, str2):
-    """Calculate similarity between two strings using multiple methods"""
-    if not str1 or not str2:
-        return 0.0
-    
-    # Normalize both strings
-    norm1 = normalize_string(str1)
-    norm2 = normalize_string(str2)
-    
-    # Exact match after normalization
-    if norm1 == norm2:
-        return 1.0
-    
-    # Word-based similarity
-    words1 = set(norm1.split())
-    words2 = set(norm2.split())
-    
-    if not words1 or not words2:
-        return 0.0
-    
-    # Jaccard similarity
-    intersection = len(words1.intersection(words2))
-    union = len(words1.union(words2))
-    word_similarity = intersection / union if union > 0 else 0.0
-    
-    # Character-based similarity (for handling typos)
-    import difflib
-    char_similarity = difflib.SequenceMatcher(None, norm1, norm2).ratio()
-    
-    # Return the higher of the two similarities
-    return max(word_similarity, char_similarity)
-
-def is_unwanted_version(title, album=None):
-    """Return True if the track looks like a live/remaster/demo/acoustic/etc. version we should avoid."""
-    def has_any_keyword(text):
-        if not text:
-            return False
-        t = text.lower()
-        keywords = [
-            ' live ', ' live-', ' live_', '(live', '[live',
-            ' remaster', '(remaster', '[remaster', ' remastered',
-            ' acoustic', '(acoustic', '[acoustic',
-            ' demo', '(demo', '[demo',
-            ' edit', '(edit', '[edit',
-            ' karaoke', ' instrumental'
-        ]
-        # Add boundary spaces to catch plain suffix/prefix
-        t_spaced = f" {t} "
-        return any(k in t_spaced for k in keywords)
-
-    return has_any_keyword(title) or has_any_keyword(album)
-
-def search_tracks_in_navidrome(navidrome_url, username, password, ollama_suggested_tracks, final_unique_matched_tracks_map):
-    """Search for tracks in Navidrome and add them to the final matched tracks map"""
-    if not all([navidrome_url, username, password]):
-        debug_log("Navidrome credentials/URL missing, skipping Navidrome search batch.", "WARN")
-        return []
-    
-    newly_matched_for_batch = []
-
-    # Build pending list skipping already matched
-    pending = []
-    for suggested_track in ollama_suggested_tracks:
-        title, artist = suggested_track.get("title"), suggested_track.get("artist")
-        if not title or not artist:
-            continue
-        track_key = (title.lower(), artist.lower())
-        if track_key in final_unique_matched_tracks_map:
-            continue
-        pending.append((track_key, suggested_track, title, artist))
+def build_navidrome_search_strategies(title, artist):
+    """Build multiple search strategies for better matching"""
+    strategies = []
 
-    if not pending:
-        return newly_matched_for_batch
+    # Strategy 1: Artist + Title (often works best)
+    if title and artist:
+        strategies.append(('artist_title', f'"{artist}" "{title}"'))
 
-    # Concurrency control from config
-    try:
-        max_workers = int(get_config_value('APP', 'NavidromeMaxConcurrency', '10'))
-    except Exception:
-        max_workers = 10
+    # Strategy 2: Title only (can find tracks when artist info is complex)
+    if title:
+        strategies.append(('title_only', f'"{title}"'))
 
-    from concurrent.futures import ThreadPoolExecutor, as_completed
+    # Strategy 3: Artist only (fallback for artist-based search)
+    if artist:
+        strategies.append(('artist_only', f'"{artist}"'))
 
-    def build_query(t, a):
-        st = t.replace('"', '\\"')
-        sa = a.replace('"', '\\"')
-        return f'"{st}" "{sa}"'
-    
-    def build_search_strategies(title, artist):
-        """Build multiple search strategies for better matching"""
-        strategies = []
-        
-        # Strategy 1: Artist + Title (often works best)
-        if title and artist:
-            strategies.append(('artist_title', f'"{artist}" "{title}"'))
-        
-        # Strategy 2: Title only (can find tracks when artist info is complex)
-        if title:
-            strategies.append(('title_only', f'"{title}"'))
-        
-        # Strategy 3: Artist only (fallback for artist-based search)
-        if artist:
-            strategies.append(('artist_only', f'"{artist}"'))
-        
-        # Strategy 4: Title + Artist (original strategy)
-        if title and artist:
-            strategies.append(('title_artist', f'"{title}" "{artist}"'))
-        
-        return strategies
+    # Strategy 4: Title + Artist (original strategy)
+    if title and artist:
+        strategies.append(('title_artist', f'"{title}" "{artist}"'))
 
-    def evaluate_results(title, artist, results):
-        best = None
-        best_score = 0.0
-        for nt in results[:20]:
-            if is_unwanted_version(nt.get('title'), nt.get('album')):
-                continue
-            ts = calculate_similarity(title, nt['title'])
-            ars = calculate_similarity(artist, nt['artist'])
-            combined = (ts * 0.7) + (ars * 0.3)
-            if combined > best_score and combined >= 0.82 and ts >= 0.88 and ars >= 0.70:
-                best = nt
-                best_score = combined
-                if combined >= 0.92 and ts >= 0.92:
-                    break
-        return best
+    return strategies
 
-    # Submit primary searches concurrently
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_item = {}
-        for track_key, suggested_track, title, artist in pending:
-            # Try multiple search strategies for better matching
-            search_strategies = build_search_strategies(title, artist)
-            navidrome_tracks = []
-            used_strategy = None
-            
-            # Try each strategy until we find a match
-            for strategy_type, query in search_strategies:
-                try:
-                    navidrome_tracks = search_track_in_navidrome(query, navidrome_url, username, password)
-                    if navidrome_tracks:
-                        used_strategy = f"{strategy_type}: {query}"
-                        debug_log(f"Navidrome: Found match using strategy: {used_strategy}", 'DEBUG')
-                        break
-                except Exception as e:
-                    debug_log(f"Search strategy '{strategy_type}: {query}' failed: {e}", 'WARN')
-                    continue
-            
-            if navidrome_tracks:
-                future = executor.submit(lambda: navidrome_tracks, None)  # Return the found tracks directly
-                future_to_item[future] = (track_key, suggested_track, title, artist, used_strategy)
-            else:
-                debug_log(f"Navidrome: No matches found for '{title}' by '{artist}' with any strategy", 'DEBUG')
+def navidrome_match_source(navidrome_url, username, password):
+    """
+    Navidrome lookup for the fan-out matcher: ('navidrome', fn), where fn maps a
+    suggested track to its match details or None.
+    """
+    def lookup(suggested_track):
+        title, artist = suggested_track.get("title"), suggested_track.get("artist")
+        navidrome_tracks = []
+        used_strategy = None
 
-        # Process as results arrive
-        # Optional: determine target to allow early stop
-        target_songs = None
-        if hasattr(api_generate_playlist, 'playlist_progress'):
-            for _pid, _p in api_generate_playlist.playlist_progress.items():
-                if _p.get('status') in ['starting', 'progress']:
-                    target_songs = _p.get('target_songs')
+        # Try each strategy until one returns results
+        for strategy_type, query in build_navidrome_search_strategies(title, artist):
+            try:
+                navidrome_tracks = search_track_in_navidrome(query, navidrome_url, username, password)
+                if navidrome_tracks:
+                    used_strategy = f"{strategy_type}: {query}"
+                    debug_log(f"Navidrome: Found match using strategy: {used_strategy}", 'DEBUG')
                     break
+            except Exception as e:
+                debug_log(f"Search strategy '{strategy_type}: {query}' failed: {e}", 'WARN')
+                continue
 
-        for future in as_completed(future_to_item):
-            future_data = future_to_item[future]
-            if len(future_data) == 5:  # New format with strategy
-                track_key, suggested_track, title, artist, used_strategy = future_data
-                found_navidrome_tracks = future.result() or []
-            else:  # Fallback for old format
-                track_key, suggested_track, title, artist = future_data
-                used_strategy = "legacy"
-                try:
-                    found_navidrome_tracks = future.result() or []
-                except Exception:
-                    found_navidrome_tracks = []
-
-            if found_navidrome_tracks:
-                best_match = evaluate_results(title, artist, found_navidrome_tracks)
-            else:
-                best_match = None
+        if not navidrome_tracks:
+            debug_log(f"Navidrome: No matches found for '{title}' by '{artist}' with any strategy", 'DEBUG')
+            return None
 
-            if best_match:
-                match_details = {
-                    'id': best_match['id'], 'title': best_match['title'], 'artist': best_match['artist'],
-                    'album': best_match['album'], 'source': 'navidrome',
-                    'original_suggestion': {'title': title, 'artist': artist, 'album': suggested_track.get('album')},
-                    'search_strategy': used_strategy
-                }
-                final_unique_matched_tracks_map[track_key] = match_details
-                newly_matched_for_batch.append(match_details)
-
-                # Update progress for individual track match
-                if hasattr(api_generate_playlist, 'playlist_progress'):
-                    for playlist_id, progress in api_generate_playlist.playlist_progress.items():
-                        if progress['status'] in ['starting', 'progress']:
-                            progress.update({
-                                'current_status': f'Matched: {best_match["artist"]} - {best_match["title"]}. Currently at tracks {len(final_unique_matched_tracks_map)}/{progress.get("target_songs", "?")}.',
-                                'current_track': f'{best_match["artist"]} - {best_match["title"]}',
-                                'tracks_found': len(final_unique_matched_tracks_map)
-                            })
-                            break
+        best_match = evaluate_local_candidates(title, artist, navidrome_tracks[:20])
+        if not best_match:
+            debug_log(f"Navidrome: ❌ No suitable match found for '{title}' by '{artist}'", "DEBUG")
+            return None
+        return {
+            'id': best_match['id'], 'title': best_match['title'], 'artist': best_match['artist'],
+            'album': best_match['album'], 'source': 'navidrome',
+            'original_suggestion': {'title': title, 'artist': artist, 'album': suggested_track.get('album')},
+            'search_strategy': used_strategy
+        }
 
-                # Early stop if we reached target
-                if target_songs and len(final_unique_matched_tracks_map) >= int(target_songs):
-                    try:
-                        executor.shutdown(wait=False, cancel_futures=True)
-                    except Exception:
-                        pass
-                    break
-            else:
-                debug_log(f"Navidrome: ❌ No suitable match found for '{title}' by '{artist}'", "DEBUG")
+    return 'navidrome', lookup
 
-    return newly_matched_for_batch
+def search_tracks_in_navidrome(navidrome_url, username, password, ollama_suggested_tracks, final_unique_matched_tracks_map, num_songs=None):
+    """Search for tracks in Navidrome and add them to the final matched tracks map"""
+    if not all([navidrome_url, username, password]):
+        debug_log("Navidrome credentials/URL missing, skipping Navidrome search batch.", "WARN")
+        return []
+    return match_suggestions_across_sources([navidrome_match_source(navidrome_url, username, password)],
+                                            ollama_suggested_tracks, final_unique_matched_tracks_map, num_songs)
 
 # --- Plex Functions ---
 def search_track_in_plex(plex_url, plex_token, title, artist, album, library_section_id):
@@ -890,18 +747,13 @@ def create_playlist_in_plex(playlist_name, track_ids, plex_server_url, plex_toke
         debug_log(f"Plex: Unexpected error during playlist op for '{playlist_name}': {e}", "ERROR", True)
         return None, 0
 
-def search_tracks_in_plex(plex_url, plex_token, ollama_suggested_tracks, final_unique_matched_tracks_map, library_section_id):
-    newly_matched_for_batch = []
-    if not all([plex_url, plex_token, library_section_id]):
-        debug_log("Plex credentials/URL/SectionID missing, skipping Plex search batch.", "WARN")
-        return newly_matched_for_batch
-
-    for suggested_track in ollama_suggested_tracks:
+def plex_match_source(plex_url, plex_token, library_section_id):
+    """
+    Plex lookup for the fan-out matcher: ('plex', fn), where fn maps a
+    suggested track to its match details or None.
+    """
+    def lookup(suggested_track):
         title, artist, album = suggested_track.get("title"), suggested_track.get("artist"), suggested_track.get("album", "Unknown Album")
-        if not title or not artist: continue
-
-        track_key = (title.lower(), artist.lower())
-        if track_key in final_unique_matched_tracks_map: continue
 
         # Try multiple search strategies for better matching
         search_strategies = [
@@ -910,10 +762,10 @@ def search_tracks_in_plex(plex_url, plex_token, ollama_suggested_tracks, final_u
             (title, None, None),  # Title only
             (None, artist, None),  # Artist only
         ]
-        
+
         found_plex_track = None
         used_strategy = None
-        
+
         for search_title, search_artist, search_album in search_strategies:
             if not search_title and not search_artist: continue
             try:
@@ -925,21 +777,25 @@ def search_tracks_in_plex(plex_url, plex_token, ollama_suggested_tracks, final_u
             except Exception as e:
                 debug_log(f"Plex search strategy failed: {e}", 'WARN')
                 continue
-        
-        if found_plex_track:
-            match_details = {
-                'id': found_plex_track['id'], 'title': found_plex_track['title'], 'artist': found_plex_track['artist'],
-                'album': found_plex_track['album'], 'source': 'plex',
-                'original_suggestion': {'title': title, 'artist': artist, 'album': album},
-                'search_strategy': used_strategy
-            }
-            final_unique_matched_tracks_map[track_key] = match_details
-            newly_matched_for_batch.append(match_details)
-            debug_log(f"Plex: Matched '{found_plex_track['title']}' by '{found_plex_track['artist']}' for suggestion '{title}' by '{artist}' using strategy: {used_strategy}.", "INFO")
-        # else:
-            # debug_log(f"Plex: No match for '{title}' by '{artist}' (Album: '{album}') in section {library_section_id}.", "DEBUG")
-            
-    return newly_matched_for_batch
+
+        if not found_plex_track:
+            return None
+        debug_log(f"Plex: Matched '{found_plex_track['title']}' by '{found_plex_track['artist']}' for suggestion '{title}' by '{artist}' using strategy: {used_strategy}.", "INFO")
+        return {
+            'id': found_plex_track['id'], 'title': found_plex_track['title'], 'artist': found_plex_track['artist'],
+            'album': found_plex_track['album'], 'source': 'plex',
+            'original_suggestion': {'title': title, 'artist': artist, 'album': album},
+            'search_strategy': used_strategy
+        }
+
+    return 'plex', lookup
+
+def search_tracks_in_plex(plex_url, plex_token, ollama_suggested_tracks, final_unique_matched_tracks_map, library_section_id, num_songs=None):
+    if not all([plex_url, plex_token, library_section_id]):
+        debug_log("Plex credentials/URL/SectionID missing, skipping Plex search batch.", "WARN")
+        return []
+    return match_suggestions_across_sources([plex_match_source(plex_url, plex_token, library_section_id)],
+                                            ollama_suggested_tracks, final_unique_matched_tracks_map, num_songs)
 
 def test_plex_connection(plex_url, plex_token):
     result = {'success': False, 'error': None, 'message': 'Test not fully executed.', 'details': {}, 'server_info': None}
@@ -1100,6 +956,12 @@ def new_generator():
         
         return render_template('sonic_traveller.html')
 
+    # Only generation counts as interactive work; viewing the page must not throttle analysis
+    return _new_generator_playlist()
+
+@interactive_request
+def _new_generator_playlist():
+    """Generate a playlist for POST /new-generator"""
     data = request.get_json() or {}
     seed_track = (data.get('seed_track') or '').strip()
     seed_track_id = data.get('seed_track_id')
@@ -1147,11 +1009,10 @@ def new_generator():
                 stitle = (parts[0] if parts else '').strip()
                 sartist = (parts[1] if len(parts) > 1 else '').strip()
                 if stitle and sartist:
-                    cur = conn.cursor()
-                    cur.execute('SELECT id FROM tracks WHERE lower(title)=? AND lower(artist)=? LIMIT 1', (stitle.lower(), sartist.lower()))
-                    r = cur.fetchone()
-                    if r:
-                        seed_features = fetch_track_features(db_path, int(r[0]))
+                    from track_matching import find_by_match_key
+                    rows = find_by_match_key(conn.cursor(), stitle, sartist)
+                    if rows:
+                        seed_features = fetch_track_features(db_path, int(rows[0]['id']))
             finally:
                 conn.close()
 
@@ -1214,37 +1075,10 @@ def _map_candidates_to_local_with_features(candidates):
     if not unique_pairs:
         return []
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    matched_rows = []  # list of dicts with id,title,artist,album
-
-    try:
-        # First pass: exact lower(title,artist)
-        for title, artist in unique_pairs:
-            cursor.execute(
-                "SELECT id, title, artist, album FROM tracks WHERE lower(title)=? AND lower(artist)=? LIMIT 1",
-                (title.lower(), artist.lower())
-            )
-            row = cursor.fetchone()
-            if row:
-                matched_rows.append({'id': row[0], 'title': row[1] or '', 'artist': row[2] or '', 'album': row[3] or ''})
-
-        # Second pass: LIKE for those not matched
-        remaining = [(t, a) for (t, a) in unique_pairs if not any((r['title'].lower(), r['artist'].lower()) == (t.lower(), a.lower()) for r in matched_rows)]
-        for title, artist in remaining:
-            like_title = f"%{title}%"
-            like_artist = f"%{artist}%"
-            cursor.execute(
-                "SELECT id, title, artist, album FROM tracks WHERE title LIKE ? AND artist LIKE ? LIMIT 10",
-                (like_title, like_artist)
-            )
-            candidate_rows = [{'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''} for r in cursor.fetchall() or []]
-            # crude best: pick first for now; later we could reuse evaluate logic
-            if candidate_rows:
-                matched_rows.append(candidate_rows[0])
-
-    finally:
-        conn.close()
+    # Same resolution as Ask-a-Friend local matching, but any version of a
+    # track is a valid point on the path (cached under its own rule set)
+    resolved = resolve_local_suggestions(unique_pairs, skip_unwanted_versions=False)
+    matched_rows = [resolved[pair] for pair in unique_pairs if resolved.get(pair)]  # list of dicts with id,title,artist,album
 
     # Filter by having features
     try:
@@ -1388,6 +1222,7 @@ def api_test_plex_connection():
     return jsonify(result)
 
 @main_bp.route('/api/generate-playlist', methods=['POST'])
+@interactive_request
 def api_generate_playlist():
     debug_log("Playlist generation API called", "INFO")
     debug_log(f"Request headers: {dict(request.headers)}", "DEBUG")
@@ -1434,6 +1269,8 @@ def api_generate_playlist():
         return jsonify({"error": "Ollama URL or Model not configured in settings."}), 400
     
     use_local_matching = get_config_value('APP', 'UseLocalMatching', 'no').lower() in ('yes', 'true', '1')
+    # UseLocalMatching means "the local library instead of the remote servers" (see settings),
+    # so the match sources below are either local or Navidrome/Plex, never both
     enable_navidrome = (not use_local_matching) and ('navidrome' in services_to_use) and get_config_value('APP', 'EnableNavidrome', 'no').lower() in ('yes', 'true', '1')
     enable_plex = (not use_local_matching) and ('plex' in services_to_use) and get_config_value('APP', 'EnablePlex', 'no').lower() in ('yes', 'true', '1')
 
@@ -1494,28 +1331,16 @@ def api_generate_playlist():
         all_ollama_suggestions_raw.extend(current_ollama_batch)
         
         # Pre-filter Ollama suggestions (live, instrumental, already found etc.)
-        undesirable_patterns = [ # Regex patterns
-            r"\(live\b", r"\[live\b", r"- live\b", r"\blive at\b", r"\blive from\b",
-            r"\(instrumental\b", r"\[instrumental\b", r"- instrumental\b",
-            r"\(karaoke\b", r"\[karaoke\b", r"- karaoke\b", r"karaoke version\b",
-            r"\(cover\b", r"\[cover\b", r"- cover\b", r" tribute\b",
-            r"\(remix\b", r"\[remix\b", r"- remix\b",
-            r"\(acoustic\b", r"\[acoustic\b", r"- acoustic\b",
-            r"\(edit\b", r"\[edit\b", r"- radio edit\b", r"single version\b",
-            r"\(demo\b", r"\[demo\b", r"- demo\b", r"\(session\b", r"\[session\b",
-        ]
-        undesirable_artist_keywords = ["karaoke", "tribute band", "the karaoke crew", "various artists", "soundtrack"]
-        
         eligible_tracks_for_search = []
         for track in current_ollama_batch:
             title_l, artist_l, album_l = track.get("title","").lower(), track.get("artist","").lower(), track.get("album","").lower()
             if not title_l or not artist_l: continue
             if (title_l, artist_l) in final_unique_matched_tracks_map: continue # Already found
 
-            is_undesirable = any(re.search(p, title_l) or re.search(p, album_l) for p in undesirable_patterns) or \
-                             any(k in artist_l for k in undesirable_artist_keywords)
-            if is_undesirable:
-                debug_log(f"Filtering out undesirable: '{track.get('title')}' by '{track.get('artist')}' (pattern: {[p for p in undesirable_patterns if re.search(p, title_l or '') or re.search(p, album_l or '')]} artist keywords: {[k for k in undesirable_artist_keywords if k in artist_l]})", "DEBUG")
+            if is_undesirable_suggestion(title_l, artist_l, album_l):
+                if debug_log_enabled():
+                    reasons = undesirable_reasons(title_l, artist_l, album_l)
+                    debug_log(f"Filtering out undesirable: '{track.get('title')}' by '{track.get('artist')}' (pattern: {reasons['patterns']} artist keywords: {reasons['artist_keywords']})", "DEBUG")
                 continue
             eligible_tracks_for_search.append(track)
         
@@ -1523,40 +1348,30 @@ def api_generate_playlist():
         debug_log(f"Ollama: Processing {len(eligible_tracks_for_search)} tracks for matching...", "INFO")
         if not eligible_tracks_for_search: continue
 
+        # Query all enabled sources at once; a suggestion takes the first source (in this order) that matches it
+        match_sources = []
         if use_local_matching:
-            newly_matched = search_tracks_in_local_library(eligible_tracks_for_search, final_unique_matched_tracks_map)
-            api_generate_playlist.playlist_progress[playlist_id].update({
-                'tracks_found': len(final_unique_matched_tracks_map),
-                'current_status': f'Found {len(newly_matched)} new tracks via Local Library',
-                'current_phase': 'local'
-            })
-            if len(final_unique_matched_tracks_map) >= num_songs: break
-        
+            match_sources.append(local_match_source(eligible_tracks_for_search))
         if enable_navidrome:
-            debug_log(f"Navidrome: Starting search for {len(eligible_tracks_for_search)} eligible tracks", "INFO")
-            newly_matched = search_tracks_in_navidrome(navidrome_url, navidrome_user, navidrome_pass, eligible_tracks_for_search, final_unique_matched_tracks_map)
-            debug_log(f"Navidrome: Search completed. Found {len(newly_matched)} new matches", "INFO")
-            
-            # Update progress after Navidrome search
-            api_generate_playlist.playlist_progress[playlist_id].update({
-                'tracks_found': len(final_unique_matched_tracks_map),
-                'current_status': f'Found {len(newly_matched)} new tracks via Navidrome',
-                'current_phase': 'navidrome'
-            })
-            
-            if len(final_unique_matched_tracks_map) >= num_songs: break
-        
+            match_sources.append(navidrome_match_source(navidrome_url, navidrome_user, navidrome_pass))
         if enable_plex:
-            search_tracks_in_plex(plex_server_url, plex_token, eligible_tracks_for_search, final_unique_matched_tracks_map, plex_section_id)
-            
-            # Update progress after Plex search
+            match_sources.append(plex_match_source(plex_server_url, plex_token, plex_section_id))
+
+        if match_sources:
+            source_names = [name for name, _ in match_sources]
+            debug_log(f"Matching: Searching {', '.join(source_names)} for {len(eligible_tracks_for_search)} eligible tracks", "INFO")
+            newly_matched = match_suggestions_across_sources(match_sources, eligible_tracks_for_search, final_unique_matched_tracks_map, num_songs)
+            debug_log(f"Matching: Search completed. Found {len(newly_matched)} new matches", "INFO")
+
+            # Update progress after the batch
             api_generate_playlist.playlist_progress[playlist_id].update({
                 'tracks_found': len(final_unique_matched_tracks_map),
-                'current_status': f'Found tracks via Plex'
+                'current_status': f'Found {len(newly_matched)} new tracks via {", ".join(source_names)}',
+                'current_phase': source_names[0] if len(source_names) == 1 else 'matching'
             })
-            
+
             if len(final_unique_matched_tracks_map) >= num_songs: break
-        
+
         if ollama_api_calls_made < max_ollama_attempts and len(final_unique_matched_tracks_map) < num_songs:
             tracks_still_needed = num_songs - len(final_unique_matched_tracks_map)
             debug_log(f"Playlist Gen: Need more tracks. Current: {len(final_unique_matched_tracks_map)}/{num_songs}. Continuing to next Ollama call...", "INFO", True)
@@ -1788,6 +1603,9 @@ def api_logs_stream():
     return response
 
 # --- Local Music Management ---
+# Columns the browse API can sort and seek on
+BROWSE_SORT_COLUMNS = ('title', 'artist', 'album', 'year', 'genre', 'duration')
+
 def init_local_music_db():
     """Initialize the local music database"""
     db_path = os.path.join(DB_DIR, 'local_music.db')
@@ -1807,235 +1625,92 @@ def init_local_music_db():
             duration REAL,
             file_size INTEGER,
             last_modified REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            analysis_status TEXT DEFAULT 'pending'
         )
     ''')
     
+    # Searches and matches filter on analysis_status (the scanner flags vanished files 'missing'),
+    # so it must exist before AudioAnalysisService adds the other analysis columns
+    cursor.execute('PRAGMA table_info(tracks)')
+    if 'analysis_status' not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE tracks ADD COLUMN analysis_status TEXT DEFAULT 'pending'")
+    
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_title ON tracks(title)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_artist ON tracks(artist)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_album ON tracks(album)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_genre ON tracks(genre)')
     
+    # Keyset browsing: every index ends in the rowid, so (column, id) seeks use them directly
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_year ON tracks(year)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_duration ON tracks(duration)')
+    for column in BROWSE_SORT_COLUMNS:
+        if column != 'genre':
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_genre_{column} ON tracks(genre, {column})')
+    
     conn.commit()
-    conn.close()
-    return db_path
-
-def scan_music_folder(folder_path):
-    """Scan a music folder and index all tracks"""
-    if not os.path.exists(folder_path):
-        return {'success': False, 'error': 'Folder does not exist'}
     
-    supported_extensions = {'.mp3', '.flac', '.m4a', '.ogg', '.wav', '.aac'}
-    db_path = init_local_music_db()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    # Normalized title/artist keys for indexed exact matching
+    from track_matching import ensure_match_keys
+    ensure_match_keys(conn)
     
-    stats = {'total_files': 0, 'indexed': 0, 'errors': 0, 'skipped': 0}
+    # Canonical artist names (articles, diacritics, featured artists) for alias matching
+    from artist_aliases import ensure_artist_aliases
+    ensure_artist_aliases(conn)
     
+    # Full-text index for track search, kept in sync by triggers
     try:
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_ext = os.path.splitext(file)[1].lower()
-                
-                if file_ext not in supported_extensions:
-                    stats['skipped'] += 1
-                    continue
-                
-                stats['total_files'] += 1
-                
-                try:
-                    # Extract metadata using mutagen
-                    metadata = extract_track_metadata(file_path)
-                    if metadata:
-                        # Check if track already exists
-                        cursor.execute('SELECT id FROM tracks WHERE file_path = ?', (file_path,))
-                        existing = cursor.fetchone()
-                        
-                        if existing:
-                            # Update existing track
-                            cursor.execute('''
-                                UPDATE tracks SET 
-                                    title = ?, artist = ?, album = ?, genre = ?, 
-                                    year = ?, track_number, duration = ?, 
-                                    file_size = ?, last_modified = ?
-                                WHERE file_path = ?
-                            ''', (
-                                metadata.get('title'), metadata.get('artist'), metadata.get('album'),
-                                metadata.get('genre'), metadata.get('year'), metadata.get('track_number'),
-                                metadata.get('duration'), metadata.get('file_size'), metadata.get('last_modified'),
-                                file_path
-                            ))
-                        else:
-                            # Insert new track
-                            cursor.execute('''
-                                INSERT INTO tracks (file_path, title, artist, album, genre, 
-                                                  year, track_number, duration, file_size, last_modified)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                file_path, metadata.get('title'), metadata.get('artist'), metadata.get('album'),
-                                metadata.get('genre'), metadata.get('year'), metadata.get('track_number'),
-                                metadata.get('duration'), metadata.get('file_size'), metadata.get('last_modified')
-                            ))
-                        
-                        stats['indexed'] += 1
-                    else:
-                        stats['errors'] += 1
-                        
-                except Exception as e:
-                    debug_log(f"Error indexing {file_path}: {str(e)}", "ERROR")
-                    stats['errors'] += 1
-        
-        conn.commit()
-        conn.close()
-        
-        return {'success': True, 'stats': stats}
-        
+        from track_search_index import ensure_search_index
+        ensure_search_index(conn)
     except Exception as e:
-        conn.close()
-        return {'success': False, 'error': str(e)}
-
-def scan_music_folder_with_progress(folder_path, scan_id):
-    """Scan a music folder with progress tracking"""
-    if not os.path.exists(folder_path):
-        return {'success': False, 'error': 'Folder does not exist'}
+        debug_log(f"Could not create track search index: {e}", "WARNING")
     
-    # Get the progress tracker
-    progress_tracker = api_scan_music_folder.scan_progress.get(scan_id)
-    if not progress_tracker:
-        return {'success': False, 'error': 'Progress tracker not found'}
+    # Library statistics, maintained incrementally by triggers
+    from library_stats import ensure_stats_tables
+    ensure_stats_tables(conn)
     
-    supported_extensions = {'.mp3', '.flac', '.m4a', '.ogg', '.wav', '.aac'}
-    db_path = init_local_music_db()
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    conn.close()
+    return db_path
+
+def _create_library_scanner(incremental=True, progress=None, **options):
+    """Create a LibraryScanner for the local music database"""
+    from library_scanner import LibraryScanner
     
-    stats = {'total_files': 0, 'indexed': 0, 'errors': 0, 'skipped': 0}
+    # Every committed batch changes what searches return
+    on_batch_committed = options.pop('on_batch_committed', None)
+    def batch_committed(checkpoint):
+        invalidate_track_caches()
+        if on_batch_committed:
+            on_batch_committed(checkpoint)
     
-    try:
-        # First pass: count total files with live progress updates
-        progress_tracker['status'] = 'counting'
-        progress_tracker['current_file'] = 'Counting all files...'
-        progress_tracker['files_processed'] = 0
-        progress_tracker['total_files'] = 0
-        
-        # Count all files first to get total with live updates
-        all_files = 0
-        music_files = 0
-        files_checked = 0
-        
-        for root, dirs, files in os.walk(folder_path):
-            all_files += len(files)
-            for file in files:
-                files_checked += 1
-                file_ext = os.path.splitext(file)[1].lower()
-                if file_ext in supported_extensions:
-                    music_files += 1
-                
-                # Update counting progress every 1000 files or every file if < 1000
-                if files_checked % max(1, min(1000, max(1, files_checked // 20))) == 0:
-                    progress_tracker['files_processed'] = files_checked
-                    progress_tracker['current_file'] = f'Counting... {files_checked} files checked, {music_files} music files found'
-        
-        # Update stats and progress tracker
-        stats['total_files'] = music_files
-        progress_tracker['total_files'] = music_files
-        progress_tracker['current_file'] = f'Found {music_files} music files out of {all_files} total files'
-        progress_tracker['files_processed'] = 0  # Reset for scanning phase
-        progress_tracker['status'] = 'scanning'
-        
-        debug_log(f"Starting scanning phase: {music_files} music files to process", "INFO")
-        
-        # Second pass: process files with progress updates
-        processed_count = 0
-        progress_tracker['current_file'] = 'Starting to process music files...'
-        debug_log(f"Entering scanning loop for {music_files} music files", "INFO")
-        
-        for root, dirs, files in os.walk(folder_path):
-            debug_log(f"Processing directory: {root} with {len(files)} files", "INFO")
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_ext = os.path.splitext(file)[1].lower()
-                
-                if file_ext not in supported_extensions:
-                    stats['skipped'] += 1
-                    continue
-                
-                processed_count += 1
-                progress_tracker['files_processed'] = processed_count
-                progress_tracker['current_file'] = f'Processing {processed_count}/{music_files}: {os.path.basename(file_path)}'
-                
-                # Update progress every 100 files for good balance
-                if processed_count % 100 == 0:
-                    debug_log(f"Processed {processed_count}/{music_files} files", "INFO")
-                    progress_tracker['files_processed'] = processed_count
-                
-                try:
-                    # Extract metadata using mutagen
-                    metadata = extract_track_metadata(file_path)
-                    if metadata:
-                        # Check if track already exists
-                        cursor.execute('SELECT id FROM tracks WHERE file_path = ?', (file_path,))
-                        existing = cursor.fetchone()
-                        
-                        if existing:
-                            # Update existing track
-                            cursor.execute('''
-                                UPDATE tracks SET 
-                                    title = ?, artist = ?, album = ?, genre = ?, 
-                                    year = ?, track_number = ?, duration = ?, 
-                                    file_size = ?, last_modified = ?
-                                WHERE file_path = ?
-                            ''', (
-                                metadata.get('title'), metadata.get('artist'), metadata.get('album'),
-                                metadata.get('genre'), metadata.get('year'), metadata.get('track_number'),
-                                metadata.get('duration'), metadata.get('file_size'), metadata.get('last_modified'),
-                                file_path
-                            ))
-                        else:
-                            # Insert new track
-                            cursor.execute('''
-                                INSERT INTO tracks (file_path, title, artist, album, genre, 
-                                                  year, track_number, duration, file_size, last_modified)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                file_path, metadata.get('title'), metadata.get('artist'), metadata.get('album'),
-                                metadata.get('genre'), metadata.get('year'), metadata.get('track_number'),
-                                metadata.get('duration'), metadata.get('file_size'), metadata.get('last_modified')
-                            ))
-                        
-                        stats['indexed'] += 1
-                        progress_tracker['indexed'] = stats['indexed']
-                    else:
-                        stats['errors'] += 1
-                        progress_tracker['errors'] = stats['errors']
-                        
-                except Exception as e:
-                    debug_log(f"Error indexing {file_path}: {str(e)}", "ERROR")
-                    stats['errors'] += 1
-                    progress_tracker['errors'] = stats['errors']
-                
-                # Update progress every 100 files for good balance
-                if processed_count % 100 == 0:
-                    progress_tracker['files_processed'] = processed_count
-        
-        # Final progress update
-        progress_tracker['files_processed'] = processed_count
-        progress_tracker['current_file'] = f'Completed! Processed {processed_count} music files'
-        debug_log(f"Scanning completed: {processed_count} files processed, {stats['indexed']} indexed, {stats['errors']} errors", "INFO")
-        
-        conn.commit()
-        conn.close()
-        
-        return {'success': True, 'stats': stats}
-        
-    except Exception as e:
-        conn.close()
-        return {'success': False, 'error': str(e)}
+    return LibraryScanner(
+        db_path=init_local_music_db(),
+        metadata_reader=extract_track_metadata,
+        incremental=incremental,
+        missing_action=get_config_value('APP', 'MissingTrackAction', 'flag').lower(),
+        progress=progress,
+        scan_threads=int(get_config_value('APP', 'ScanThreads', '8')),
+        batch_size=int(get_config_value('APP', 'ScanBatchSize', '500')),
+        on_batch_committed=batch_committed,
+        **options
+    )
+
+def scan_music_folder(folder_path, incremental=True):
+    """Scan a music folder and index all tracks"""
+    return _create_library_scanner(incremental).scan(folder_path)
 
 def extract_track_metadata(file_path):
-    """Extract metadata from a music file"""
+    """Extract metadata from a music file (fast tag reader first, full mutagen parse as fallback)"""
+    from fast_tag_reader import read_track_metadata
+    metadata = read_track_metadata(file_path)
+    if metadata is not None:
+        return metadata
+    return extract_track_metadata_full(file_path)
+
+def extract_track_metadata_full(file_path):
+    """Extract metadata from a music file with full mutagen format detection"""
     try:
+        from fast_tag_reader import metadata_from_audio
         file_stat = os.stat(file_path)
         file_size = file_stat.st_size
         last_modified = file_stat.st_mtime
@@ -2047,63 +1722,14 @@ def extract_track_metadata(file_path):
             # Try without easy=True for FLAC files
             audio = mutagen.File(file_path)
         
-        metadata = {
-            'title': None,
-            'artist': None,
-            'album': None,
-            'genre': None,
-            'year': None,
-            'track_number': None,
-            'duration': None,
-            'file_size': file_size,
-            'last_modified': last_modified
-        }
-        
-        if audio:
-            # Extract common metadata fields
-            if hasattr(audio, 'tags'):
-                tags = audio.tags
-                
-                # Handle different tag formats
-                if hasattr(tags, 'get'):
-                    metadata['title'] = tags.get('title', [None])[0] if tags.get('title') else None
-                    metadata['artist'] = tags.get('artist', [None])[0] if tags.get('artist') else None
-                    metadata['album'] = tags.get('album', [None])[0] if tags.get('album') else None
-                    metadata['genre'] = tags.get('genre', [None])[0] if tags.get('genre') else None
-                    
-                    # Handle year
-                    year_str = tags.get('date', [None])[0] if tags.get('date') else None
-                    if year_str:
-                        try:
-                            metadata['year'] = int(year_str[:4])
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Handle track number
-                    track_str = tags.get('tracknumber', [None])[0] if tags.get('tracknumber') else None
-                    if track_str:
-                        try:
-                            metadata['track_number'] = int(track_str)
-                        except (ValueError, TypeError):
-                            pass
-            
-            # Get duration
-            if hasattr(audio, 'info') and hasattr(audio.info, 'length'):
-                metadata['duration'] = audio.info.length
-        
-        # Use filename as fallback for title if no metadata
-        if not metadata['title']:
-            filename = os.path.splitext(os.path.basename(file_path))[0]
-            metadata['title'] = filename
-        
-        return metadata
+        return metadata_from_audio(audio, file_path, file_size, last_modified)
         
     except Exception as e:
         debug_log(f"Error extracting metadata from {file_path}: {str(e)}", "ERROR")
         return None
 
-def search_local_tracks(query, limit=50, genre=None, year=None, sort_by='title', sort_order='asc'):
-    """Search for tracks in the local database with filters and sorting"""
+def search_local_tracks(query, limit=50, genre=None, year=None, sort_by='title', sort_order='asc', offset=0):
+    """Search for tracks in the local database with filters and sorting (sort_by='relevance' ranks by BM25)"""
     db_path = os.path.join(DB_DIR, 'local_music.db')
     if not os.path.exists(db_path):
         return []
@@ -2111,11 +1737,16 @@ def search_local_tracks(query, limit=50, genre=None, year=None, sort_by='title',
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    # Build the WHERE clause based on filters
-    where_conditions = []
+    # Build the WHERE clause based on filters; files flagged missing are never listed
+    where_conditions = [present_condition()]
     params = []
     
-    if query:
+    # Word-prefix matching through the FTS5 index; LIKE when the index is unavailable
+    from track_search_index import FTS_TABLE, build_match_query, should_rank, search_index_available
+    match_query = build_match_query(query) if query else None
+    use_fts = match_query is not None and search_index_available(conn)
+    
+    if query and not use_fts:
         search_query = f"%{query}%"
         where_conditions.append("(title LIKE ? OR artist LIKE ? OR album LIKE ?)")
         params.extend([search_query, search_query, search_query])
@@ -2160,21 +1791,41 @@ def search_local_tracks(query, limit=50, genre=None, year=None, sort_by='title',
     order_direction = 'DESC' if sort_order == 'desc' else 'ASC'
     
     # Handle NULL values in sorting
-    if sort_field in ['year', 'duration']:
+    ranked = sort_by == 'relevance' and use_fts and should_rank(conn, query, match_query)
+    if ranked:
+        order_clause = "fts.rank ASC"
+    elif sort_field in ['year', 'duration']:
         order_clause = f"{sort_field} {order_direction}, title ASC"
     else:
         order_clause = f"{sort_field} {order_direction}"
+    # Tie-break on id so every page is cut from the same ordering
+    order_clause += ", id ASC"
     
     # Execute the query
-    sql = f'''
-        SELECT id, title, artist, album, genre, year, duration, file_path
-        FROM tracks 
-        WHERE {where_clause}
-        ORDER BY {order_clause}
-        LIMIT ?
-    '''
+    if use_fts:
+        # No top-k inside the subquery: flagged rows are only filtered after the join
+        # (ranked queries have at most MAX_RANKED_MATCHES matches to sort)
+        params = [match_query] + params
+        sql = f'''
+            SELECT id, title, artist, album, genre, year, duration, file_path
+            FROM tracks JOIN (
+                SELECT rowid AS track_id{', rank' if ranked else ''}
+                FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?
+            ) AS fts ON tracks.id = fts.track_id
+            WHERE {where_clause}
+            ORDER BY {order_clause}
+            LIMIT ? OFFSET ?
+        '''
+    else:
+        sql = f'''
+            SELECT id, title, artist, album, genre, year, duration, file_path
+            FROM tracks 
+            WHERE {where_clause}
+            ORDER BY {order_clause}
+            LIMIT ? OFFSET ?
+        '''
     
-    params.append(limit)
+    params.extend([limit, offset])
     cursor.execute(sql, params)
     
     results = []
@@ -2193,14 +1844,255 @@ def search_local_tracks(query, limit=50, genre=None, year=None, sort_by='title',
     conn.close()
     return results
 
+def _decade_range(decade):
+    """Turn a decade filter like '1990s' into (start, end) years, or None"""
+    match = re.fullmatch(r'(\d{3})0s', decade or '')
+    if not match:
+        return None
+    start = int(match.group(1)) * 10
+    return start, start + 10
+
+def browse_local_tracks(sort_by='title', sort_order='asc', genre=None, year=None, after=None, limit=100):
+    """
+    Yield local tracks page by page using keyset (seek) pagination.
+    
+    `after` is the (sort value, id) of the last row of the previous page. The
+    ORDER BY column and id match an index, so each page is a range scan
+    instead of re-sorting the table. NULL sort values come first ascending
+    and last descending, as SQLite sorts them.
+    """
+    db_path = _get_db_path()
+    if not os.path.exists(db_path):
+        return
+    
+    column = sort_by if sort_by in BROWSE_SORT_COLUMNS else 'title'
+    descending = sort_order == 'desc'
+    where_conditions = [present_condition()]
+    params = []
+    
+    if genre:
+        where_conditions.append("genre = ?")
+        params.append(genre)
+    decade = _decade_range(year)
+    if decade:
+        where_conditions.append("year >= ? AND year < ?")
+        params.extend(decade)
+    
+    # Seek ranges in page order; NULLs need their own range so each query stays an index seek
+    comparison = '<' if descending else '>'
+    if after is None:
+        segments = [(None, [])]
+    else:
+        value, last_id = after
+        if value is None:
+            segments = [(f"{column} IS NULL AND id {comparison} ?", [last_id])]
+            if not descending:
+                segments.append((f"{column} IS NOT NULL", []))
+        else:
+            segments = [(f"({column}, id) {comparison} (?, ?)", [value, last_id])]
+            if descending:
+                segments.append((f"{column} IS NULL", []))
+    
+    direction = 'DESC' if descending else 'ASC'
+    conn = sqlite3.connect(db_path)
+    try:
+        remaining = limit
+        for seek_condition, seek_params in segments:
+            conditions = where_conditions + ([seek_condition] if seek_condition else [])
+            where_clause = " AND ".join(conditions) if conditions else "1=1"
+            cursor = conn.execute(f'''
+                SELECT id, title, artist, album, genre, year, duration
+                FROM tracks
+                WHERE {where_clause}
+                ORDER BY {column} {direction}, id {direction}
+                LIMIT ?
+            ''', params + seek_params + [remaining])
+            while remaining > 0:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                for row in rows:
+                    remaining -= 1
+                    yield {
+                        'id': row[0], 'title': row[1], 'artist': row[2], 'album': row[3],
+                        'genre': row[4], 'year': row[5], 'duration': row[6]
+                    }
+            if remaining <= 0:
+                break
+    finally:
+        conn.close()
+
+def _encode_browse_cursor(sort_by, sort_order, value, track_id):
+    import base64
+    payload = json.dumps({'s': sort_by, 'd': sort_order, 'v': value, 'i': track_id})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def _decode_browse_cursor(cursor, sort_by, sort_order):
+    """Return (value, id) from a browse cursor, or None if it does not match the sort"""
+    import base64
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if data['s'] != sort_by or data['d'] != sort_order:
+            return None
+        return data['v'], int(data['i'])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+@main_bp.route('/api/local-tracks/browse')
+def api_browse_local_tracks():
+    """Browse local tracks with keyset pagination; the page is streamed as JSON"""
+    sort_by = request.args.get('sort_by', 'title')
+    sort_order = request.args.get('sort_order', 'asc')
+    if sort_by not in BROWSE_SORT_COLUMNS:
+        sort_by = 'title'
+    if sort_order not in ('asc', 'desc'):
+        sort_order = 'asc'
+    limit = max(1, min(request.args.get('limit', 100, type=int), 5000))
+    genre = request.args.get('genre') or None
+    year = request.args.get('year') or None
+    
+    after = None
+    cursor = request.args.get('cursor')
+    if cursor:
+        after = _decode_browse_cursor(cursor, sort_by, sort_order)
+        if after is None:
+            return jsonify({'success': False, 'error': 'Invalid cursor for this sort order'}), 400
+    
+    def generate():
+        yield '{"success": true, "results": ['
+        count = 0
+        last = None
+        next_cursor = None
+        # One extra row tells whether there is a next page
+        for track in browse_local_tracks(sort_by, sort_order, genre, year, after, limit + 1):
+            if count == limit:
+                next_cursor = _encode_browse_cursor(sort_by, sort_order, last[sort_by], last['id'])
+                break
+            yield (',' if count else '') + json.dumps(track)
+            count += 1
+            last = track
+        yield f'], "count": {count}, "next_cursor": {json.dumps(next_cursor)}}}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 @main_bp.route('/api/local-search')
 def api_local_search():
     q = (request.args.get('q') or '').strip()
     if not q:
         return jsonify([])
-    rows = search_local_tracks(q, limit=25)
+    rows = search_local_tracks(q, limit=25, sort_by='relevance')
     return jsonify(rows)
 
+# Global typeahead cache instance
+_typeahead_cache_instance = None
+
+def get_typeahead_cache():
+    """Get or create the typeahead result cache"""
+    global _typeahead_cache_instance
+    if _typeahead_cache_instance is None:
+        from typeahead_cache import TypeaheadCache
+        _typeahead_cache_instance = TypeaheadCache(
+            max_entries=int(get_config_value('APP', 'TypeaheadCacheSize', '512'))
+        )
+    return _typeahead_cache_instance
+
+# Global trigram matcher instance (fuzzy matching of suggested tracks)
+_trigram_matcher_instance = None
+
+def get_trigram_matcher():
+    """Get or create the in-memory trigram matcher for the local library"""
+    global _trigram_matcher_instance
+    if _trigram_matcher_instance is None:
+        from trigram_index import TrigramMatcher
+        _trigram_matcher_instance = TrigramMatcher(os.path.join(DB_DIR, 'local_music.db'))
+    return _trigram_matcher_instance
+
+_trigram_index_started = False
+
+@main_bp.before_app_request
+def start_trigram_index_build():
+    """Build the in-memory fuzzy match index in the background (once, on the first request)"""
+    global _trigram_index_started
+    if _trigram_index_started:
+        return
+    _trigram_index_started = True
+    # Not at startup, so the debug reloader's parent process never builds the index
+    try:
+        get_trigram_matcher().refresh()
+    except Exception as e:
+        debug_log(f"Failed to start trigram index build: {e}", "ERROR")
+
+# Global suggestion resolution cache instance (shared by Ask-a-Friend and Sonic Traveller)
+_suggestion_cache_instance = None
+
+def get_suggestion_cache():
+    """Get or create the cache of resolved LLM suggestions"""
+    global _suggestion_cache_instance
+    if _suggestion_cache_instance is None:
+        from suggestion_cache import SuggestionCache
+        _suggestion_cache_instance = SuggestionCache(
+            os.path.join(DB_DIR, 'local_music.db'),
+            negative_ttl=float(get_config_value('APP', 'SuggestionCacheNegativeTTL', '3600'))
+        )
+    return _suggestion_cache_instance
+
+def invalidate_track_caches():
+    """Drop cached search results after the tracks table changed"""
+    if _typeahead_cache_instance is not None:
+        _typeahead_cache_instance.invalidate()
+    if _trigram_matcher_instance is not None:
+        _trigram_matcher_instance.invalidate()
+    if _suggestion_cache_instance is not None:
+        _suggestion_cache_instance.invalidate()
+
+def _encode_typeahead_cursor(query, offset):
+    import base64
+    return base64.urlsafe_b64encode(json.dumps({'q': query, 'o': offset}).encode('utf-8')).decode('ascii')
+
+def _decode_typeahead_cursor(cursor, query):
+    """Return the offset stored in a cursor, or None if it is invalid for this query"""
+    import base64
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        offset = int(data['o'])
+    except (ValueError, TypeError, KeyError):
+        return None
+    if data.get('q') != query or offset < 0:
+        return None
+    return offset
+
+@main_bp.route('/api/typeahead')
+def api_typeahead():
+    """Typeahead search over local tracks (cached, coalesced, cursor-paginated)"""
+    # Normalized so "Beat", "beat " and "BEAT" share one cache entry
+    q = ' '.join((request.args.get('q') or '').split()).casefold()
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    offset = 0
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        offset = _decode_typeahead_cursor(cursor, q)
+        if offset is None:
+            return jsonify({'success': False, 'error': 'Invalid cursor for this query'}), 400
+    
+    if not q:
+        return jsonify({'success': True, 'results': [], 'next_cursor': None})
+    
+    def run_search():
+        # One extra row tells whether there is a next page
+        rows = search_local_tracks(q, limit=limit + 1, sort_by='relevance', offset=offset)
+        return [{'id': r['id'], 'title': r['title'], 'artist': r['artist'], 'album': r['album']}
+                for r in rows]
+    
+    rows, source = get_typeahead_cache().get_or_compute((q, offset, limit), run_search)
+    has_more = len(rows) > limit
+    return jsonify({
+        'success': True,
+        'results': rows[:limit],
+        'next_cursor': _encode_typeahead_cursor(q, offset + limit) if has_more else None,
+        'source': source
+    })
+
 def _get_db_path():
     return os.path.join(DB_DIR, 'local_music.db')
 
@@ -2265,142 +2157,256 @@ def api_sonic_seed_info():
         debug_log(f"Seed info error: {e}", 'ERROR')
         return jsonify({'success': False, 'error': 'Internal error'}), 500
 
-def search_tracks_in_local_library(ollama_suggested_tracks, final_unique_matched_tracks_map):
-    """Match Ollama-suggested tracks against the local `tracks` table and add best matches."""
-    db_path = os.path.join(DB_DIR, 'local_music.db')
-    if not os.path.exists(db_path):
-        debug_log("Local DB not found for local matching.", "WARN")
-        return []
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Acceptance thresholds of a suggested track's match
+MATCH_MIN_COMBINED = 0.82
+MATCH_MIN_TITLE = 0.88
+MATCH_MIN_ARTIST = 0.70
+# A match this good ends the search
+MATCH_GOOD_ENOUGH = 0.92
+
+def evaluate_local_candidates(title, artist, candidates, skip_unwanted_versions=True):
+    """
+    Pick the best acceptable candidate for a suggested track, or None.
+
+    Live, remastered, edit, ... versions (is_unwanted_version) are rejected
+    unless skip_unwanted_versions is False.
+
+    Candidates are first checked with similarity_upper_bound: one that cannot
+    reach the thresholds, or cannot beat the best candidate so far, is skipped
+    before any SequenceMatcher work. The decisions are the same as scoring
+    every candidate in full.
+    """
+    best = None
+    best_score = 0.0
+    for c in candidates:
+        if skip_unwanted_versions and is_unwanted_version(c.get('title'), c.get('album')):
+            continue
+        title_bound = similarity_upper_bound(title, c.get('title'))
+        if title_bound < MATCH_MIN_TITLE:
+            continue
+        artist_bound = similarity_upper_bound(artist, c.get('artist'))
+        if artist_bound < MATCH_MIN_ARTIST:
+            continue
+        combined_bound = (title_bound * 0.7) + (artist_bound * 0.3)
+        if combined_bound < MATCH_MIN_COMBINED or combined_bound <= best_score:
+            continue
 
-    newly_matched_for_batch = []
+        title_score = calculate_similarity(title, c.get('title'))
+        artist_score = calculate_similarity(artist, c.get('artist'))
+        combined = (title_score * 0.7) + (artist_score * 0.3)
+        if combined > best_score and combined >= MATCH_MIN_COMBINED and title_score >= MATCH_MIN_TITLE and artist_score >= MATCH_MIN_ARTIST:
+            best = c
+            best_score = combined
+            if combined >= MATCH_GOOD_ENOUGH and title_score >= MATCH_GOOD_ENOUGH:
+                break
+    return best
 
-    def evaluate_local_candidates(title, artist, candidates):
-        best = None
-        best_score = 0.0
-        for c in candidates:
-            if is_unwanted_version(c.get('title'), c.get('album')):
-                continue
-            title_score = calculate_similarity(title, c.get('title'))
-            artist_score = calculate_similarity(artist, c.get('artist'))
-            combined = (title_score * 0.7) + (artist_score * 0.3)
-            if combined > best_score and combined >= 0.82 and title_score >= 0.88 and artist_score >= 0.70:
-                best = c
-                best_score = combined
-                if combined >= 0.92 and title_score >= 0.92:
-                    break
-        return best
+def _find_fuzzy_local_candidates(conn, pairs):
+    """
+    Candidate tracks for suggested (title, artist) pairs without an exact key match.
 
+    Returns (found, complete): complete is False when the trigram index was not
+    available and the SQL fallback (no typo tolerance) was used.
+    """
+    cursor = conn.cursor()
     try:
-        for suggested_track in ollama_suggested_tracks:
-            title = suggested_track.get('title') or ''
-            artist = suggested_track.get('artist') or ''
-            if not title or not artist:
-                continue
-            track_key = (title.lower(), artist.lower())
-            if track_key in final_unique_matched_tracks_map:
-                continue
-
-            # Exact lower-case match first
+        trigram_matcher = get_trigram_matcher()
+    except ImportError as e:
+        debug_log(f"Trigram matcher unavailable ({e}), using SQL fallback", "WARNING")
+        trigram_matcher = None
+
+    # Closest tracks by title/artist trigram similarity (None until the index is built)
+    if trigram_matcher is not None:
+        found = {}
+        for title, artist in pairs:
+            candidates = trigram_matcher.search(title, artist, limit=20)
+            if candidates is None:
+                break
+            found[(title, artist)] = candidates
+        else:
+            return found, True
+
+    # Word-prefix search in the FTS index, all pairs in one query
+    from track_search_index import search_index_available, search_fields_batch
+    if search_index_available(conn):
+        found = search_fields_batch(conn, [{'title': t, 'artist': a} for t, a in pairs], limit=20)
+        return {pair: found.get(i, []) for i, pair in enumerate(pairs)}, False
+
+    found = {}
+    for title, artist in pairs:
+        # Fuzzy LIKE search
+        like_title = f"%{title}%"
+        like_artist = f"%{artist}%"
+        cursor.execute(
+            f"SELECT id, title, artist, album FROM tracks WHERE title LIKE ? AND artist LIKE ? "
+            f"AND {present_condition()} LIMIT 50",
+            (like_title, like_artist)
+        )
+        rows = cursor.fetchall()
+        # If still nothing, broaden to either title or artist match
+        if not rows:
             cursor.execute(
-                "SELECT id, title, artist, album FROM tracks WHERE lower(title)=? AND lower(artist)=? LIMIT 1",
-                (title.lower(), artist.lower())
+                f"SELECT id, title, artist, album FROM tracks WHERE (title LIKE ? OR artist LIKE ?) "
+                f"AND {present_condition()} LIMIT 50",
+                (like_title, like_artist)
             )
-            row = cursor.fetchone()
-            candidates = []
-            if row:
-                candidates.append({'id': row[0], 'title': row[1] or '', 'artist': row[2] or '', 'album': row[3] or ''})
-            else:
-                # Fuzzy LIKE search
-                like_title = f"%{title}%"
-                like_artist = f"%{artist}%"
-                cursor.execute(
-                    "SELECT id, title, artist, album FROM tracks WHERE title LIKE ? AND artist LIKE ? LIMIT 50",
-                    (like_title, like_artist)
-                )
-                for r in cursor.fetchall():
-                    candidates.append({'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''})
-
-                # If still nothing, broaden to either title or artist match
-                if not candidates:
-                    cursor.execute(
-                        "SELECT id, title, artist, album FROM tracks WHERE title LIKE ? OR artist LIKE ? LIMIT 50",
-                        (like_title, like_artist)
-                    )
-                    for r in cursor.fetchall():
-                        candidates.append({'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''})
+            rows = cursor.fetchall()
+        found[(title, artist)] = [{'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''} for r in rows]
+    return found, False
+
+def resolve_local_suggestions(pairs, skip_unwanted_versions=True):
+    """
+    Resolve suggested (title, artist) pairs to local tracks.
+
+    Repeat suggestions are answered by the suggestion cache without touching the
+    database. The rest are matched in bulk: exact normalized keys in one join,
+    then the same title by an alias of the artist ("Beatles, The", "Beyonce",
+    "Drake feat. Rihanna"), which is accepted without scoring. Only the
+    remaining misses get fuzzy candidates and evaluate_local_candidates.
+
+    skip_unwanted_versions is passed to evaluate_local_candidates; results are
+    cached separately for each setting.
+
+    Returns a dict of pair -> track dict (id, title, artist, album), or None if
+    the library has no acceptable match.
+    """
+    cache = get_suggestion_cache()
+    generation = cache.generation
+    rules = '' if skip_unwanted_versions else 'all_versions'
+    resolved, misses = cache.get_many(dict.fromkeys(pairs), rules)
+    if not misses:
+        return resolved
+
+    from track_matching import find_by_match_keys
+    from artist_aliases import find_by_canonical_artist
+    conn = sqlite3.connect(os.path.join(DB_DIR, 'local_music.db'))
+    try:
+        exact = find_by_match_keys(conn.cursor(), misses)
+        aliased = find_by_canonical_artist(conn.cursor(), misses)
+        fuzzy_pairs = [pair for pair in misses if pair not in exact and pair not in aliased]
+        fuzzy, fuzzy_complete = _find_fuzzy_local_candidates(conn, fuzzy_pairs) if fuzzy_pairs else ({}, True)
+    finally:
+        conn.close()
 
-            if not candidates:
-                continue
+    results = {}
+    for title, artist in misses:
+        candidates = exact.get((title, artist)) or fuzzy.get((title, artist)) or []
+        best_match = evaluate_local_candidates(title, artist, candidates, skip_unwanted_versions) if candidates else None
+        if best_match is None and (title, artist) in aliased:
+            # Same title, same canonical artist: only the version filter applies
+            best_match = next((c for c in aliased[(title, artist)]
+                               if not skip_unwanted_versions or not is_unwanted_version(c['title'], c['album'])), None)
+        results[(title, artist)] = best_match
+    # A miss of the SQL fallback may still match once the trigram index is ready
+    cache.put_many({pair: track for pair, track in results.items()
+                    if track is not None or fuzzy_complete or pair in exact or pair in aliased}, generation, rules)
+    resolved.update(results)
+    return resolved
+
+def local_match_source(ollama_suggested_tracks):
+    """
+    Local library lookup for the fan-out matcher: ('local', fn). The whole batch
+    is resolved in bulk up front (resolve_local_suggestions), so each lookup is
+    a dict access.
+    """
+    resolved = {}
+    if os.path.exists(os.path.join(DB_DIR, 'local_music.db')):
+        pairs = [(t.get('title') or '', t.get('artist') or '') for t in ollama_suggested_tracks]
+        resolved = resolve_local_suggestions([pair for pair in pairs if pair[0] and pair[1]])
+    else:
+        debug_log("Local DB not found for local matching.", "WARN")
 
-            best_match = evaluate_local_candidates(title, artist, candidates)
+    def lookup(suggested_track):
+        title, artist = suggested_track.get('title') or '', suggested_track.get('artist') or ''
+        best_match = resolved.get((title, artist))
+        if not best_match:
+            return None
+        return {
+            'id': best_match['id'], 'title': best_match['title'], 'artist': best_match['artist'],
+            'album': best_match['album'], 'source': 'local',
+            'original_suggestion': {'title': title, 'artist': artist, 'album': suggested_track.get('album')}
+        }
 
-            if best_match:
-                match_details = {
-                    'id': best_match['id'], 'title': best_match['title'], 'artist': best_match['artist'],
-                    'album': best_match['album'], 'source': 'local',
-                    'original_suggestion': {'title': title, 'artist': artist, 'album': suggested_track.get('album')}
-                }
-                final_unique_matched_tracks_map[track_key] = match_details
-                newly_matched_for_batch.append(match_details)
-
-                # Update progress for individual track match
-                if hasattr(api_generate_playlist, 'playlist_progress'):
-                    for playlist_id, progress in api_generate_playlist.playlist_progress.items():
-                        if progress.get('status') in ['starting', 'progress']:
-                            progress.update({
-                                'current_status': f"Matched (local): {best_match['artist']} - {best_match['title']}. Currently at tracks {len(final_unique_matched_tracks_map)}/{progress.get('target_songs', '?')}.",
-                                'current_track': f"{best_match['artist']} - {best_match['title']}",
-                                'tracks_found': len(final_unique_matched_tracks_map)
-                            })
-                            break
-        return newly_matched_for_batch
-    finally:
-        conn.close()
+    return 'local', lookup
+
+def search_tracks_in_local_library(ollama_suggested_tracks, final_unique_matched_tracks_map, num_songs=None):
+    """Match Ollama-suggested tracks against the local `tracks` table and add best matches."""
+    return match_suggestions_across_sources([local_match_source(ollama_suggested_tracks)],
+                                            ollama_suggested_tracks, final_unique_matched_tracks_map, num_songs)
+
+def match_suggestions_across_sources(sources, ollama_suggested_tracks, final_unique_matched_tracks_map, num_songs=None):
+    """
+    Match suggested tracks against several sources at once and add the matches.
+
+    Every eligible suggestion is looked up in all sources concurrently
+    (FanOutMatcher). A suggestion takes the match of the first source in
+    `sources` order that found one, and matches are added in suggestion order.
+    Outstanding lookups are cancelled once the map holds num_songs tracks.
+
+    Returns the match details added to final_unique_matched_tracks_map.
+    """
+    from fanout_matcher import FanOutMatcher
+
+    pending = {}
+    for suggested_track in ollama_suggested_tracks:
+        title, artist = suggested_track.get('title') or '', suggested_track.get('artist') or ''
+        if not title or not artist:
+            continue
+        track_key = (title.lower(), artist.lower())
+        if track_key in final_unique_matched_tracks_map or track_key in pending:
+            continue
+        pending[track_key] = suggested_track
+    if not pending or not sources:
+        return []
+
+    needed = None
+    if num_songs:
+        needed = max(0, int(num_songs) - len(final_unique_matched_tracks_map))
+
+    # Concurrency control from config
+    try:
+        max_workers = int(get_config_value('APP', 'NavidromeMaxConcurrency', '10'))
+    except Exception:
+        max_workers = 10
+
+    track_keys = list(pending)
+    matcher = FanOutMatcher(sources, max_workers=max_workers)
+    matches = matcher.match([pending[k] for k in track_keys], needed)
+    debug_log(f"Matching: {len(matches)}/{len(track_keys)} suggestions matched across {', '.join(name for name, _ in sources)} "
+              f"({matcher.lookups_submitted} lookups, {matcher.lookups_cancelled} cancelled)", "DEBUG")
+
+    newly_matched_for_batch = []
+    for index, source_name, match_details in matches:
+        final_unique_matched_tracks_map[track_keys[index]] = match_details
+        newly_matched_for_batch.append(match_details)
+
+        # Update progress for individual track match
+        if hasattr(api_generate_playlist, 'playlist_progress'):
+            for playlist_id, progress in api_generate_playlist.playlist_progress.items():
+                if progress.get('status') in ['starting', 'progress']:
+                    progress.update({
+                        'current_status': f"Matched ({source_name}): {match_details['artist']} - {match_details['title']}. Currently at tracks {len(final_unique_matched_tracks_map)}/{progress.get('target_songs', '?')}.",
+                        'current_track': f"{match_details['artist']} - {match_details['title']}",
+                        'tracks_found': len(final_unique_matched_tracks_map)
+                    })
+                    break
+    return newly_matched_for_batch
 
 def get_local_track_stats():
     """Get statistics about the local music database"""
     db_path = os.path.join(DB_DIR, 'local_music.db')
     if not os.path.exists(db_path):
-        return {'total_tracks': 0, 'total_size': 0, 'genres': [], 'artists': 0, 'genre_counts': {}}
+        return {'total_tracks': 0, 'total_size': 0, 'total_duration': 0, 'genres': [], 'artists': 0,
+                'genre_counts': {}, 'analysis_status_counts': {}}
     
+    # Materialized by library_stats triggers: a few primary-key reads, not a scan of tracks
+    from library_stats import ensure_stats_tables, read_library_stats
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Total tracks
-    cursor.execute('SELECT COUNT(*) FROM tracks')
-    total_tracks = cursor.fetchone()[0]
-    
-    # Total size
-    cursor.execute('SELECT SUM(file_size) FROM tracks')
-    total_size = cursor.fetchone()[0] or 0
-    
-    # Unique genres
-    cursor.execute('SELECT DISTINCT genre FROM tracks WHERE genre IS NOT NULL')
-    genres = [row[0] for row in cursor.fetchall()]
-    
-    # Genre counts
-    genre_counts = {}
-    for genre in genres:
-        cursor.execute('SELECT COUNT(*) FROM tracks WHERE genre = ?', (genre,))
-        count = cursor.fetchone()[0]
-        genre_counts[genre] = count
-    
-    # Unique artists
-    cursor.execute('SELECT COUNT(DISTINCT artist) FROM tracks WHERE artist IS NOT NULL')
-    unique_artists = cursor.fetchone()[0]
-    
-    conn.close()
-    
-    return {
-        'total_tracks': total_tracks,
-        'total_size': total_size,
-        'genres': genres,
-        'artists': unique_artists,
-        'genre_counts': genre_counts
-    }
+    try:
+        ensure_stats_tables(conn)
+        return read_library_stats(conn)
+    finally:
+        conn.close()
 
 @main_bp.route('/local-music')
 def local_music_page():
@@ -2408,6 +2414,38 @@ def local_music_page():
     stats = get_local_track_stats()
     return render_template('local_music.html', stats=stats)
 
+# Global scan job manager instance
+_scan_job_manager_instance = None
+_scan_jobs_recovered = False
+
+def get_scan_job_manager():
+    """Get or create the scan job manager"""
+    global _scan_job_manager_instance
+    if _scan_job_manager_instance is None:
+        from scan_job_manager import ScanJobManager
+        _scan_job_manager_instance = ScanJobManager(
+            db_path=init_local_music_db(),
+            scanner_factory=_create_library_scanner,
+            history_limit=int(get_config_value('APP', 'ScanJobHistory', '50'))
+        )
+    return _scan_job_manager_instance
+
+@main_bp.before_app_request
+def recover_interrupted_scans():
+    """Resume scans interrupted by a restart (once, on the first request)"""
+    global _scan_jobs_recovered
+    if _scan_jobs_recovered:
+        return
+    _scan_jobs_recovered = True
+    # Done here rather than at startup so the debug reloader's parent process never claims jobs
+    try:
+        auto_resume = get_config_value('APP', 'ResumeInterruptedScans', 'yes').lower() in ('yes', 'true', '1')
+        resumed = get_scan_job_manager().recover_interrupted(auto_resume=auto_resume)
+        if resumed:
+            debug_log(f"Resumed interrupted scans: {', '.join(resumed)}", "INFO")
+    except Exception as e:
+        debug_log(f"Failed to recover interrupted scans: {e}", "ERROR")
+
 @main_bp.route('/api/scan-music-folder', methods=['POST'])
 def api_scan_music_folder():
     """API endpoint to scan a music folder"""
@@ -2416,77 +2454,155 @@ def api_scan_music_folder():
         return jsonify({'success': False, 'error': 'Folder path is required'})
     
     folder_path = data['folder_path']
+    # Unchanged files (same mtime and size) are skipped unless a full rescan is requested
+    incremental = not data.get('full_rescan', False)
     
-    # Start scanning in background with progress tracking
-    import threading
-    import time
-    
-    # Create a unique scan ID for this operation
-    scan_id = f"scan_{int(time.time())}"
-    
-    # Initialize scan progress in a simple in-memory store
-    if not hasattr(api_scan_music_folder, 'scan_progress'):
-        api_scan_music_folder.scan_progress = {}
-    
-    api_scan_music_folder.scan_progress[scan_id] = {
-        'status': 'starting',
-        'current_file': '',
-        'files_processed': 0,
-        'total_files': 0,
-        'indexed': 0,
-        'errors': 0,
-        'skipped': 0,
-        'start_time': time.time()
-    }
-    
-    def scan_with_progress():
-        try:
-            result = scan_music_folder_with_progress(folder_path, scan_id)
-            api_scan_music_folder.scan_progress[scan_id]['status'] = 'completed'
-            api_scan_music_folder.scan_progress[scan_id]['result'] = result
-        except Exception as e:
-            api_scan_music_folder.scan_progress[scan_id]['status'] = 'error'
-            api_scan_music_folder.scan_progress[scan_id]['error'] = str(e)
-    
-    # Start scanning in background thread
-    thread = threading.Thread(target=scan_with_progress)
-    thread.daemon = True
-    thread.start()
+    # Start scanning in background; only one scan per folder can run at a time
+    result = get_scan_job_manager().start_scan(folder_path, incremental)
+    if not result.get('success'):
+        return jsonify(result)
     
+    debug_log(f"Started {'incremental' if incremental else 'full'} scan {result['scan_id']} of {folder_path}", "INFO")
     return jsonify({
         'success': True, 
-        'scan_id': scan_id,
+        'scan_id': result['scan_id'],
         'message': 'Scan started in background'
     })
 
 @main_bp.route('/api/scan-progress/<scan_id>')
 def api_scan_progress(scan_id):
     """API endpoint to get scan progress"""
-    if not hasattr(api_scan_music_folder, 'scan_progress'):
-        return jsonify({'error': 'No scan progress available'})
-    
-    progress = api_scan_music_folder.scan_progress.get(scan_id)
+    progress = get_scan_job_manager().get_job(scan_id)
     if not progress:
         return jsonify({'error': 'Scan ID not found'})
     
     if progress['status'] == 'completed':
-        # Clean up completed scan
         result = progress.get('result', {})
-        if result.get('success'):
-            stats = get_local_track_stats()
-            return jsonify({
-                'status': 'completed',
-                'stats': stats,
-                'result': result
-            })
-        else:
-            return jsonify({
-                'status': 'error',
-                'error': result.get('error', 'Unknown error')
-            })
+        stats = get_local_track_stats()
+        return jsonify({
+            'status': 'completed',
+            'stats': stats,
+            'result': result
+        })
+    elif progress['status'] == 'error':
+        return jsonify({
+            'status': 'error',
+            'error': progress.get('error', 'Unknown error')
+        })
     
     return jsonify(progress)
 
+@main_bp.route('/api/scan-jobs')
+def api_scan_jobs():
+    """API endpoint to list recent scan jobs"""
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'success': True, 'jobs': get_scan_job_manager().list_jobs(limit)})
+
+@main_bp.route('/api/scan-jobs/<scan_id>/cancel', methods=['POST'])
+def api_cancel_scan(scan_id):
+    """API endpoint to cancel a running scan"""
+    return jsonify(get_scan_job_manager().cancel_scan(scan_id))
+
+@main_bp.route('/api/scan-jobs/<scan_id>/resume', methods=['POST'])
+def api_resume_scan(scan_id):
+    """API endpoint to resume an interrupted scan"""
+    return jsonify(get_scan_job_manager().resume_scan(scan_id))
+
+# Global library watcher instance
+_library_watcher_instance = None
+
+def _enqueue_watched_tracks(tracks):
+    """Queue tracks picked up by the library watcher on a running analysis"""
+    processor = getattr(api_start_audio_analysis, 'processor', None)
+    if processor and processor.workers:
+        added = processor.enqueue_tracks(tracks)
+        debug_log(f"Library watcher: queued {added} new tracks for audio analysis", "INFO")
+    # Otherwise the tracks stay 'pending' and are picked up by the next analysis run
+
+def get_library_watcher():
+    """Get or create the library watcher for the configured music folder"""
+    global _library_watcher_instance
+    
+    folder_path = get_config_value('APP', 'LocalMusicFolder', '')
+    if _library_watcher_instance is not None and _library_watcher_instance.root != folder_path:
+        _library_watcher_instance.stop()
+        _library_watcher_instance = None
+    
+    if _library_watcher_instance is None and folder_path:
+        from library_watcher import LibraryWatcher
+        _library_watcher_instance = LibraryWatcher(
+            root=folder_path,
+            db_path=init_local_music_db(),
+            metadata_reader=extract_track_metadata,
+            missing_action=get_config_value('APP', 'MissingTrackAction', 'flag').lower(),
+            debounce_seconds=float(get_config_value('APP', 'WatchDebounceSeconds', '2')),
+            poll_interval=int(get_config_value('APP', 'WatchPollInterval', '300')),
+            force_polling=get_config_value('APP', 'WatchForcePolling', 'no').lower() in ('yes', 'true', '1'),
+            on_tracks_added=_enqueue_watched_tracks,
+            is_scan_active=lambda path: get_scan_job_manager().has_active_scan(path),
+            on_tracks_changed=invalidate_track_caches
+        )
+    
+    return _library_watcher_instance
+
+def start_library_watcher_if_enabled():
+    """Start the library watcher when [APP] WatchLibrary is enabled"""
+    if get_config_value('APP', 'WatchLibrary', 'no').lower() not in ('yes', 'true', '1'):
+        return False
+    watcher = get_library_watcher()
+    if watcher is None:
+        debug_log("Library watcher enabled but LocalMusicFolder is not set", "WARNING")
+        return False
+    return watcher.start()
+
+_library_watcher_autostarted = False
+
+@main_bp.before_app_request
+def autostart_library_watcher():
+    """Start the configured library watcher (once, on the first request)"""
+    global _library_watcher_autostarted
+    if _library_watcher_autostarted:
+        return
+    _library_watcher_autostarted = True
+    # Not at startup, so the debug reloader's parent process never watches the library
+    try:
+        start_library_watcher_if_enabled()
+    except Exception as e:
+        debug_log(f"Failed to start library watcher: {e}", "ERROR")
+
+@main_bp.route('/api/library-watcher/status')
+def api_library_watcher_status():
+    """Get library watcher status"""
+    watcher = _library_watcher_instance
+    if watcher is None:
+        return jsonify({'success': True, 'status': {'running': False}})
+    return jsonify({'success': True, 'status': watcher.get_status()})
+
+@main_bp.route('/api/library-watcher/start', methods=['POST'])
+def api_library_watcher_start():
+    """Start watching the configured music folder"""
+    try:
+        watcher = get_library_watcher()
+        if watcher is None:
+            return jsonify({'success': False, 'error': 'Local music folder is not configured'})
+        if watcher.is_running():
+            return jsonify({'success': True, 'message': 'Library watcher already running', 'status': watcher.get_status()})
+        if not watcher.start():
+            return jsonify({'success': False, 'error': 'Failed to start library watcher'})
+        return jsonify({'success': True, 'message': 'Library watcher started', 'status': watcher.get_status()})
+    except Exception as e:
+        debug_log(f"Error starting library watcher: {e}", "ERROR")
+        return jsonify({'success': False, 'error': str(e)})
+
+@main_bp.route('/api/library-watcher/stop', methods=['POST'])
+def api_library_watcher_stop():
+    """Stop the library watcher"""
+    watcher = _library_watcher_instance
+    if watcher is None or not watcher.is_running():
+        return jsonify({'success': True, 'message': 'Library watcher not running'})
+    watcher.stop()
+    return jsonify({'success': True, 'message': 'Library watcher stopped'})
+
 @main_bp.route('/api/playlist-progress/<playlist_id>')
 def api_playlist_progress(playlist_id):
     """API endpoint to get playlist generation progress"""
@@ -2561,7 +2677,7 @@ def api_search_local_tracks():
     sort_order = data.get('sort_order', 'asc')
     
     # Validate sort parameters
-    valid_sort_fields = ['title', 'artist', 'album', 'year', 'genre', 'duration']
+    valid_sort_fields = ['title', 'artist', 'album', 'year', 'genre', 'duration', 'relevance']
     valid_sort_orders = ['asc', 'desc']
     
     if sort_by not in valid_sort_fields:
@@ -2646,6 +2762,40 @@ def get_auto_recovery():
     
     return _auto_recovery_instance
 
+def _build_autoscale_config(max_workers):
+    """Build the worker autoscaling config from [AUDIO_ANALYSIS], or None when disabled"""
+    if get_config_value('AUDIO_ANALYSIS', 'AutoscaleWorkers', 'no').lower() not in ('yes', 'true', '1'):
+        return None
+    try:
+        from worker_autoscaler import AutoscaleConfig
+        daytime_max = get_config_value('AUDIO_ANALYSIS', 'DaytimeMaxWorkers', '')
+        return AutoscaleConfig(
+            min_workers=min(int(max_workers), int(get_config_value('AUDIO_ANALYSIS', 'MinWorkers', '1'))),
+            max_workers=int(max_workers),
+            daytime_max_workers=int(daytime_max) if daytime_max else None,
+            interactive_max_workers=int(get_config_value('AUDIO_ANALYSIS', 'InteractiveMaxWorkers', '1')),
+            overnight_start_hour=int(get_config_value('AUDIO_ANALYSIS', 'OvernightStartHour', '1')),
+            overnight_end_hour=int(get_config_value('AUDIO_ANALYSIS', 'OvernightEndHour', '7')),
+            interval=int(get_config_value('AUDIO_ANALYSIS', 'AutoscaleInterval', '15'))
+        )
+    except Exception as e:
+        debug_log(f"Invalid autoscaling settings, using a fixed worker pool: {e}", "WARNING")
+        return None
+
+def _batch_processor_config(max_workers):
+    """AdvancedBatchProcessor options from [AUDIO_ANALYSIS] (besides max_workers and batch_size)"""
+    return dict(
+        autoscale_config=_build_autoscale_config(max_workers),
+        isolate_extraction=get_config_value('AUDIO_ANALYSIS', 'IsolateExtraction', 'yes').lower() in ('yes', 'true', '1'),
+        file_timeout=int(get_config_value('AUDIO_ANALYSIS', 'FileTimeout', '120')),
+        memory_limit_mb=int(get_config_value('AUDIO_ANALYSIS', 'FileMemoryLimitMB', '1024')),
+        prefetch=get_config_value('AUDIO_ANALYSIS', 'Prefetch', 'no').lower() in ('yes', 'true', '1'),
+        prefetch_buffer_mb=int(get_config_value('AUDIO_ANALYSIS', 'PrefetchBufferMB', '256')),
+        prefetch_files=int(get_config_value('AUDIO_ANALYSIS', 'PrefetchFiles', '16')),
+        prefetch_dir=get_config_value('AUDIO_ANALYSIS', 'PrefetchDir', '') or None,
+        ordering=get_config_value('AUDIO_ANALYSIS', 'QueueOrdering', 'directory').lower()
+    )
+
 @main_bp.route('/api/audio-analysis/start', methods=['POST'])
 def api_start_audio_analysis():
     """Start audio analysis batch processing"""
@@ -2688,7 +2838,8 @@ def api_start_audio_analysis():
         # Initialize processor
         processor = AdvancedBatchProcessor(
             max_workers=max_workers,
-            batch_size=batch_size
+            batch_size=batch_size,
+            **_batch_processor_config(max_workers)
         )
         
         # Initialize queue
@@ -2912,7 +3063,8 @@ def api_audio_analysis_restart():
         # Initialize processor
         processor = AdvancedBatchProcessor(
             max_workers=max_workers,
-            batch_size=batch_size
+            batch_size=batch_size,
+            **_batch_processor_config(max_workers)
         )
         
         # Initialize queue
@@ -3424,6 +3576,7 @@ class SonicTravellerJob:
         self.status = 'stopped'
         self.end_time = datetime.now()
 
+@interactive_request
 def _run_sonic_traveller_job(job):
     """Background thread function for Sonic Traveller generation with enhanced feedback loop"""
     try:
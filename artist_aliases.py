@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Artist Aliases for TuneForge
+
+This module maps the artist names found in tags to a canonical artist name,
+so suggestions that spell an artist differently still match exactly:
+- Articles: "The Beatles", "Beatles, The" and "Beatles" are one artist
+- Diacritics folded: "Beyoncé" and "Beyonce"
+- Featured artists split off: "Drake feat. Rihanna" and "Drake ft Rihanna"
+  are credited to "Drake"; a featuring word without a credit after it is
+  part of the name ("Little Feat")
+- "&" / "and", punctuation and spacing ignored ("AC/DC" and "ACDC")
+- The artist_aliases table (artist_key -> canonical) holds one row per
+  distinct artist, written by the scanner with each batch; the canonical
+  index plus the tracks match key index make a lookup two index seeks
+- Spellings sharing a key ("X feat. Y" / "X feat Y") resolve to the canonical
+  of the smallest spelling, whichever the scanner saw first
+- ensure_artist_aliases: migration creating the table and filling it from
+  existing tracks; it rebuilds the table only when ALIAS_VERSION changes
+"""
+
+import re
+import sqlite3
+import logging
+import unicodedata
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Tuple
+
+from track_matching import normalize_string, present_condition
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALIAS_TABLE = 'artist_aliases'
+ALIAS_VERSION_TABLE = 'artist_alias_version'
+CANONICAL_INDEX = 'idx_artist_alias_canonical'
+
+# Bump when canonical_artist or the table changes, so existing tables are rebuilt
+ALIAS_VERSION = 3
+
+# A featured-artist credit: "feat" / "ft" (with or without ".") or "featuring"
+# followed by another name ("(feat. B)" is already dropped with the parentheses)
+_FEATURING_RE = re.compile(r'\s+(?:(?:feat|ft)\.|(?:feat|ft|featuring)\s)\s*(?=\S)', re.IGNORECASE)
+# Articles ignored at the start ("The Beatles") or the end ("Beatles, The")
+ARTICLES = {'the'}
+
+# Keys resolved per query (two bound parameters each)
+LOOKUP_CHUNK_SIZE = 400
+
+CANONICAL_CACHE_SIZE = 65536
+
+# Keeps the canonical of the smallest spelling seen for a key, independent of scan order
+RECORD_ALIAS_SQL = f'''
+    INSERT INTO {ALIAS_TABLE} (artist_key, artist, canonical) VALUES (?, ?, ?)
+    ON CONFLICT(artist_key) DO UPDATE SET artist = excluded.artist, canonical = excluded.canonical
+    WHERE excluded.artist < {ALIAS_TABLE}.artist
+'''
+
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def canonical_artist(name):
+    """
+    Canonical form of an artist name as tagged or suggested.
+
+    Takes the raw name, not its match key: the key has lost the "." that
+    marks "feat." as a credit.
+
+    Returns:
+        Folded, article-free main artist with spaces removed; '' for no artist
+    """
+    name = (name or '').strip()
+
+    # Keep the main artist of "A feat. B"
+    match = _FEATURING_RE.search(name)
+    if match:
+        name = name[:match.start()]
+
+    key = normalize_string(name)
+    if not key:
+        return ""
+
+    # Fold diacritics (é -> e)
+    key = ''.join(c for c in unicodedata.normalize('NFKD', key) if not unicodedata.combining(c))
+    tokens = key.split()
+
+    if len(tokens) > 1 and tokens[0] in ARTICLES:
+        tokens = tokens[1:]
+    elif len(tokens) > 1 and tokens[-1] in ARTICLES:
+        tokens = tokens[:-1]
+
+    # "Simon & Garfunkel" normalizes to "simon garfunkel"; match "Simon and Garfunkel" too
+    if len(tokens) > 1:
+        tokens = [t for t in tokens if t != 'and'] or tokens
+    return ''.join(tokens)
+
+
+def alias_rows(artists: Iterable[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    """(artist_key, artist, canonical) rows for RECORD_ALIAS_SQL from (artist_key, artist) pairs, skipping empty keys"""
+    spellings: Dict[str, str] = {}
+    for key, artist in artists:
+        if key and (key not in spellings or artist < spellings[key]):
+            spellings[key] = artist
+    return [(key, artist, canonical_artist(artist)) for key, artist in spellings.items()]
+
+
+def ensure_artist_aliases(conn: sqlite3.Connection):
+    """
+    Create the alias table and fill it from existing tracks.
+
+    The scanner records aliases with every batch, so the tracks table is only
+    read when the table is new or ALIAS_VERSION changed.
+
+    Args:
+        conn: Connection to the local music database (tracks must have match keys)
+    """
+    cursor = conn.cursor()
+    cursor.execute(f'CREATE TABLE IF NOT EXISTS {ALIAS_VERSION_TABLE} (version INTEGER NOT NULL)')
+    cursor.execute(f'SELECT version FROM {ALIAS_VERSION_TABLE}')
+    row = cursor.fetchone()
+    if row and row[0] == ALIAS_VERSION:
+        conn.commit()
+        return
+
+    # Recreated rather than emptied: the columns changed between versions
+    cursor.execute(f'DROP TABLE IF EXISTS {ALIAS_TABLE}')
+    cursor.execute(f'''
+        CREATE TABLE {ALIAS_TABLE} (
+            artist_key TEXT PRIMARY KEY,
+            artist TEXT NOT NULL,
+            canonical TEXT NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(f'CREATE INDEX {CANONICAL_INDEX} ON {ALIAS_TABLE}(canonical)')
+    cursor.execute('''
+        SELECT artist_key, MIN(artist) FROM tracks
+        WHERE artist_key IS NOT NULL AND artist_key != ''
+        GROUP BY artist_key
+    ''')
+    rows = alias_rows(cursor.fetchall())
+    cursor.executemany(RECORD_ALIAS_SQL, rows)
+    cursor.execute(f'DELETE FROM {ALIAS_VERSION_TABLE}')
+    cursor.execute(f'INSERT INTO {ALIAS_VERSION_TABLE} (version) VALUES (?)', (ALIAS_VERSION,))
+    conn.commit()
+    logger.info(f"Built the alias table for {len(rows)} artists")
+
+
+def find_by_canonical_artist(cursor, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """
+    Resolve (title, artist) pairs whose title matches exactly and whose artist
+    has the same canonical name.
+
+    Args:
+        cursor: Cursor on the local music database
+        pairs: (title, artist) pairs as suggested
+
+    Returns:
+        Dictionary of pair -> list of track dicts (id, title, artist, album) in
+        id order; pairs without a canonical match are absent
+    """
+    pairs_by_key: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    for title, artist in pairs:
+        key = (normalize_string(title), canonical_artist(artist))
+        if key[0] and key[1]:
+            pairs_by_key.setdefault(key, []).append((title, artist))
+
+    matches = {}
+    keys = list(pairs_by_key)
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        cursor.execute(f'''
+            WITH wanted(title_key, canonical) AS (VALUES {', '.join('(?, ?)' for _ in chunk)})
+            SELECT t.id, t.title, t.artist, t.album, wanted.title_key, wanted.canonical
+            FROM wanted
+            JOIN {ALIAS_TABLE} a ON a.canonical = wanted.canonical
+            JOIN tracks t ON t.title_key = wanted.title_key AND t.artist_key = a.artist_key
+            WHERE {present_condition('t')}
+            ORDER BY t.id
+        ''', [part for key in chunk for part in key])
+        for r in cursor.fetchall():
+            track = {'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''}
+            for pair in pairs_by_key[(r[4], r[5])]:
+                matches.setdefault(pair, []).append(track)
+    return matches
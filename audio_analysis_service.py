@@ -163,6 +163,10 @@ class AudioAnalysisService:
                     conn.execute("ALTER TABLE tracks ADD COLUMN analysis_error TEXT")
                 
                 conn.commit()
+                
+                # Analysis coverage counts follow analysis_status through triggers
+                from library_stats import ensure_stats_tables
+                ensure_stats_tables(conn)
                 logger.info("Database structure verification completed")
                 
         except Exception as e:
@@ -248,15 +252,15 @@ class AudioAnalysisService:
         
         Args:
             track_id: ID of the track
-            status: New status ('pending', 'analyzing', 'analyzed', 'error')
-            error_message: Error message if status is 'error'
+            status: New status ('pending', 'analyzing', 'analyzed', 'error', 'skipped')
+            error_message: Error message if status is 'error' or 'skipped'
             
         Returns:
             True if successful, False otherwise
         """
         try:
             with sqlite3.connect(self.db_path) as conn:
-                if status == 'error':
+                if status in ('error', 'skipped'):
                     conn.execute("""
                         UPDATE tracks SET 
                             analysis_status = ?, 
@@ -280,20 +284,24 @@ class AudioAnalysisService:
             logger.error(f"Error updating analysis status for track {track_id}: {e}")
             return False
     
-    def get_tracks_for_analysis(self, limit: int = 100, priority: int = 3) -> List[Dict[str, Any]]:
+    def get_tracks_for_analysis(self, limit: int = 100, priority: int = 3,
+                                order_by: str = 'id') -> List[Dict[str, Any]]:
         """
         Get tracks that need audio analysis.
         
         Args:
             limit: Maximum number of tracks to return
             priority: Priority level (1=high, 5=low)
+            order_by: 'id' for insertion order, 'path' to keep files of the
+                same directory together (sequential reads on disk)
             
         Returns:
             List of track dictionaries with file paths
         """
+        secondary_order = 't.file_path' if order_by == 'path' else 't.id'
         try:
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("""
+                cursor = conn.execute(f"""
                     SELECT t.id, t.file_path, t.analysis_status, t.analysis_error
                     FROM tracks t
                     WHERE t.analysis_status IN ('pending', 'error')
@@ -304,7 +312,7 @@ class AudioAnalysisService:
                             WHEN t.analysis_status = 'error' THEN 1
                             ELSE 2
                         END,
-                        t.id
+                        {secondary_order}
                     LIMIT ?
                 """, (limit,))
                 
@@ -333,15 +341,8 @@ class AudioAnalysisService:
         """
         try:
             with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT 
-                        analysis_status,
-                        COUNT(*) as count
-                    FROM tracks 
-                    GROUP BY analysis_status
-                """)
-                
-                status_counts = dict(cursor.fetchall())
+                from library_stats import read_library_stats
+                status_counts = read_library_stats(conn)['analysis_status_counts']
                 
                 # Calculate totals
                 total_tracks = sum(status_counts.values())
@@ -8,6 +8,7 @@ the content-based recommendation system.
 """
 
 import os
+import time
 import logging
 import numpy as np
 import librosa
@@ -518,16 +519,21 @@ class AudioAnalyzer:
             'file_path': file_path,
             'success': False,
             'error_message': '',
-            'features': {}
+            'features': {},
+            'timings': {'load': 0.0, 'extract': 0.0}
         }
         
         try:
             # Load audio file
+            load_start = time.time()
             y, sr, error_msg = self.load_audio_file(file_path)
+            features['timings']['load'] = time.time() - load_start
             if y is None:
                 features['error_message'] = error_msg
                 return features
             
+            extract_start = time.time()
+            
             # Extract basic features
             features['features']['tempo'] = self.extract_tempo(y, sr)
             features['features']['key'], features['features']['mode'] = self.extract_key_mode(y, sr)
@@ -549,6 +555,7 @@ class AudioAnalyzer:
             features['features']['duration'] = len(y) / sr
             features['features']['sample_rate'] = sr
             features['features']['num_samples'] = len(y)
+            features['timings']['extract'] = time.time() - extract_start
             
             # Mark as successful
             features['success'] = True
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Audio Prefetcher for TuneForge
+
+This module reads upcoming audio files ahead of the analysis workers:
+- Copies queued files into a bounded tmpfs (or temp) buffer in queue order
+- Uses a small pool of I/O threads so network latency overlaps with decoding
+- Bounds the buffer by total bytes and by number of files
+- Hands workers a local path, falling back to the original path on a miss
+
+Libraries on network mounts (NFS/SMB) spend most of `librosa.load` waiting
+on reads; with the prefetcher those reads happen while earlier files decode.
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Read size for copying files into the buffer
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def default_buffer_root() -> str:
+    """Prefer a RAM-backed tmpfs when the platform provides one."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class _PrefetchEntry:
+    """State of one file in the prefetch buffer"""
+
+    def __init__(self, source_path: str):
+        self.source_path = source_path
+        self.local_path: Optional[str] = None
+        self.size = 0
+        self.ready = threading.Event()
+        self.failed = False
+        # Nobody will use the copy; free it as soon as the read finishes
+        self.abandoned = False
+
+
+class AudioPrefetcher:
+    """
+    Bounded read-ahead buffer for audio files.
+
+    Typical use:
+        prefetcher.schedule(paths_in_queue_order)
+        local_path = prefetcher.acquire(path)
+        ... analyze local_path ...
+        prefetcher.release(path)
+    """
+
+    def __init__(self, buffer_root: str = None, max_bytes: int = 256 * 1024 * 1024,
+                 max_files: int = 16, io_threads: int = 4):
+        """
+        Initialize the AudioPrefetcher.
+
+        Args:
+            buffer_root: Directory for the buffer (default: /dev/shm or the temp dir)
+            max_bytes: Maximum bytes held in the buffer at once
+            max_files: Maximum files held or in flight at once
+            io_threads: Number of concurrent read threads
+        """
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.buffer_dir = tempfile.mkdtemp(prefix='tuneforge-prefetch-',
+                                           dir=buffer_root or default_buffer_root())
+
+        self._lock = threading.Condition()
+        self._pending = deque()
+        self._entries: Dict[str, _PrefetchEntry] = {}
+        self._buffered_bytes = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix='prefetch')
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.bytes_prefetched = 0
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+        logger.info(f"AudioPrefetcher initialized in {self.buffer_dir} "
+                   f"({max_bytes // (1024 * 1024)} MB, {max_files} files, {io_threads} I/O threads)")
+
+    def schedule(self, file_paths: List[str]):
+        """
+        Queue files for prefetching, in the order they will be analyzed.
+
+        Args:
+            file_paths: Paths of upcoming files
+        """
+        with self._lock:
+            for path in file_paths:
+                if path and path not in self._entries:
+                    self._pending.append(path)
+            self._lock.notify_all()
+
+    def _has_room(self, size: int) -> bool:
+        """Check buffer limits (caller must hold the lock)."""
+        if len(self._entries) >= self.max_files:
+            return False
+        # Always admit one file so an oversize file cannot block the pipeline
+        return not self._entries or self._buffered_bytes + size <= self.max_bytes
+
+    def _dispatch_loop(self):
+        """Start reads for pending files while the buffer has room."""
+        sizes: Dict[str, Optional[int]] = {}
+        while True:
+            with self._lock:
+                while not self._closed and not self._pending:
+                    self._lock.wait()
+                if self._closed:
+                    return
+                path = self._pending[0]
+
+            # stat() can block for a long time on network mounts; do it without the lock
+            if path not in sizes:
+                try:
+                    sizes = {path: os.path.getsize(path)}
+                except OSError:
+                    sizes = {path: None}
+
+            with self._lock:
+                if self._closed:
+                    return
+                if not self._pending or self._pending[0] != path:
+                    # acquire() or discard() removed the file meanwhile
+                    continue
+                size = sizes[path]
+                if size is None:
+                    # Let the analyzer report the missing file itself
+                    self._pending.popleft()
+                    continue
+
+                if not self._has_room(size):
+                    self._lock.wait(timeout=1.0)
+                    continue
+
+                self._pending.popleft()
+                sizes = {}
+                if path in self._entries:
+                    continue
+                entry = _PrefetchEntry(path)
+                entry.size = size
+                self._entries[path] = entry
+                self._buffered_bytes += size
+
+            self._executor.submit(self._read_file, entry)
+
+    def _read_file(self, entry: _PrefetchEntry):
+        """Copy one file into the buffer."""
+        digest = hashlib.md5(entry.source_path.encode('utf-8', 'surrogateescape')).hexdigest()
+        extension = os.path.splitext(entry.source_path)[1]
+        local_path = os.path.join(self.buffer_dir, digest + extension)
+        try:
+            with open(entry.source_path, 'rb') as src, open(local_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, READ_CHUNK_SIZE)
+            entry.local_path = local_path
+            with self._lock:
+                self.bytes_prefetched += entry.size
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {entry.source_path}: {e}")
+            entry.failed = True
+            with self._lock:
+                self.failures += 1
+            try:
+                os.remove(local_path)
+            except OSError:
+                pass
+        finally:
+            with self._lock:
+                entry.ready.set()
+                abandoned = entry.abandoned
+            if abandoned:
+                self._drop(entry)
+
+    def acquire(self, file_path: str, wait_timeout: float = 60.0) -> str:
+        """
+        Get the path the analyzer should read for a file.
+
+        Waits for an in-flight read of this file; files that were never
+        scheduled or failed to copy return the original path.
+
+        Args:
+            file_path: Original file path
+            wait_timeout: Maximum seconds to wait for an in-flight read
+
+        Returns:
+            Path to the buffered copy, or the original path
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None:
+                self.misses += 1
+                # The queue has moved past this file; drop it from pending
+                try:
+                    self._pending.remove(file_path)
+                except ValueError:
+                    pass
+                return file_path
+
+        if entry.ready.wait(wait_timeout) and not entry.failed and entry.local_path:
+            with self._lock:
+                self.hits += 1
+            return entry.local_path
+
+        # Timed out (or the copy failed): the analyzer reads the original, so
+        # the copy is dropped whenever it finishes
+        self.release(file_path)
+        with self._lock:
+            self.misses += 1
+        return file_path
+
+    def _drop(self, entry: _PrefetchEntry):
+        """Remove a finished entry from the buffer and delete its copy."""
+        with self._lock:
+            if self._entries.get(entry.source_path) is not entry:
+                return
+            del self._entries[entry.source_path]
+            self._buffered_bytes -= entry.size
+            self._lock.notify_all()
+
+        if entry.local_path:
+            try:
+                os.remove(entry.local_path)
+            except OSError:
+                pass
+
+    def release(self, file_path: str):
+        """
+        Drop a file from the buffer after analysis.
+
+        A read that is still in flight is marked abandoned and freed by the
+        read thread when it finishes.
+
+        Args:
+            file_path: Original file path passed to acquire()
+        """
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is None:
+                return
+            if not entry.ready.is_set():
+                entry.abandoned = True
+                return
+        self._drop(entry)
+
+    def discard(self, file_paths: List[str]):
+        """
+        Forget scheduled files that will not be analyzed (e.g. the queue was rebuilt).
+
+        Args:
+            file_paths: Original file paths passed to schedule()
+        """
+        paths = set(file_paths)
+        with self._lock:
+            self._pending = deque(p for p in self._pending if p not in paths)
+            self._lock.notify_all()
+        for path in paths:
+            self.release(path)
+
+    def close(self):
+        """Stop prefetching and delete the buffer."""
+        with self._lock:
+            self._closed = True
+            self._pending.clear()
+            self._lock.notify_all()
+        self._executor.shutdown(wait=True)
+        shutil.rmtree(self.buffer_dir, ignore_errors=True)
+        logger.info(f"AudioPrefetcher closed ({self.hits} hits, {self.misses} misses)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get prefetch statistics"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures,
+                'buffered_files': len(self._entries),
+                'buffered_mb': round(self._buffered_bytes / (1024 * 1024), 1),
+                'pending_files': len(self._pending),
+                'prefetched_mb': round(self.bytes_prefetched / (1024 * 1024), 1)
+            }
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Audio analysis throughput benchmark for TuneForge.
+
+Generates a reproducible synthetic corpus and measures the analysis pipeline:
+- Corpus of tones, noise and click tracks in several codecs and lengths
+- AudioAnalyzer, IntegratedAudioProcessor and AdvancedBatchProcessor runs
+- Several worker counts and analysis sample rates
+- Tracks/sec, per-stage time (load, extract, store) and peak RSS per run
+- JSON output that can be diffed between releases (--baseline prints deltas)
+
+Usage:
+    python debug_scripts/benchmark_audio_analysis.py --output bench.json
+    python debug_scripts/benchmark_audio_analysis.py --quick
+    python debug_scripts/benchmark_audio_analysis.py --baseline old.json --output new.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import platform
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Corpus files are written at this rate; the analyzers resample on load
+CORPUS_SAMPLE_RATE = 44100
+
+# Codec name -> (soundfile format, subtype)
+CODECS = {
+    'wav': ('WAV', 'PCM_16'),
+    'flac': ('FLAC', 'PCM_16'),
+    'ogg': ('OGG', 'VORBIS'),
+    'mp3': ('MP3', 'MPEG_LAYER_III'),
+}
+
+SIGNAL_KINDS = ('tone', 'noise', 'clicks')
+
+
+def parse_list(value, cast=str):
+    """Parse a comma separated command line list"""
+    return [cast(v.strip()) for v in value.split(',') if v.strip()]
+
+
+# --- Corpus generation ---
+
+def generate_signal(kind, duration, sample_rate, rng):
+    """Generate a stereo test signal of the given kind"""
+    n = int(duration * sample_rate)
+    t = np.arange(n) / sample_rate
+
+    if kind == 'tone':
+        # Chord with a slow vibrato so the spectrum is not completely static
+        base = rng.uniform(110, 440)
+        vibrato = 1 + 0.002 * np.sin(2 * np.pi * 5 * t)
+        mono = sum(np.sin(2 * np.pi * base * ratio * vibrato * t) / (i + 1)
+                   for i, ratio in enumerate((1.0, 1.25, 1.5, 2.0)))
+    elif kind == 'noise':
+        # Pink noise: white noise shaped by 1/sqrt(f) in the frequency domain
+        spectrum = np.fft.rfft(rng.standard_normal(n))
+        freqs = np.fft.rfftfreq(n, 1.0 / sample_rate)
+        spectrum[1:] /= np.sqrt(freqs[1:])
+        spectrum[0] = 0
+        mono = np.fft.irfft(spectrum, n)
+    else:
+        # Click track at a random tempo
+        bpm = rng.uniform(70, 170)
+        mono = np.zeros(n)
+        click = np.sin(2 * np.pi * 1000 * np.arange(int(0.01 * sample_rate)) / sample_rate)
+        click *= np.exp(-np.linspace(0, 8, len(click)))
+        step = int(60.0 / bpm * sample_rate)
+        for start in range(0, n - len(click), step):
+            mono[start:start + len(click)] += click
+
+    mono = mono / (np.max(np.abs(mono)) or 1.0) * 0.8
+    return np.stack([mono, mono * 0.9], axis=1).astype(np.float32)
+
+
+def generate_corpus(corpus_dir, tracks, durations, codecs, seed=42):
+    """
+    Write the synthetic corpus, cycling through signal kinds, codecs and lengths.
+
+    Returns:
+        List of dictionaries describing each generated file
+    """
+    available = sf.available_formats()
+    usable = [c for c in codecs if c in CODECS and CODECS[c][0] in available]
+    skipped = [c for c in codecs if c not in usable]
+    if skipped:
+        print(f"⚠️  Codecs not supported by this libsndfile build: {', '.join(skipped)}")
+    if not usable:
+        raise RuntimeError("No usable codecs for the corpus")
+
+    rng = np.random.default_rng(seed)
+    os.makedirs(corpus_dir, exist_ok=True)
+    corpus = []
+
+    for i in range(tracks):
+        kind = SIGNAL_KINDS[i % len(SIGNAL_KINDS)]
+        codec = usable[(i // len(SIGNAL_KINDS)) % len(usable)]
+        duration = durations[i % len(durations)]
+        # A few files per directory, like album folders
+        album_dir = os.path.join(corpus_dir, f"album_{i // 10:03d}")
+        os.makedirs(album_dir, exist_ok=True)
+        path = os.path.join(album_dir, f"{i:04d}_{kind}_{int(duration)}s.{codec}")
+
+        data = generate_signal(kind, duration, CORPUS_SAMPLE_RATE, rng)
+        file_format, subtype = CODECS[codec]
+        sf.write(path, data, CORPUS_SAMPLE_RATE, format=file_format, subtype=subtype)
+
+        corpus.append({
+            'path': path,
+            'kind': kind,
+            'codec': codec,
+            'duration': duration,
+            'size_bytes': os.path.getsize(path)
+        })
+
+    return corpus
+
+
+def create_benchmark_db(db_path, corpus):
+    """Create a fresh tracks table holding the corpus as pending tracks"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE tracks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_path TEXT UNIQUE NOT NULL,
+                title TEXT,
+                artist TEXT,
+                album TEXT,
+                genre TEXT,
+                year INTEGER,
+                track_number INTEGER,
+                duration REAL,
+                file_size INTEGER,
+                last_modified REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO tracks (file_path, title, artist, duration, file_size) VALUES (?, ?, ?, ?, ?)",
+            [(t['path'], Path(t['path']).stem, 'Benchmark', t['duration'], t['size_bytes']) for t in corpus]
+        )
+        conn.commit()
+
+    # Adds the analysis columns and audio_features table
+    from audio_analysis_service import AudioAnalysisService
+    service = AudioAnalysisService(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE tracks SET analysis_status = 'pending'")
+        conn.commit()
+    return service
+
+
+# --- Measurement helpers ---
+
+def _rss_mb(pid):
+    """Resident memory of a process in MB, or None if unknown"""
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class PeakRssMonitor:
+    """Samples the RSS of this process and its children in the background"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self.peak_children_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        try:
+            import psutil  # Optional, needed to include isolated extraction processes
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    def _children_rss_mb(self):
+        if self._process is None:
+            return 0.0
+        total = 0.0
+        try:
+            for child in self._process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss / (1024 * 1024)
+                except Exception:
+                    pass
+        except Exception:
+            pass
+        return total
+
+    def _sample(self):
+        own = _rss_mb(os.getpid())
+        if own is None and self._process is not None:
+            own = self._process.memory_info().rss / (1024 * 1024)
+        own = own or 0.0
+        children = self._children_rss_mb()
+        self.peak_mb = max(self.peak_mb, own + children)
+        self.peak_children_mb = max(self.peak_children_mb, children)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return False
+
+
+class TimedExtractor:
+    """Wraps an extractor and accumulates the per-stage timings it reports"""
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.load = 0.0
+        self.extract = 0.0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def extract_all_features(self, file_path):
+        start = time.time()
+        result = self.extractor.extract_all_features(file_path)
+        elapsed = time.time() - start
+        timings = result.get('timings', {})
+        with self._lock:
+            self.load += timings.get('load', 0.0)
+            self.extract += timings.get('extract', 0.0)
+            self.total += elapsed
+        return result
+
+
+def build_result(component, sample_rate, workers, tracks, successful, wall_time, stages, monitor):
+    """Assemble one benchmark result entry"""
+    return {
+        'component': component,
+        'sample_rate': sample_rate,
+        'workers': workers,
+        'tracks': tracks,
+        'successful': successful,
+        'wall_time_s': round(wall_time, 3),
+        'tracks_per_sec': round(tracks / wall_time, 3) if wall_time > 0 else None,
+        'stages_s': {k: round(v, 3) for k, v in stages.items()},
+        'peak_rss_mb': round(monitor.peak_mb, 1),
+        'peak_children_rss_mb': round(monitor.peak_children_mb, 1)
+    }
+
+
+# --- Benchmarks ---
+
+def bench_analyzer(corpus, sample_rate, max_duration):
+    """Run AudioAnalyzer directly over the corpus in this process"""
+    from audio_analyzer import AudioAnalyzer
+
+    analyzer = AudioAnalyzer(sample_rate=sample_rate, max_duration=max_duration)
+    # Warm-up so numba/librosa JIT compilation is not counted
+    analyzer.extract_all_features(corpus[0]['path'])
+
+    stages = {'load': 0.0, 'extract': 0.0}
+    successful = 0
+    with PeakRssMonitor() as monitor:
+        start = time.time()
+        for item in corpus:
+            result = analyzer.extract_all_features(item['path'])
+            if result['success']:
+                successful += 1
+            stages['load'] += result.get('timings', {}).get('load', 0.0)
+            stages['extract'] += result.get('timings', {}).get('extract', 0.0)
+        wall_time = time.time() - start
+
+    return build_result('AudioAnalyzer', sample_rate, 1, len(corpus), successful,
+                        wall_time, stages, monitor)
+
+
+def bench_integrated(corpus, sample_rate, max_duration, work_dir, isolate):
+    """Run IntegratedAudioProcessor (extraction plus database storage)"""
+    from integrated_audio_processor import IntegratedAudioProcessor
+
+    db_path = os.path.join(work_dir, 'bench_integrated.db')
+    service = create_benchmark_db(db_path, corpus)
+    processor = IntegratedAudioProcessor(db_path=db_path, sample_rate=sample_rate,
+                                         max_duration=max_duration, isolate_extraction=isolate)
+    timed = TimedExtractor(processor.extractor)
+    processor.extractor = timed
+    tracks = service.get_tracks_for_analysis(limit=len(corpus))
+
+    with PeakRssMonitor() as monitor:
+        start = time.time()
+        batch = processor.process_tracks_batch(tracks)
+        wall_time = time.time() - start
+
+    if isolate:
+        processor.extractor.extractor.close()
+
+    stages = {
+        'load': timed.load,
+        'extract': timed.extract,
+        'store': max(0.0, wall_time - timed.total)
+    }
+    return build_result('IntegratedAudioProcessor', sample_rate, 1, len(corpus),
+                        batch['successful'], wall_time, stages, monitor)
+
+
+def bench_batch(corpus, sample_rate, max_duration, workers, work_dir, isolate, timeout):
+    """Run AdvancedBatchProcessor with a fixed worker pool"""
+    from advanced_batch_processor import AdvancedBatchProcessor
+
+    db_path = os.path.join(work_dir, f'bench_batch_{workers}.db')
+    create_benchmark_db(db_path, corpus)
+    processor = AdvancedBatchProcessor(
+        db_path=db_path,
+        max_workers=workers,
+        isolate_extraction=isolate,
+        analyzer_settings={'sample_rate': sample_rate, 'max_duration': max_duration}
+    )
+    processor.checkpoint_file = os.path.join(work_dir, 'checkpoint.json')
+    processor.initialize_queue(limit=len(corpus))
+
+    with PeakRssMonitor() as monitor:
+        start = time.time()
+        processor.start_processing()
+        while time.time() - start < timeout:
+            finished = len(processor.completed_jobs) + len(processor.failed_jobs) + len(processor.skipped_jobs)
+            if finished >= len(corpus):
+                break
+            time.sleep(0.1)
+        wall_time = time.time() - start
+        processor.stop_processing()
+
+    jobs = processor.completed_jobs
+    load = sum(job.load_time for job in jobs)
+    stages = {
+        'load': load,
+        'extract_and_store': max(0.0, sum(job.processing_time for job in jobs) - load)
+    }
+    return build_result('AdvancedBatchProcessor', sample_rate, workers, len(corpus),
+                        len(jobs), wall_time, stages, monitor)
+
+
+def environment_info():
+    """Describe the machine and library versions for the report"""
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'soundfile': sf.__version__,
+        'libsndfile': sf.__libsndfile_version__
+    }
+    try:
+        import librosa
+        info['librosa'] = librosa.__version__
+    except ImportError:
+        info['librosa'] = None
+    return info
+
+
+def print_comparison(baseline_path, report):
+    """Print tracks/sec changes against a previous report"""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+
+    for name, label in (('settings', 'settings'), ('corpus', 'corpus')):
+        if baseline.get(name) != report[name]:
+            print(f"⚠️  Baseline {label} differ from this run, results may not be comparable")
+
+    def key(r):
+        return (r['component'], r['sample_rate'], r['workers'])
+
+    previous = {key(r): r for r in baseline.get('results', [])}
+    print("\n📊 Comparison with baseline")
+    print("-" * 70)
+    for result in report['results']:
+        old = previous.get(key(result))
+        if not old or not old.get('tracks_per_sec') or not result.get('tracks_per_sec'):
+            continue
+        change = (result['tracks_per_sec'] / old['tracks_per_sec'] - 1) * 100
+        print(f"   {result['component']:<26} {result['sample_rate']:>6} Hz  {result['workers']} workers: "
+              f"{old['tracks_per_sec']:.2f} -> {result['tracks_per_sec']:.2f} tracks/s ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the audio analysis pipeline on a synthetic corpus')
+    parser.add_argument('--tracks', type=int, default=24, help='Number of corpus files')
+    parser.add_argument('--durations', default='10,30,90', help='Track lengths in seconds')
+    parser.add_argument('--codecs', default='wav,flac,ogg,mp3', help='Codecs to include')
+    parser.add_argument('--sample-rates', default='8000,22050', help='Analysis sample rates')
+    parser.add_argument('--workers', default='1,2,4', help='Worker counts for AdvancedBatchProcessor')
+    parser.add_argument('--components', default='analyzer,integrated,batch',
+                        help='Components to run (analyzer, integrated, batch)')
+    parser.add_argument('--max-duration', type=int, default=60, help='Analyzer max_duration in seconds')
+    parser.add_argument('--isolate', action='store_true', help='Use isolated extraction processes')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the corpus')
+    parser.add_argument('--work-dir', help='Directory for corpus and databases (default: temp dir)')
+    parser.add_argument('--keep', action='store_true', help='Keep the work directory afterwards')
+    parser.add_argument('--timeout', type=int, default=1800, help='Timeout per batch run in seconds')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', help='Previous JSON report to compare against')
+    parser.add_argument('--quick', action='store_true', help='Small corpus, one sample rate, 1-2 workers')
+    args = parser.parse_args()
+
+    if args.quick:
+        # Only replaces defaults, explicit options still win
+        parser.set_defaults(tracks=6, durations='5,10', sample_rates='8000', workers='1,2')
+        args = parser.parse_args()
+
+    durations = parse_list(args.durations, float)
+    sample_rates = parse_list(args.sample_rates, int)
+    worker_counts = parse_list(args.workers, int)
+    components = parse_list(args.components)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline = os.path.abspath(args.baseline) if args.baseline else None
+
+    work_dir = os.path.abspath(args.work_dir or tempfile.mkdtemp(prefix='tuneforge-bench-'))
+    os.makedirs(work_dir, exist_ok=True)
+    # The services create db/, logs/ and temp/ relative to the working directory
+    original_cwd = os.getcwd()
+    os.chdir(work_dir)
+
+    print("🚀 Audio Analysis Benchmark")
+    print("=" * 50)
+    print(f"   Work directory: {work_dir}")
+
+    try:
+        start = time.time()
+        corpus = generate_corpus(os.path.join(work_dir, 'corpus'), args.tracks,
+                                 durations, parse_list(args.codecs), args.seed)
+        print(f"   Generated {len(corpus)} files in {time.time() - start:.1f}s")
+
+        results = []
+        for sample_rate in sample_rates:
+            if 'analyzer' in components:
+                print(f"\n🧪 AudioAnalyzer @ {sample_rate} Hz")
+                results.append(bench_analyzer(corpus, sample_rate, args.max_duration))
+                print(f"   {results[-1]['tracks_per_sec']} tracks/s")
+
+            if 'integrated' in components:
+                print(f"\n🧪 IntegratedAudioProcessor @ {sample_rate} Hz")
+                results.append(bench_integrated(corpus, sample_rate, args.max_duration,
+                                                work_dir, args.isolate))
+                print(f"   {results[-1]['tracks_per_sec']} tracks/s")
+
+            if 'batch' in components:
+                for workers in worker_counts:
+                    print(f"\n🧪 AdvancedBatchProcessor @ {sample_rate} Hz, {workers} workers")
+                    results.append(bench_batch(corpus, sample_rate, args.max_duration, workers,
+                                               work_dir, args.isolate, args.timeout))
+                    print(f"   {results[-1]['tracks_per_sec']} tracks/s")
+
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            'environment': environment_info(),
+            'settings': {
+                'max_duration': args.max_duration,
+                'isolate_extraction': args.isolate,
+                'seed': args.seed
+            },
+            'corpus': {
+                'tracks': len(corpus),
+                'durations': durations,
+                'codecs': sorted({c['codec'] for c in corpus}),
+                'kinds': list(SIGNAL_KINDS),
+                'total_audio_seconds': sum(c['duration'] for c in corpus),
+                'total_bytes': sum(c['size_bytes'] for c in corpus)
+            },
+            'results': results
+        }
+
+        print("\n" + "=" * 50)
+        report_json = json.dumps(report, indent=2)
+        if output:
+            with open(output, 'w') as f:
+                f.write(report_json)
+            print(f"✅ Report written to {output}")
+        else:
+            print(report_json)
+
+        if baseline:
+            print_comparison(baseline, report)
+        return True
+
+    finally:
+        os.chdir(original_cwd)
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Matching quality and speed benchmark for TuneForge.
+
+Builds a synthetic library in a temporary directory and resolves a labelled
+set of LLM-style suggestions against it, so speed work on the match engine
+cannot silently cost match quality:
+- Library: ~100k tracks with realistic noise: punctuation, "&", live /
+  remaster / edit versions next to the originals, featured-artist credits,
+  "Beatles, The"-style article tags, accented artist names and band names
+  ending in a featuring word ("Little Feat")
+- Suggestions: variants of library tracks the way an LLM writes them (case,
+  dropped punctuation, article and accent changes, added or missing feat.
+  credits, remaster suffixes, typos), plus suggestions the library does not
+  have (label: no match), including "Little Feat" titles credited to "Little"
+- Precision, recall and p50/p99 per-suggestion latency for each resolution
+  strategy (exact keys, artist aliases, trigram / FTS / LIKE fuzzy fallback)
+  and for the entry points search_tracks_in_local_library (cold and warm
+  suggestion cache) and _map_candidates_to_local_with_features
+- Accept-decision precision/recall and per-call latency of calculate_similarity
+  on labelled (suggestion, candidate) pairs
+- --save writes the results as JSON; --compare fails when precision or recall
+  of any strategy dropped against such a baseline
+
+Usage:
+    python debug_scripts/benchmark_matching.py
+    python debug_scripts/benchmark_matching.py --tracks 20000 --suggestions 300
+    python debug_scripts/benchmark_matching.py --save baseline.json
+    python debug_scripts/benchmark_matching.py --compare baseline.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import itertools
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from track_matching import normalize_string, calculate_similarity, clear_match_caches, find_by_match_keys
+from artist_aliases import canonical_artist, find_by_canonical_artist
+from version_filter import is_unwanted_version
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ne', 'to', 'su', 'vi', 'da', 'ri',
+             'mo', 'el', 'an', 'or', 'us', 'be', 'zu', 'fa', 'qi', 'po']
+ACCENTS = {'e': 'é', 'o': 'ö', 'a': 'á', 'u': 'ü'}
+VERSION_SUFFIXES = [' (Live)', ' - Live', ' (2011 Remaster)', ' [Radio Edit]', ' (Acoustic)', ' (Demo)']
+SUGGESTION_SUFFIXES = [' (Remastered 2009)', ' (Single Version)', ' [Mono]']
+SUGGESTION_KINDS = ['exact', 'case', 'punctuation', 'article', 'accents', 'featured', 'suffix', 'typo']
+
+# Allowed drop in precision or recall before --compare fails
+COMPARE_TOLERANCE = 0.005
+# Suggestions resolved with the LIKE fallback (a full table scan per query)
+LIKE_SUGGESTIONS = 200
+
+
+def build_library(count, rng):
+    """
+    Generate library tracks.
+
+    Returns:
+        (tracks, originals): tracks are (title, artist, album) tuples; originals
+        maps track index -> artist info for the unique non-version tracks
+    """
+    vocabulary = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(20000)]
+    # Zipf-like word frequencies, as in real titles
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(n):
+        return ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=n)).title()
+
+    def noisy_title():
+        title = words(rng.randint(1, 4))
+        parts = title.split()
+        noise = rng.random()
+        if noise < 0.08:
+            i = rng.randrange(len(parts))
+            parts[i] = parts[i][:-1] + "'" + parts[i][-1]  # Don't-style apostrophe
+        elif noise < 0.13 and len(parts) > 1:
+            parts.insert(rng.randrange(1, len(parts)), '&')
+        elif noise < 0.18:
+            parts[-1] += rng.choice('!?')
+        return ' '.join(parts)
+
+    # Artist: (name as the LLM knows it, name in the tags)
+    artists = []
+    for _ in range(max(10, count // 10)):
+        name = words(rng.randint(1, 3))
+        tag = name
+        style = rng.random()
+        if style < 0.10:
+            name = f"The {name}"
+            tag = f"{tag}, The" if rng.random() < 0.5 else name
+        elif style < 0.16:
+            tag = ''.join(ACCENTS.get(c, c) if rng.random() < 0.5 else c for c in name)
+        elif style < 0.19:
+            # "Little Feat": the featuring word is part of the name
+            name = tag = f"{name} {rng.choice(('Feat', 'Ft'))}"
+        artists.append((name, tag))
+
+    tracks, originals, seen = [], {}, set()
+    while len(tracks) < count:
+        name, tag = rng.choice(artists)
+        featured = None
+        if rng.random() < 0.08:
+            featured = rng.choice(artists)[0]
+            tag = f"{tag} feat. {featured}"
+        title = noisy_title()
+        key = (normalize_string(title), canonical_artist(tag))
+        if key in seen:
+            continue
+        seen.add(key)
+        album = words(2)
+        originals[len(tracks)] = {'name': name, 'tag': tag, 'featured': featured}
+        tracks.append((title, tag, album))
+        if rng.random() < 0.15:
+            tracks.append((title + rng.choice(VERSION_SUFFIXES), tag, album))
+    return tracks[:count], {i: a for i, a in originals.items() if i < count}
+
+
+def build_suggestions(tracks, originals, count, rng):
+    """Labelled LLM-style suggestions: dicts with title, artist, kind and label (track index or None)"""
+    library_keys = {(normalize_string(t), canonical_artist(a)) for t, a, _ in tracks}
+    indices = list(originals)
+    featuring_names = [i for i in indices if originals[i]['name'].split()[-1] in ('Feat', 'Ft')]
+    suggestions = []
+    while len(suggestions) < count:
+        if featuring_names and rng.random() < 0.03:
+            # A "Little Feat" title credited to "Little": must not match the band
+            index = rng.choice(featuring_names)
+            title, artist = tracks[index][0], originals[index]['name'].rsplit(' ', 1)[0]
+            if (normalize_string(title), canonical_artist(artist)) in library_keys:
+                continue
+            suggestions.append({'title': title, 'artist': artist, 'kind': 'absent', 'label': None})
+            continue
+        if rng.random() < 0.25:
+            # Not in the library: a new title by a known artist, or a known title by another artist
+            title, artist = tracks[rng.choice(indices)][0], originals[rng.choice(indices)]['name']
+            if rng.random() < 0.6:
+                title = f"{title.split()[0]} {rng.choice(tracks)[0].split()[-1]}"
+            if (normalize_string(title), canonical_artist(artist)) in library_keys:
+                continue
+            suggestions.append({'title': title, 'artist': artist, 'kind': 'absent', 'label': None})
+            continue
+
+        index = rng.choice(indices)
+        title, artist, info = tracks[index][0], info_name(originals[index], rng), originals[index]
+        kind = rng.choice(SUGGESTION_KINDS)
+        if kind == 'case':
+            title, artist = rng.choice((title.upper(), title.lower())), artist.lower()
+        elif kind == 'punctuation':
+            title = title.replace("'", '').replace('!', '').replace('?', '').replace('&', 'and')
+        elif kind == 'article':
+            artist = artist[4:] if artist.startswith('The ') else f"The {artist}"
+        elif kind == 'accents':
+            # Accents the tag does not have (accented tags are already suggested without them)
+            if info['tag'].split(' feat. ')[0] == info['name']:
+                artist = ''.join(ACCENTS.get(c, c) for c in artist)
+        elif kind == 'featured':
+            if info['featured']:
+                artist = f"{artist} & {info['featured']}" if rng.random() < 0.3 else artist
+            else:
+                artist = f"{artist} ft. {originals[rng.choice(indices)]['name']}"
+        elif kind == 'suffix':
+            title += rng.choice(SUGGESTION_SUFFIXES)
+        elif kind == 'typo' and len(title) >= 6:
+            i = rng.randrange(1, len(title) - 1)
+            title = title[:i] + rng.choice('aeioust') + title[i + 1:]
+        suggestions.append({'title': title, 'artist': artist, 'kind': kind, 'label': index})
+    return suggestions
+
+
+def info_name(info, rng):
+    """Artist as the LLM writes it (featured credit, if any, the LLM way)"""
+    if info['featured'] and rng.random() < 0.5:
+        return f"{info['name']} feat. {info['featured']}"
+    return info['name']
+
+
+def populate(db_path, tracks, rng):
+    """Insert the library, build match keys and aliases, and give 80% of tracks audio features"""
+    from artist_aliases import RECORD_ALIAS_SQL, alias_rows
+
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    # Keys and aliases written with the rows, as LibraryScanner does (init_local_music_db
+    # already ran its migrations on the empty table, so they would not backfill)
+    rows = [(i + 1, f"/music/{i // 1000}/{i}.flac", t, a, al, normalize_string(t), normalize_string(a))
+            for i, (t, a, al) in enumerate(tracks)]
+    with conn:
+        conn.executemany('INSERT INTO tracks (id, file_path, title, artist, album, title_key, artist_key) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        conn.executemany(RECORD_ALIAS_SQL, alias_rows((row[6], row[3]) for row in rows))
+
+    # Minimal audio_features table (the columns fetch_batch_features reads)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS audio_features (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, track_id INTEGER NOT NULL,
+            tempo REAL, energy REAL, danceability REAL, valence REAL, acousticness REAL,
+            instrumentalness REAL, loudness REAL, speechiness REAL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_audio_features_track_id ON audio_features(track_id)')
+    with_features = {i for i in range(len(tracks)) if rng.random() < 0.8}
+    with conn:
+        conn.executemany('INSERT INTO audio_features (track_id, tempo, energy) VALUES (?, ?, ?)',
+                         [(i + 1, 120.0, 0.5) for i in sorted(with_features)])
+    conn.close()
+    return time.perf_counter() - start, with_features
+
+
+def pick_alias_match(rows):
+    """What resolve_local_suggestions accepts from artist alias rows"""
+    return next((r for r in rows if not is_unwanted_version(r['title'], r['album'])), None)
+
+
+def staged_resolver(conn, use_aliases, fuzzy_search):
+    """
+    The stages of resolve_local_suggestions for one (title, artist) pair, with
+    the alias stage optional and the fuzzy candidate search exchangeable.
+    """
+    from app.routes import evaluate_local_candidates
+
+    def resolve(title, artist):
+        pair = (title, artist)
+        cursor = conn.cursor()
+        exact = find_by_match_keys(cursor, [pair])
+        aliased = find_by_canonical_artist(cursor, [pair]) if use_aliases else {}
+        candidates = exact.get(pair) or []
+        if not candidates and pair not in aliased and fuzzy_search:
+            candidates = fuzzy_search(title, artist)
+        best = evaluate_local_candidates(title, artist, candidates) if candidates else None
+        if best is None and pair in aliased:
+            best = pick_alias_match(aliased[pair])
+        return best
+    return resolve
+
+
+def like_candidates(conn):
+    """The LIKE fallback of _find_fuzzy_local_candidates"""
+    def search(title, artist):
+        like_title, like_artist = f"%{title}%", f"%{artist}%"
+        rows = conn.execute("SELECT id, title, artist, album FROM tracks WHERE title LIKE ? AND artist LIKE ? LIMIT 50",
+                            (like_title, like_artist)).fetchall()
+        if not rows:
+            rows = conn.execute("SELECT id, title, artist, album FROM tracks WHERE title LIKE ? OR artist LIKE ? LIMIT 50",
+                                (like_title, like_artist)).fetchall()
+        return [{'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''} for r in rows]
+    return search
+
+
+def fts_candidates(conn):
+    """The FTS fallback of _find_fuzzy_local_candidates"""
+    from track_search_index import search_fields_batch
+
+    def search(title, artist):
+        return search_fields_batch(conn, [{'title': title, 'artist': artist}], limit=20).get(0, [])
+    return search
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def score(predictions, labels):
+    """(precision, recall) of predicted track ids against labels (None: no match expected)"""
+    true_positives = sum(1 for p, l in zip(predictions, labels) if p is not None and p == l)
+    predicted = sum(1 for p in predictions if p is not None)
+    positives = sum(1 for l in labels if l is not None)
+    return (true_positives / predicted if predicted else 1.0,
+            true_positives / positives if positives else 1.0)
+
+
+def measure(name, resolve, suggestions, labels, results, before_each=None):
+    """Resolve suggestions one at a time; record precision, recall and latency"""
+    clear_match_caches()
+    predictions, timings = [], []
+    for suggestion in suggestions:
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        track_id = resolve(suggestion['title'], suggestion['artist'])
+        timings.append((time.perf_counter() - start) * 1000)
+        predictions.append(track_id)
+    precision, recall = score(predictions, labels)
+    results[name] = {'precision': round(precision, 4), 'recall': round(recall, 4),
+                     'p50_ms': round(percentile(timings, 0.5), 3), 'p99_ms': round(percentile(timings, 0.99), 3),
+                     'suggestions': len(suggestions)}
+    print(f"   {name:<44} {precision:9.1%} {recall:8.1%} {results[name]['p50_ms']:9.2f} {results[name]['p99_ms']:9.2f}")
+    return predictions
+
+
+def similarity_decisions(suggestions, tracks, trigram_matcher, results):
+    """Accept decisions of calculate_similarity on target and hardest non-target candidates"""
+    pairs = []
+    for s in suggestions:
+        if s['label'] is not None:
+            title, artist, _ = tracks[s['label']]
+            pairs.append((s['title'], s['artist'], title, artist, True))
+        # Hardest negative: the most similar track that is not the answer (or a version of it)
+        for candidate in trigram_matcher.search(s['title'], s['artist'], limit=5) or []:
+            if candidate['id'] - 1 != s['label'] and not is_unwanted_version(candidate['title'], candidate['album']):
+                pairs.append((s['title'], s['artist'], candidate['title'], candidate['artist'], False))
+                break
+
+    clear_match_caches()
+    timings, decisions = [], []
+    for title, artist, c_title, c_artist, _ in pairs:
+        start = time.perf_counter()
+        title_score = calculate_similarity(title, c_title)
+        artist_score = calculate_similarity(artist, c_artist)
+        timings.append((time.perf_counter() - start) * 1e6 / 2)
+        combined = title_score * 0.7 + artist_score * 0.3
+        decisions.append(combined >= 0.82 and title_score >= 0.88 and artist_score >= 0.70)
+
+    accepted_targets = sum(1 for d, p in zip(decisions, pairs) if d and p[4])
+    accepted = sum(decisions)
+    targets = sum(1 for p in pairs if p[4])
+    precision = accepted_targets / accepted if accepted else 1.0
+    recall = accepted_targets / targets if targets else 1.0
+    results['calculate_similarity (accept decision)'] = {
+        'precision': round(precision, 4), 'recall': round(recall, 4),
+        'p50_us': round(percentile(timings, 0.5), 2), 'p99_us': round(percentile(timings, 0.99), 2),
+        'pairs': len(pairs)
+    }
+    print(f"\n🧪 calculate_similarity on {len(pairs)} labelled pairs: precision {precision:.1%}, recall {recall:.1%}, "
+          f"p50 {percentile(timings, 0.5):.1f} µs, p99 {percentile(timings, 0.99):.1f} µs per call")
+
+
+def compare(results, baseline_path):
+    """Print quality regressions against a saved baseline; returns False if there are any"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['strategies']
+    regressions = []
+    for name, old in baseline.items():
+        new = results.get(name)
+        if not new:
+            continue
+        for metric in ('precision', 'recall'):
+            if new[metric] < old[metric] - COMPARE_TOLERANCE:
+                regressions.append(f"{name}: {metric} {old[metric]:.1%} -> {new[metric]:.1%}")
+    if regressions:
+        print(f"\n❌ Match quality regressed against {baseline_path}:")
+        for line in regressions:
+            print(f"   {line}")
+        return False
+    print(f"\n✅ No precision/recall regression against {baseline_path}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark match quality and latency of local matching')
+    parser.add_argument('--tracks', type=int, default=100000, help='Number of synthetic tracks')
+    parser.add_argument('--suggestions', type=int, default=1000, help='Number of labelled suggestions')
+    parser.add_argument('--seed', type=int, default=21, help='Library and suggestion seed')
+    parser.add_argument('--save', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Fail if precision/recall dropped against this JSON baseline')
+    args = parser.parse_args()
+
+    print("🚀 Matching Quality & Speed Benchmark")
+    print("=" * 50)
+
+    rng = random.Random(args.seed)
+    tracks, originals = build_library(args.tracks, rng)
+    suggestions = build_suggestions(tracks, originals, args.suggestions, rng)
+    labels = [s['label'] for s in suggestions]
+
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    save_path = os.path.abspath(args.save) if args.save else None
+    work_dir = tempfile.mkdtemp(prefix='tuneforge-matching-')
+    original_cwd = os.getcwd()
+    os.chdir(work_dir)  # routes keep the database in ./db
+    try:
+        from app import routes
+        db_path = routes.init_local_music_db()
+        setup_time, with_features = populate(db_path, tracks, rng)
+        print(f"   {len(tracks)} tracks ({len(originals)} originals), {len(suggestions)} suggestions "
+              f"({sum(1 for l in labels if l is None)} without a library match); setup {setup_time:.1f}s")
+
+        trigram_matcher = routes.get_trigram_matcher()
+        trigram_matcher.refresh()
+        while not trigram_matcher.is_ready():
+            time.sleep(0.05)
+        print(f"   Trigram index built in {trigram_matcher.get_stats()['last_build_seconds']:.2f}s")
+
+        def trigram_candidates(title, artist):
+            return trigram_matcher.search(title, artist, limit=20) or []
+
+        results = {}
+        conn = sqlite3.connect(db_path)
+        print(f"\n   {'strategy':<44} {'precision':>9} {'recall':>8} {'p50 ms':>9} {'p99 ms':>9}")
+
+        def as_id(resolve):
+            def resolve_id(title, artist):
+                track = resolve(title, artist)
+                return track['id'] - 1 if track else None
+            return resolve_id
+
+        measure('exact keys', as_id(staged_resolver(conn, False, None)), suggestions, labels, results)
+        measure('exact keys + artist aliases', as_id(staged_resolver(conn, True, None)), suggestions, labels, results)
+        full = measure('exact + aliases + trigram (resolver default)',
+                       as_id(staged_resolver(conn, True, trigram_candidates)), suggestions, labels, results)
+        measure('exact + aliases + FTS fallback', as_id(staged_resolver(conn, True, fts_candidates(conn))),
+                suggestions, labels, results)
+        measure(f'exact + aliases + LIKE fallback (first {LIKE_SUGGESTIONS})',
+                as_id(staged_resolver(conn, True, like_candidates(conn))),
+                suggestions[:LIKE_SUGGESTIONS], labels[:LIKE_SUGGESTIONS], results)
+
+        # Entry points, one suggestion per call
+        cache = routes.get_suggestion_cache()
+
+        def local_library(title, artist):
+            matched = routes.search_tracks_in_local_library([{'title': title, 'artist': artist}], {})
+            return matched[0]['id'] - 1 if matched else None
+
+        def with_features_only(title, artist):
+            matched = routes._map_candidates_to_local_with_features([{'title': title, 'artist': artist}])
+            return matched[0]['id'] - 1 if matched else None
+
+        measure('search_tracks_in_local_library (cold cache)', local_library, suggestions, labels, results,
+                before_each=cache.invalidate)
+        # Every cold call invalidated the cache; resolve the whole set once so all lookups are hits
+        routes.resolve_local_suggestions([(s['title'], s['artist']) for s in suggestions])
+        measure('search_tracks_in_local_library (warm cache)', local_library, suggestions, labels, results)
+        feature_labels = [l if l in with_features else None for l in labels]
+        measure('_map_candidates_to_local_with_features', with_features_only, suggestions, feature_labels, results,
+                before_each=cache.invalidate)
+        conn.close()
+
+        # Where the default resolver misses, by suggestion kind
+        print("\n   Recall by suggestion kind (exact + aliases + trigram):")
+        for kind in SUGGESTION_KINDS:
+            rows = [(p, s['label']) for p, s in zip(full, suggestions) if s['kind'] == kind]
+            if rows:
+                hits = sum(1 for p, l in rows if p == l)
+                print(f"   {kind:<14} {hits / len(rows):7.1%}  ({hits}/{len(rows)})")
+        absent = [p for p, s in zip(full, suggestions) if s['kind'] == 'absent']
+        if absent:
+            wrong = sum(1 for p in absent if p is not None)
+            print(f"   {'absent':<14} {wrong} of {len(absent)} wrongly matched")
+
+        similarity_decisions(suggestions, tracks, trigram_matcher, results)
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump({'tracks': args.tracks, 'suggestions': args.suggestions, 'seed': args.seed,
+                       'strategies': results}, f, indent=2)
+        print(f"\n💾 Results saved to {save_path}")
+    if compare_path:
+        return compare(results, compare_path)
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Similarity scoring benchmark for TuneForge.
+
+Compares track_matching.calculate_similarity (precompiled patterns, memoized
+normalize_string and ratios, length-bound shortcut before SequenceMatcher)
+against the original implementation:
+- Builds a corpus of (suggestion, candidate) title and artist pairs the way
+  the matching loops see them: exact hits, case/punctuation variants,
+  (Live)/[Remaster] suffixes, typos and unrelated candidates
+- Verifies that both return exactly the same score for every pair
+- Reports candidates/sec (one title and one artist score per candidate) for
+  the original, the new scorer with cold caches and with warm caches (the
+  same suggestions scored again, as happens across generation batches)
+
+Usage:
+    python debug_scripts/benchmark_similarity.py
+    python debug_scripts/benchmark_similarity.py --suggestions 500 --candidates 50
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from track_matching import calculate_similarity, clear_match_caches
+
+WORDS = ['love', 'night', 'heart', 'fire', 'rain', 'dream', 'road', 'light', 'gold', 'river',
+         'summer', 'city', 'blue', 'wild', 'stone', 'dance', 'home', 'star', 'ghost', 'wonder']
+SUFFIXES = [' (Live)', ' (Remastered 2011)', ' [Radio Edit]', ' - Live at Wembley', '']
+
+
+def original_normalize_string(text):
+    """normalize_string before memoization (reference)"""
+    if not text:
+        return ""
+    normalized = text.lower()
+    import re
+    normalized = re.sub(r'\s*\([^)]*\)', '', normalized)
+    normalized = re.sub(r'\s*\[[^\]]*\]', '', normalized)
+    normalized = re.sub(r'[^\w\s]', ' ', normalized)
+    normalized = re.sub(r'\s+', ' ', normalized)
+    normalized = normalized.strip()
+    return normalized
+
+
+def original_calculate_similarity(str1, str2):
+    """calculate_similarity before the fast path (reference)"""
+    if not str1 or not str2:
+        return 0.0
+    norm1 = original_normalize_string(str1)
+    norm2 = original_normalize_string(str2)
+    if norm1 == norm2:
+        return 1.0
+    words1 = set(norm1.split())
+    words2 = set(norm2.split())
+    if not words1 or not words2:
+        return 0.0
+    intersection = len(words1.intersection(words2))
+    union = len(words1.union(words2))
+    word_similarity = intersection / union if union > 0 else 0.0
+    import difflib
+    char_similarity = difflib.SequenceMatcher(None, norm1, norm2).ratio()
+    return max(word_similarity, char_similarity)
+
+
+def build_corpus(suggestions, candidates, seed=5):
+    """(suggested title, suggested artist, [(candidate title, candidate artist), ...])"""
+    rng = random.Random(seed)
+
+    def phrase(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n)).title()
+
+    def typo(text):
+        i = rng.randrange(len(text))
+        return text[:i] + text[i + 1:]
+
+    corpus = []
+    for _ in range(suggestions):
+        title, artist = phrase(rng.randint(1, 4)), phrase(2)
+        rows = []
+        for _ in range(candidates):
+            kind = rng.random()
+            if kind < 0.1:
+                rows.append((title, artist))
+            elif kind < 0.3:
+                rows.append((title.upper() + rng.choice(SUFFIXES), re.sub(' ', ', ', artist)))
+            elif kind < 0.5:
+                rows.append((typo(title), typo(artist)))
+            else:
+                rows.append((phrase(rng.randint(1, 5)), phrase(2)))
+        corpus.append((title, artist, rows))
+    return corpus
+
+
+def run(score, corpus):
+    """Score every candidate like the matching loops; returns (scores, seconds)"""
+    scores = []
+    start = time.perf_counter()
+    for title, artist, rows in corpus:
+        for candidate_title, candidate_artist in rows:
+            scores.append((score(title, candidate_title), score(artist, candidate_artist)))
+    return scores, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark similarity scoring')
+    parser.add_argument('--suggestions', type=int, default=300, help='Number of suggested tracks')
+    parser.add_argument('--candidates', type=int, default=50, help='Candidates scored per suggestion')
+    args = parser.parse_args()
+
+    print("🚀 Similarity Scoring Benchmark")
+    print("=" * 50)
+
+    corpus = build_corpus(args.suggestions, args.candidates)
+    total = args.suggestions * args.candidates
+
+    reference, original_time = run(original_calculate_similarity, corpus)
+    clear_match_caches()
+    cold, cold_time = run(calculate_similarity, corpus)
+    warm, warm_time = run(calculate_similarity, corpus)
+
+    print(f"   {total} candidates ({args.suggestions} suggestions x {args.candidates})")
+    print(f"\n🧪 original:          {total / original_time:10.0f} candidates/s")
+    print(f"🧪 fast path (cold):  {total / cold_time:10.0f} candidates/s ({original_time / cold_time:.2f}x)")
+    print(f"🧪 fast path (warm):  {total / warm_time:10.0f} candidates/s ({original_time / warm_time:.2f}x)")
+
+    mismatches = [i for i, (a, b, c) in enumerate(zip(reference, cold, warm)) if not a == b == c]
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} scores differ from the original implementation")
+        return False
+    print(f"\n✅ All {len(reference)} score pairs identical to the original implementation")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
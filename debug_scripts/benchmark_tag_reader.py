@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tag reader benchmark for TuneForge.
+
+Compares the fast tag reader (fast_tag_reader.read_track_metadata with the
+full mutagen fallback, as used by the scanner) against the original
+extract_track_metadata implementation:
+- Generates a mixed corpus (FLAC with/without artwork and tags, tagged MP3,
+  Ogg Vorbis, WAV) or uses an existing music folder (--folder)
+- Verifies that both produce exactly the same fields for every file
+- Reports files/sec for both paths
+
+Usage:
+    python debug_scripts/benchmark_tag_reader.py
+    python debug_scripts/benchmark_tag_reader.py --folder /path/to/music --limit 2000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+import mutagen
+from mutagen.flac import FLAC, Picture
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3, APIC
+from mutagen.oggvorbis import OggVorbis
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fast_tag_reader import read_track_metadata
+
+SUPPORTED_EXTENSIONS = {'.mp3', '.flac', '.m4a', '.ogg', '.wav', '.aac'}
+
+
+def original_extract_track_metadata(file_path):
+    """The extract_track_metadata implementation before the fast path (reference)"""
+    try:
+        file_stat = os.stat(file_path)
+        file_size = file_stat.st_size
+        last_modified = file_stat.st_mtime
+
+        audio = mutagen.File(file_path, easy=True)
+        if audio is None:
+            audio = mutagen.File(file_path)
+
+        metadata = {
+            'title': None, 'artist': None, 'album': None, 'genre': None, 'year': None,
+            'track_number': None, 'duration': None,
+            'file_size': file_size, 'last_modified': last_modified
+        }
+
+        if audio:
+            if hasattr(audio, 'tags'):
+                tags = audio.tags
+                if hasattr(tags, 'get'):
+                    metadata['title'] = tags.get('title', [None])[0] if tags.get('title') else None
+                    metadata['artist'] = tags.get('artist', [None])[0] if tags.get('artist') else None
+                    metadata['album'] = tags.get('album', [None])[0] if tags.get('album') else None
+                    metadata['genre'] = tags.get('genre', [None])[0] if tags.get('genre') else None
+                    year_str = tags.get('date', [None])[0] if tags.get('date') else None
+                    if year_str:
+                        try:
+                            metadata['year'] = int(year_str[:4])
+                        except (ValueError, TypeError):
+                            pass
+                    track_str = tags.get('tracknumber', [None])[0] if tags.get('tracknumber') else None
+                    if track_str:
+                        try:
+                            metadata['track_number'] = int(track_str)
+                        except (ValueError, TypeError):
+                            pass
+            if hasattr(audio, 'info') and hasattr(audio.info, 'length'):
+                metadata['duration'] = audio.info.length
+
+        if not metadata['title']:
+            metadata['title'] = os.path.splitext(os.path.basename(file_path))[0]
+        return metadata
+    except Exception:
+        return None
+
+
+def fast_extract_track_metadata(file_path):
+    """Fast path with the same fallback the routes use"""
+    metadata = read_track_metadata(file_path)
+    if metadata is not None:
+        return metadata
+    return original_extract_track_metadata(file_path)
+
+
+def generate_corpus(corpus_dir, count, artwork_kb, seed=7):
+    """Write a mixed, tagged corpus and return the file paths"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(corpus_dir, exist_ok=True)
+    artwork = rng.integers(0, 255, artwork_kb * 1024, dtype=np.uint8).tobytes()
+    variants = ['flac_art', 'flac_plain', 'flac_untagged', 'mp3_art', 'mp3_plain', 'ogg', 'wav']
+    paths = []
+
+    for i in range(count):
+        variant = variants[i % len(variants)]
+        extension = '.' + variant.split('_')[0]
+        path = os.path.join(corpus_dir, f"{i:05d}_{variant}{extension}")
+        audio = (rng.standard_normal((44100 * 2, 2)) * 0.1).astype(np.float32)
+        file_format = {'.flac': 'FLAC', '.mp3': 'MP3', '.ogg': 'OGG', '.wav': 'WAV'}[extension]
+        sf.write(path, audio, 44100, format=file_format)
+
+        fields = {
+            'title': f'Title {i}', 'artist': f'Artist {i % 13}', 'album': f'Album {i % 29}',
+            'genre': ['Rock', 'Jazz', 'Electronic'][i % 3],
+            'date': f'{1970 + i % 50}-01-01', 'tracknumber': str(i % 12 + 1) if i % 5 else f'{i % 12 + 1}/12'
+        }
+
+        if extension == '.flac' and variant != 'flac_untagged':
+            tagged = FLAC(path)
+            for key, value in fields.items():
+                tagged[key] = value
+            tagged['TITLE'] = [fields['title'], 'Alternate title']
+            if variant == 'flac_art':
+                picture = Picture()
+                picture.type = 3
+                picture.mime = 'image/jpeg'
+                picture.data = artwork
+                tagged.add_picture(picture)
+            tagged.save()
+        elif extension == '.mp3':
+            try:
+                tagged = EasyID3(path)
+            except mutagen.id3.ID3NoHeaderError:
+                tagged = mutagen.File(path, easy=True)
+                tagged.add_tags()
+                tagged = tagged.tags
+            for key, value in fields.items():
+                tagged[key] = value
+            tagged.save(path)
+            if variant == 'mp3_art':
+                id3 = ID3(path)
+                id3.add(APIC(encoding=3, mime='image/jpeg', type=3, desc='Cover', data=artwork))
+                id3.save()
+        elif extension == '.ogg':
+            tagged = OggVorbis(path)
+            for key, value in fields.items():
+                tagged[key] = value
+            tagged.save()
+
+        paths.append(path)
+    return paths
+
+
+def collect_folder(folder, limit):
+    """Collect supported audio files from an existing folder"""
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            if os.path.splitext(file)[1].lower() in SUPPORTED_EXTENSIONS:
+                paths.append(os.path.join(root, file))
+                if len(paths) >= limit:
+                    return paths
+    return paths
+
+
+def time_reader(reader, paths, rounds):
+    """Best-of-N wall time for reading every file"""
+    best = None
+    results = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [reader(p) for p in paths]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the fast tag reader against the original reader')
+    parser.add_argument('--folder', help='Use audio files from this folder instead of a synthetic corpus')
+    parser.add_argument('--limit', type=int, default=1000, help='Maximum files taken from --folder')
+    parser.add_argument('--count', type=int, default=140, help='Synthetic corpus size')
+    parser.add_argument('--artwork-kb', type=int, default=512, help='Size of embedded artwork in KB')
+    parser.add_argument('--rounds', type=int, default=3, help='Timing rounds (best is reported)')
+    args = parser.parse_args()
+
+    print("🚀 Tag Reader Benchmark")
+    print("=" * 50)
+
+    work_dir = None
+    if args.folder:
+        paths = collect_folder(args.folder, args.limit)
+    else:
+        work_dir = tempfile.mkdtemp(prefix='tuneforge-tags-')
+        paths = generate_corpus(work_dir, args.count, args.artwork_kb)
+    print(f"   Files: {len(paths)}")
+
+    try:
+        # Import mutagen format modules before timing
+        original_extract_track_metadata(paths[0])
+        fast_extract_track_metadata(paths[0])
+
+        original_time, original_results = time_reader(original_extract_track_metadata, paths, args.rounds)
+        fast_time, fast_results = time_reader(fast_extract_track_metadata, paths, args.rounds)
+
+        fast_path_hits = sum(1 for p in paths if read_track_metadata(p) is not None)
+        mismatches = [(p, a, b) for p, a, b in zip(paths, original_results, fast_results) if a != b]
+
+        print(f"\n🧪 Original reader: {original_time:.3f}s ({len(paths) / original_time:.0f} files/s)")
+        print(f"🧪 Fast reader:     {fast_time:.3f}s ({len(paths) / fast_time:.0f} files/s)")
+        print(f"   Speedup: {original_time / fast_time:.2f}x, fast path used for {fast_path_hits}/{len(paths)} files")
+
+        if mismatches:
+            print(f"\n❌ {len(mismatches)} files differ:")
+            for path, original, fast in mismatches[:10]:
+                print(f"   {path}")
+                print(f"      original: {original}")
+                print(f"      fast:     {fast}")
+            return False
+
+        print("\n✅ All fields identical")
+        return True
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
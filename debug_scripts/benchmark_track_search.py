@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Track search benchmark for TuneForge.
+
+Builds a synthetic library in a temporary directory and compares the
+full-text search path of search_local_tracks against the previous
+leading-wildcard LIKE query:
+- Bulk inserts go through the FTS triggers (measures write overhead)
+- Typeahead-style prefix queries, timed per keystroke
+- Diacritic-insensitive matching check ("beyonce" finds "Beyoncé")
+
+Usage:
+    python debug_scripts/benchmark_track_search.py
+    python debug_scripts/benchmark_track_search.py --tracks 500000
+"""
+
+import os
+import sys
+import time
+import random
+import itertools
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+SYLLABLES = ['ka', 'lo', 'mi', 'ra', 'ne', 'to', 'su', 'vi', 'da', 'ri',
+             'mo', 'el', 'an', 'or', 'us', 'be', 'zu', 'fa', 'qi', 'po']
+GENRES = ['Rock', 'Pop', 'Jazz', 'Electronic', 'Hip-Hop', 'Folk', 'Classical', 'Metal']
+
+
+def populate(db_path, count, seed=11):
+    """Insert synthetic tracks (the FTS triggers index them as they go)"""
+    rng = random.Random(seed)
+    vocabulary = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(30000)]
+    # Zipf-like word frequencies, as in real titles
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def words(n):
+        return ' '.join(rng.choices(vocabulary, cum_weights=cumulative, k=n)).title()
+
+    artists = [words(2) for _ in range(max(1, count // 10))]
+    conn = sqlite3.connect(db_path)
+    rows = []
+    for i in range(count):
+        rows.append((
+            f"/music/{i // 1000}/{i}.flac",
+            words(rng.randint(1, 4)),
+            rng.choice(artists),
+            words(2),
+            rng.choice(GENRES),
+            rng.randint(1960, 2024),
+            rng.uniform(90, 420)
+        ))
+    rows.append(('/music/special/halo.flac', 'Halo', 'Beyoncé', 'I Am... Sasha Fierce', 'Pop', 2008, 261.0))
+
+    start = time.perf_counter()
+    with conn:
+        conn.executemany('''
+            INSERT INTO tracks (file_path, title, artist, album, genre, year, duration)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    elapsed = time.perf_counter() - start
+    conn.close()
+
+    # Typed phrases: "<title start> <artist start>" of random tracks
+    phrases = [f"{title.split()[0]} {artist.split()[0]}".lower()
+               for _, title, artist, *_ in rng.sample(rows, 8)]
+    return elapsed, phrases
+
+
+def like_search(db_path, query, limit=25):
+    """The previous search query (leading-wildcard LIKE, full table scan)"""
+    conn = sqlite3.connect(db_path)
+    pattern = f"%{query}%"
+    rows = conn.execute('''
+        SELECT id, title, artist, album, genre, year, duration, file_path
+        FROM tracks WHERE (title LIKE ? OR artist LIKE ? OR album LIKE ?)
+        ORDER BY title ASC LIMIT ?
+    ''', (pattern, pattern, pattern, limit)).fetchall()
+    conn.close()
+    return rows
+
+
+def time_keystrokes(search, phrase, rounds):
+    """Time a search for every prefix of a phrase, as typed"""
+    timings = []
+    for _ in range(rounds):
+        for end in range(2, len(phrase) + 1):
+            start = time.perf_counter()
+            search(phrase[:end])
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark FTS5 track search against LIKE')
+    parser.add_argument('--tracks', type=int, default=100000, help='Number of synthetic tracks')
+    parser.add_argument('--rounds', type=int, default=3, help='Repetitions of each typed phrase')
+    args = parser.parse_args()
+
+    print("🚀 Track Search Benchmark")
+    print("=" * 50)
+
+    work_dir = tempfile.mkdtemp(prefix='tuneforge-search-')
+    original_cwd = os.getcwd()
+    os.chdir(work_dir)  # routes keep the database in ./db
+    try:
+        from app.routes import init_local_music_db, search_local_tracks
+        db_path = init_local_music_db()
+
+        insert_time, phrases = populate(db_path, args.tracks)
+        print(f"   Inserted {args.tracks} tracks in {insert_time:.1f}s (FTS triggers included)")
+
+        fts_timings, like_timings = [], []
+        for phrase in phrases:
+            fts_timings += time_keystrokes(
+                lambda q: search_local_tracks(q, limit=25, sort_by='relevance'), phrase, args.rounds)
+            like_timings += time_keystrokes(lambda q: like_search(db_path, q), phrase, args.rounds)
+
+        for name, timings in (('LIKE', like_timings), ('FTS5', fts_timings)):
+            timings.sort()
+            print(f"\n🧪 {name}: p50 {statistics.median(timings):.2f} ms, "
+                  f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, max {timings[-1]:.2f} ms")
+
+        results = search_local_tracks('beyonce halo', limit=5, sort_by='relevance')
+        found = any(r['artist'] == 'Beyoncé' for r in results)
+        print(f"\n{'✅' if found else '❌'} Diacritic-insensitive match: 'beyonce halo' -> "
+              f"{[(r['title'], r['artist']) for r in results[:3]]}")
+        return found
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Match decision regression check for TuneForge.
+
+Verifies that the pruned candidate evaluation (evaluate_local_candidates:
+similarity_upper_bound checks before any SequenceMatcher work) picks exactly
+the same candidate as scoring every candidate in full:
+- Builds a seeded corpus of suggestions with candidate lists the size the
+  matching loops see (20 for Navidrome results and trigram candidates, 50 for
+  the SQL fallback): exact hits, case/punctuation variants, (Live)/[Remaster]
+  versions, typos close to the thresholds, other artists and unrelated tracks
+- Compares the chosen candidate for every suggestion
+- Reports suggestions/sec and SequenceMatcher ratios computed, with cold
+  caches, for the full and the pruned evaluation
+
+Usage:
+    python debug_scripts/regression_match_decisions.py
+    python debug_scripts/regression_match_decisions.py --suggestions 2000 --seed 7
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from track_matching import calculate_similarity, clear_match_caches, _sequence_ratio
+from version_filter import is_unwanted_version
+from app.routes import evaluate_local_candidates
+
+WORDS = ['love', 'night', 'heart', 'fire', 'rain', 'dream', 'road', 'light', 'gold', 'river',
+         'summer', 'city', 'blue', 'wild', 'stone', 'dance', 'home', 'star', 'ghost', 'wonder',
+         'midnight', 'highway', 'paradise', 'thunder', 'shadow', 'silver', 'morning', 'ocean']
+SUFFIXES = [' (Live)', ' (Remastered 2011)', ' [Radio Edit]', ' - Live at Wembley', ' (Demo)']
+
+
+def full_evaluation(title, artist, candidates):
+    """evaluate_local_candidates scoring every candidate in full (reference)"""
+    best = None
+    best_score = 0.0
+    for c in candidates:
+        if is_unwanted_version(c.get('title'), c.get('album')):
+            continue
+        title_score = calculate_similarity(title, c.get('title'))
+        artist_score = calculate_similarity(artist, c.get('artist'))
+        combined = (title_score * 0.7) + (artist_score * 0.3)
+        if combined > best_score and combined >= 0.82 and title_score >= 0.88 and artist_score >= 0.70:
+            best = c
+            best_score = combined
+            if combined >= 0.92 and title_score >= 0.92:
+                break
+    return best
+
+
+def build_corpus(suggestions, seed):
+    """[(title, artist, candidates), ...] with 20 or 50 candidates each"""
+    rng = random.Random(seed)
+
+    def phrase(n):
+        return ' '.join(rng.choice(WORDS) for _ in range(n)).title()
+
+    def typo(text, edits=1):
+        for _ in range(edits):
+            i = rng.randrange(len(text))
+            op = rng.random()
+            if op < 0.4:
+                text = text[:i] + text[i + 1:]
+            elif op < 0.7:
+                text = text[:i] + rng.choice('aeiourst') + text[i:]
+            else:
+                text = text[:i] + rng.choice('aeiourst') + text[i + 1:]
+        return text or 'x'
+
+    corpus = []
+    next_id = 0
+    for _ in range(suggestions):
+        title, artist = phrase(rng.randint(1, 4)), phrase(rng.randint(1, 2))
+        # Some suggestions have no exact or case/punctuation variant in the
+        # library, some only longer titles and unrelated tracks
+        lowest_kind = rng.choice((0.0, 0.15, 0.55))
+        candidates = []
+        for _ in range(rng.choice((20, 50))):
+            kind = rng.uniform(lowest_kind, 1.0)
+            if kind < 0.05:
+                c_title, c_artist = title, artist
+            elif kind < 0.15:
+                c_title, c_artist = title.upper().replace(' ', ', '), artist.lower()
+            elif kind < 0.25:
+                c_title, c_artist = title + rng.choice(SUFFIXES), artist
+            elif kind < 0.45:
+                c_title, c_artist = typo(title, rng.randint(1, 3)), typo(artist, rng.randint(0, 2))
+            elif kind < 0.55:
+                c_title, c_artist = title, phrase(rng.randint(1, 2))
+            elif kind < 0.65:
+                c_title, c_artist = f"{title} {rng.choice(WORDS).title()}", artist
+            else:
+                c_title, c_artist = phrase(rng.randint(1, 5)), phrase(rng.randint(1, 2))
+            next_id += 1
+            candidates.append({'id': next_id, 'title': c_title, 'artist': c_artist, 'album': phrase(2)})
+        # The matching loops see the most similar candidates first
+        if rng.random() < 0.5:
+            candidates.sort(key=lambda c: -calculate_similarity(title, c['title']))
+        corpus.append((title, artist, candidates))
+    return corpus
+
+
+def run(evaluate, corpus):
+    """Evaluate the corpus with cold caches; returns (chosen ids, seconds, ratios computed)"""
+    clear_match_caches()
+    start = time.perf_counter()
+    chosen = []
+    for title, artist, candidates in corpus:
+        best = evaluate(title, artist, candidates)
+        chosen.append(best['id'] if best else None)
+    return chosen, time.perf_counter() - start, _sequence_ratio.cache_info().misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that candidate pruning keeps match decisions')
+    parser.add_argument('--suggestions', type=int, default=5000, help='Number of suggested tracks')
+    parser.add_argument('--seed', type=int, default=3, help='Corpus seed')
+    args = parser.parse_args()
+
+    print("🚀 Match Decision Regression Check")
+    print("=" * 50)
+
+    corpus = build_corpus(args.suggestions, args.seed)
+    candidates = sum(len(c) for _, _, c in corpus)
+    print(f"   {args.suggestions} suggestions, {candidates} candidates")
+
+    reference, full_time, full_ratios = run(full_evaluation, corpus)
+    pruned, pruned_time, pruned_ratios = run(evaluate_local_candidates, corpus)
+
+    matched = sum(1 for r in reference if r is not None)
+    print(f"   {matched} suggestions matched ({matched / len(reference):.1%})")
+    print(f"\n🧪 full scoring:  {len(corpus) / full_time:8.0f} suggestions/s, {full_ratios} ratios computed")
+    print(f"🧪 pruned:        {len(corpus) / pruned_time:8.0f} suggestions/s, {pruned_ratios} ratios computed "
+          f"({full_time / pruned_time:.2f}x)")
+
+    mismatches = [i for i, (a, b) in enumerate(zip(reference, pruned)) if a != b]
+    if mismatches:
+        print(f"\n❌ {len(mismatches)} match decisions differ, e.g. suggestion {mismatches[0]}: "
+              f"{corpus[mismatches[0]][0]!r} by {corpus[mismatches[0]][1]!r}")
+        return False
+    print(f"\n✅ All {len(reference)} match decisions identical to full scoring")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
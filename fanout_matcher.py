@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Fan-out Matcher for TuneForge
+
+This module matches a batch of suggested tracks against several sources
+(local library, Navidrome, Plex) at the same time:
+- Every (suggestion, source) lookup is dispatched to one thread pool, so the
+  slowest source no longer adds to the others' latency
+- Deterministic merge: a suggestion takes the match of the first source in
+  priority order that found one, and matches are returned in suggestion
+  order, whatever order the lookups finish in
+- Once the first `needed` matches (in suggestion order) are settled, the
+  remaining lookups are cancelled; so are lower-priority lookups of a
+  suggestion that a higher-priority source already matched
+
+Sources are plain callables, so this module stays independent of the Flask
+routes that know how to talk to each service.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A source looks up one suggestion and returns its first acceptable match, or None
+MatchSource = Tuple[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]
+
+# Marks a (suggestion, source) lookup that has not finished
+_PENDING = object()
+
+
+class FanOutMatcher:
+    """
+    Concurrent lookup of suggestions across match sources.
+    """
+
+    def __init__(self, sources: List[MatchSource], max_workers: int = 10):
+        """
+        Initialize the FanOutMatcher.
+
+        Args:
+            sources: (name, lookup) pairs in priority order
+            max_workers: Lookups running at the same time
+        """
+        self.sources = sources
+        self.max_workers = max(1, max_workers)
+
+        # Statistics of the last match() call
+        self.lookups_submitted = 0
+        self.lookups_cancelled = 0
+
+    def _settled(self, outcomes: List[List[Any]], index: int):
+        """
+        Decide a suggestion from the lookups finished so far.
+
+        Returns:
+            (source index, match) if a match is decided, (None, None) if no
+            source matched, or None while a higher-priority lookup is pending
+        """
+        for source_index, outcome in enumerate(outcomes[index]):
+            if outcome is _PENDING:
+                return None
+            if outcome is not None:
+                return source_index, outcome
+        return None, None
+
+    def match(self, suggestions: List[Dict[str, Any]], needed: Optional[int] = None) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Match suggestions against all sources.
+
+        Args:
+            suggestions: Suggested tracks (dicts passed to every source)
+            needed: Stop once this many suggestions are matched (None: match all)
+
+        Returns:
+            (suggestion index, source name, match) for matched suggestions, in
+            suggestion order, at most `needed` of them
+        """
+        self.lookups_submitted = 0
+        self.lookups_cancelled = 0
+        if not suggestions or not self.sources or needed == 0:
+            return []
+
+        outcomes = [[_PENDING] * len(self.sources) for _ in suggestions]
+        next_undecided = 0
+        results = []
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fanout-match')
+        try:
+            # Suggestion-major order, so earlier suggestions (which are merged first) finish first
+            futures = {}
+            slots = {}
+            for index, suggestion in enumerate(suggestions):
+                for source_index, (_, lookup) in enumerate(self.sources):
+                    future = executor.submit(lookup, suggestion)
+                    futures[future] = (index, source_index)
+                    slots[(index, source_index)] = future
+            self.lookups_submitted = len(futures)
+
+            not_done = set(futures)
+            while not_done:
+                done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, source_index = futures[future]
+                    try:
+                        outcomes[index][source_index] = future.result()
+                    except Exception as e:
+                        logger.warning(f"Lookup in {self.sources[source_index][0]} failed: {e}")
+                        outcomes[index][source_index] = None
+
+                # Merge in suggestion order as far as lookups allow
+                while next_undecided < len(suggestions):
+                    settled = self._settled(outcomes, next_undecided)
+                    if settled is None:
+                        break
+                    if settled[0] is not None:
+                        results.append((next_undecided, self.sources[settled[0]][0], settled[1]))
+                        # Lower-priority sources cannot change this suggestion any more
+                        for source_index in range(settled[0] + 1, len(self.sources)):
+                            if slots[(next_undecided, source_index)].cancel():
+                                self.lookups_cancelled += 1
+                    next_undecided += 1
+                    if needed is not None and len(results) >= needed:
+                        break
+
+                if needed is not None and len(results) >= needed:
+                    self.lookups_cancelled += sum(1 for future in not_done if future.cancel())
+                    break
+        finally:
+            # Lookups already running finish in the background; their results are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results
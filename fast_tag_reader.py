@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Fast Tag Reader for TuneForge
+
+This module reads the tag fields the library scanner stores
+(title/artist/album/genre/date/tracknumber/duration) with as little I/O as
+possible:
+- FLAC: parses STREAMINFO and the Vorbis comment block directly and seeks past
+  PICTURE (embedded artwork), PADDING and other metadata blocks
+- MP3, M4A and Ogg Vorbis: opens the matching mutagen class directly, so the
+  file is not probed against every format and never parsed a second time
+- Anything unusual returns None so the caller can use the full mutagen path
+
+`metadata_from_audio` holds the field mapping shared with the full path in the
+routes, so both produce identical metadata dictionaries.
+"""
+
+import os
+import struct
+import logging
+from typing import Dict, List, Optional, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# FLAC metadata block types
+FLAC_STREAMINFO = 0
+FLAC_VORBIS_COMMENT = 4
+FLAC_INVALID = 127
+# Blocks this large may be longer than their size field says (see mutagen #106)
+FLAC_MAX_BLOCK_SIZE = 0xFFFFFF
+
+
+def metadata_from_audio(audio, file_path: str, file_size: int, last_modified: float) -> Dict[str, Any]:
+    """
+    Build the track metadata dictionary from a loaded mutagen-style object.
+
+    Args:
+        audio: Object with optional `tags` (with .get) and `info.length`, or None
+        file_path: Path of the file (used for the title fallback)
+        file_size: File size in bytes
+        last_modified: Modification time of the file
+
+    Returns:
+        Metadata dictionary as stored in the tracks table
+    """
+    metadata = {
+        'title': None,
+        'artist': None,
+        'album': None,
+        'genre': None,
+        'year': None,
+        'track_number': None,
+        'duration': None,
+        'file_size': file_size,
+        'last_modified': last_modified
+    }
+
+    # mutagen file objects are falsy when they carry no tags
+    if audio:
+        # Extract common metadata fields
+        if hasattr(audio, 'tags'):
+            tags = audio.tags
+
+            # Handle different tag formats
+            if hasattr(tags, 'get'):
+                metadata['title'] = tags.get('title', [None])[0] if tags.get('title') else None
+                metadata['artist'] = tags.get('artist', [None])[0] if tags.get('artist') else None
+                metadata['album'] = tags.get('album', [None])[0] if tags.get('album') else None
+                metadata['genre'] = tags.get('genre', [None])[0] if tags.get('genre') else None
+
+                # Handle year
+                year_str = tags.get('date', [None])[0] if tags.get('date') else None
+                if year_str:
+                    try:
+                        metadata['year'] = int(year_str[:4])
+                    except (ValueError, TypeError):
+                        pass
+
+                # Handle track number
+                track_str = tags.get('tracknumber', [None])[0] if tags.get('tracknumber') else None
+                if track_str:
+                    try:
+                        metadata['track_number'] = int(track_str)
+                    except (ValueError, TypeError):
+                        pass
+
+        # Get duration
+        if hasattr(audio, 'info') and hasattr(audio.info, 'length'):
+            metadata['duration'] = audio.info.length
+
+    # Use filename as fallback for title if no metadata
+    if not metadata['title']:
+        filename = os.path.splitext(os.path.basename(file_path))[0]
+        metadata['title'] = filename
+
+    return metadata
+
+
+class _VorbisTags:
+    """Vorbis comments with mutagen's case-insensitive, multi-value lookup"""
+
+    def __init__(self, comments: List[tuple]):
+        self._comments = comments
+
+    def get(self, key: str, default=None):
+        key = key.lower()
+        values = [value for name, value in self._comments if name.lower() == key]
+        return values or default
+
+    def keys(self):
+        return list({name.lower() for name, _ in self._comments})
+
+
+class _StreamInfo:
+    """Duration from the FLAC STREAMINFO block"""
+
+    def __init__(self, length: float):
+        self.length = length
+
+
+class _FlacFile:
+    """Minimal stand-in for mutagen.flac.FLAC with tags and info only"""
+
+    def __init__(self, tags: Optional[_VorbisTags], info: _StreamInfo):
+        self.tags = tags
+        self.info = info
+
+    def __bool__(self):
+        return bool(self.tags is not None and self.tags.keys())
+
+
+def _parse_vorbis_comment(data: bytes) -> Optional[_VorbisTags]:
+    """Parse a FLAC Vorbis comment block the way mutagen does, or None if malformed."""
+    try:
+        offset = 0
+        vendor_length = struct.unpack_from('<I', data, offset)[0]
+        offset += 4 + vendor_length
+        count = struct.unpack_from('<I', data, offset)[0]
+        offset += 4
+        comments = []
+        for i in range(count):
+            length = struct.unpack_from('<I', data, offset)[0]
+            offset += 4
+            if offset + length > len(data):
+                return None
+            string = data[offset:offset + length].decode('utf-8', 'replace')
+            offset += length
+            if '=' in string:
+                name, value = string.split('=', 1)
+            else:
+                name, value = 'unknown%d' % i, string
+            name = name.encode('ascii', 'replace').decode('ascii')
+            if name and all(' ' <= c <= '}' and c != '=' for c in name):
+                comments.append((name, value))
+        return _VorbisTags(comments)
+    except struct.error:
+        return None
+
+
+def _read_flac(file_path: str) -> Optional[_FlacFile]:
+    """Read STREAMINFO and Vorbis comments, seeking past all other blocks."""
+    with open(file_path, 'rb') as f:
+        if f.read(4) != b'fLaC':
+            return None  # e.g. ID3-prefixed FLAC, left to mutagen
+
+        length = None
+        tags = None
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                return None
+            last_block = header[0] & 0x80
+            code = header[0] & 0x7F
+            size = int.from_bytes(header[1:4], 'big')
+
+            if code == FLAC_INVALID:
+                return None
+            if code == FLAC_STREAMINFO:
+                data = f.read(size)
+                if len(data) < 18:
+                    return None
+                sample_rate = (int.from_bytes(data[10:12], 'big') << 4) + (data[12] >> 4)
+                if not sample_rate:
+                    return None
+                total_samples = int.from_bytes(data[13:18], 'big') & 0xFFFFFFFFF
+                if length is None:
+                    length = total_samples / float(sample_rate)
+            elif code == FLAC_VORBIS_COMMENT:
+                if size >= FLAC_MAX_BLOCK_SIZE:
+                    return None
+                block_tags = _parse_vorbis_comment(f.read(size))
+                if block_tags is None:
+                    return None
+                # Like mutagen, the first comment block wins
+                if tags is None:
+                    tags = block_tags
+            else:
+                if size >= FLAC_MAX_BLOCK_SIZE:
+                    return None
+                f.seek(size, os.SEEK_CUR)
+
+            if last_block:
+                break
+
+        if length is None:
+            return None
+        return _FlacFile(tags, _StreamInfo(length))
+
+
+def _header_matches(header: bytes, extension: str) -> bool:
+    """Check that the file's magic bytes match the format its extension claims."""
+    if extension == '.mp3':
+        return header.startswith((b'ID3', b'\xFF\xF2', b'\xFF\xF3', b'\xFF\xFA', b'\xFF\xFB'))
+    if extension == '.m4a':
+        return header[4:8] == b'ftyp'
+    if extension == '.ogg':
+        return header.startswith(b'OggS') and b'\x01vorbis' in header
+    return False
+
+
+def read_track_metadata(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read track metadata through the fast path.
+
+    Args:
+        file_path: Path to the audio file
+
+    Returns:
+        Metadata dictionary, or None if the file should go through full mutagen parsing
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in ('.flac', '.mp3', '.m4a', '.ogg'):
+        return None
+
+    try:
+        file_stat = os.stat(file_path)
+
+        if extension == '.flac':
+            audio = _read_flac(file_path)
+        else:
+            with open(file_path, 'rb') as f:
+                header = f.read(128)
+            if not _header_matches(header, extension):
+                return None
+            if extension == '.mp3':
+                from mutagen.mp3 import EasyMP3
+                audio = EasyMP3(file_path)
+            elif extension == '.m4a':
+                from mutagen.easymp4 import EasyMP4
+                audio = EasyMP4(file_path)
+            else:
+                from mutagen.oggvorbis import OggVorbis
+                audio = OggVorbis(file_path)
+
+        if audio is None:
+            return None
+        return metadata_from_audio(audio, file_path, file_stat.st_size, file_stat.st_mtime)
+
+    except Exception as e:
+        logger.debug(f"Fast tag read failed for {file_path}, using full parser: {e}")
+        return None
@@ -17,6 +17,7 @@ from pathlib import Path
 # Import our modules
 from audio_analyzer import AudioAnalyzer
 from audio_analysis_service import AudioAnalysisService
+from isolated_extractor import IsolatedFeatureExtractor, TIMEOUT_ERROR, MEMORY_ERROR, CRASH_ERROR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,7 +35,9 @@ class IntegratedAudioProcessor:
     """
     
     def __init__(self, db_path: str = None, sample_rate: int = 8000, 
-                 max_duration: int = 60, hop_length: int = 512):
+                 max_duration: int = 60, hop_length: int = 512,
+                 isolate_extraction: bool = False, file_timeout: int = 120,
+                 memory_limit_mb: int = 1024):
         """
         Initialize the IntegratedAudioProcessor.
         
@@ -43,8 +46,18 @@ class IntegratedAudioProcessor:
             sample_rate: Sample rate for audio analysis
             max_duration: Maximum duration to analyze per file
             hop_length: Hop length for analysis
+            isolate_extraction: Run extraction in a killable worker process
+            file_timeout: Wall-clock limit in seconds per file (isolated mode)
+            memory_limit_mb: Memory limit of the extraction process (isolated mode)
         """
         self.analyzer = AudioAnalyzer(sample_rate=sample_rate, max_duration=max_duration, hop_length=hop_length)
+        self.extractor = self.analyzer
+        if isolate_extraction:
+            self.extractor = IsolatedFeatureExtractor(
+                analyzer_kwargs={'sample_rate': sample_rate, 'max_duration': max_duration, 'hop_length': hop_length},
+                timeout=file_timeout,
+                memory_limit_mb=memory_limit_mb
+            )
         self.service = AudioAnalysisService(db_path)
         self.analysis_version = "1.0"
         
@@ -79,11 +92,14 @@ class IntegratedAudioProcessor:
             
             # Extract features
             logger.info(f"Processing track {track_id}: {Path(file_path).name}")
-            features_result = self.analyzer.extract_all_features(file_path)
+            features_result = self.extractor.extract_all_features(file_path)
             
             if not features_result['success']:
                 error_msg = f"Feature extraction failed: {features_result['error_message']}"
-                self.service.update_analysis_status(track_id, 'error', error_msg)
+                # Files that hit the watchdog limits are skipped instead of retried
+                limit_errors = (TIMEOUT_ERROR, MEMORY_ERROR, CRASH_ERROR)
+                status = 'skipped' if features_result['error_message'].startswith(limit_errors) else 'error'
+                self.service.update_analysis_status(track_id, status, error_msg)
                 result['error_message'] = error_msg
                 return result
             
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Isolated Feature Extractor for TuneForge
+
+This module runs AudioAnalyzer feature extraction in a separate worker process
+so that a single pathological file cannot stall the analysis pipeline:
+- Hard wall-clock limit per file
+- Resident memory limit per file, enforced by a watchdog in the parent
+- Worker process is killed and recycled when a limit is exceeded or it crashes
+- Periodic recycling after a fixed number of files to bound memory growth
+
+Workers run `isolated_extractor_worker` as their main module, so starting one
+never re-imports the application that launched it.
+
+The extractor exposes the same `extract_all_features()` interface as
+AudioAnalyzer, so callers can use either one interchangeably.
+"""
+
+import os
+import sys
+import time
+import socket
+import logging
+import subprocess
+from multiprocessing.connection import Connection
+from typing import Dict, Optional, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Error messages used by the batch processor to mark files as skipped
+TIMEOUT_ERROR = "Extraction exceeded time limit"
+MEMORY_ERROR = "Extraction exceeded memory limit"
+CRASH_ERROR = "Extraction worker process crashed"
+
+
+def _process_rss_mb(pid: int) -> Optional[float]:
+    """Return the resident memory of a process in MB, or None if unknown."""
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil  # Optional dependency
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def _wait_process(process: subprocess.Popen, timeout: float = 5):
+    """Reap a worker process, giving up after the timeout."""
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        pass
+
+
+class IsolatedFeatureExtractor:
+    """
+    Runs feature extraction in a dedicated, recyclable worker process.
+
+    Instances are not thread-safe; use one extractor per worker thread.
+    """
+
+    def __init__(self, analyzer_kwargs: Dict[str, Any] = None, timeout: float = 120,
+                 memory_limit_mb: int = 1024, max_files_per_process: int = 200,
+                 startup_timeout: float = 120):
+        """
+        Initialize the IsolatedFeatureExtractor.
+
+        Args:
+            analyzer_kwargs: Keyword arguments for AudioAnalyzer in the worker process
+            timeout: Wall-clock limit in seconds for one file (0 disables)
+            memory_limit_mb: Resident memory limit of the worker process (0 disables)
+            max_files_per_process: Recycle the worker after this many files
+            startup_timeout: Time allowed for the worker to import and initialize
+        """
+        self.analyzer_kwargs = analyzer_kwargs or {}
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_files_per_process = max_files_per_process
+        self.startup_timeout = startup_timeout
+        self.poll_interval = 0.5
+
+        self._process = None
+        self._conn = None
+        self._files_in_process = 0
+
+        # Counters for monitoring
+        self.timeouts = 0
+        self.memory_kills = 0
+        self.crashes = 0
+        self.recycles = 0
+
+    def _start_process(self) -> bool:
+        """Start a fresh worker process and wait until it is ready."""
+        parent_sock, child_sock = socket.socketpair()
+        module_dir = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(p for p in (module_dir, env.get('PYTHONPATH')) if p)
+        try:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'isolated_extractor_worker', str(child_sock.fileno())],
+                pass_fds=(child_sock.fileno(),),
+                env=env
+            )
+        except OSError as e:
+            logger.error(f"Could not launch extraction worker: {e}")
+            parent_sock.close()
+            child_sock.close()
+            return False
+        child_sock.close()
+        parent_conn = Connection(parent_sock.detach())
+
+        message = None
+        try:
+            parent_conn.send(self.analyzer_kwargs)
+            if parent_conn.poll(self.startup_timeout):
+                message = parent_conn.recv()
+        except (EOFError, OSError):
+            message = 'init_failed: worker exited during startup'
+
+        if message is None:
+            logger.error("Extraction worker did not start in time")
+        elif message != 'ready':
+            logger.error(f"Extraction worker failed to initialize: {message}")
+        if message != 'ready':
+            process.kill()
+            _wait_process(process)
+            parent_conn.close()
+            return False
+
+        self._process = process
+        self._conn = parent_conn
+        self._files_in_process = 0
+        logger.info(f"Started extraction worker process {process.pid}")
+        return True
+
+    def _kill_process(self):
+        """Terminate the worker process immediately."""
+        if self._process is not None:
+            try:
+                self._process.kill()
+                _wait_process(self._process)
+            except Exception as e:
+                logger.warning(f"Error killing extraction worker: {e}")
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._process = None
+        self._conn = None
+
+    def _ensure_process(self) -> bool:
+        """Make sure a healthy worker process is available."""
+        if self._process is not None and self._files_in_process >= self.max_files_per_process:
+            logger.info(f"Recycling extraction worker after {self._files_in_process} files")
+            self.recycles += 1
+            self.close()
+        if self._process is None or self._process.poll() is not None:
+            self._kill_process()
+            return self._start_process()
+        return True
+
+    def _failure(self, file_path: str, error_message: str) -> Dict[str, Any]:
+        """Build a failed extraction result."""
+        return {
+            'file_path': file_path,
+            'success': False,
+            'error_message': error_message,
+            'features': {}
+        }
+
+    def extract_all_features(self, file_path: str) -> Dict[str, Any]:
+        """
+        Extract all features from an audio file in the isolated worker.
+
+        Args:
+            file_path: Path to the audio file
+
+        Returns:
+            Same result dictionary as AudioAnalyzer.extract_all_features
+        """
+        if not self._ensure_process():
+            # Not the file's fault, so don't use an error that marks it skipped
+            return self._failure(file_path, "Could not start extraction worker process")
+
+        try:
+            self._conn.send(file_path)
+        except (OSError, BrokenPipeError) as e:
+            self.crashes += 1
+            self._kill_process()
+            return self._failure(file_path, f"{CRASH_ERROR}: {e}")
+
+        self._files_in_process += 1
+        start_time = time.time()
+
+        while True:
+            if self._conn.poll(self.poll_interval):
+                try:
+                    return self._conn.recv()
+                except (EOFError, OSError) as e:
+                    self.crashes += 1
+                    self._kill_process()
+                    return self._failure(file_path, f"{CRASH_ERROR}: {e}")
+
+            elapsed = time.time() - start_time
+
+            if self._process.poll() is not None:
+                exit_code = self._process.returncode
+                self.crashes += 1
+                self._kill_process()
+                logger.warning(f"Extraction worker died (exit code {exit_code}) on {file_path}")
+                return self._failure(file_path, f"{CRASH_ERROR} (exit code {exit_code})")
+
+            if self.timeout and elapsed > self.timeout:
+                self.timeouts += 1
+                self._kill_process()
+                logger.warning(f"Killed extraction worker after {elapsed:.0f}s on {file_path}")
+                return self._failure(file_path, f"{TIMEOUT_ERROR} ({self.timeout}s)")
+
+            if self.memory_limit_mb:
+                rss_mb = _process_rss_mb(self._process.pid)
+                if rss_mb is not None and rss_mb > self.memory_limit_mb:
+                    self.memory_kills += 1
+                    self._kill_process()
+                    logger.warning(f"Killed extraction worker at {rss_mb:.0f} MB on {file_path}")
+                    return self._failure(file_path, f"{MEMORY_ERROR} ({self.memory_limit_mb} MB)")
+
+    def close(self):
+        """Stop the worker process."""
+        if self._process is not None and self._process.poll() is None:
+            try:
+                self._conn.send(None)
+                _wait_process(self._process)
+            except Exception:
+                pass
+        self._kill_process()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get watchdog counters"""
+        return {
+            'timeouts': self.timeouts,
+            'memory_kills': self.memory_kills,
+            'crashes': self.crashes,
+            'recycles': self.recycles,
+            'worker_pid': self._process.pid if self._process is not None else None
+        }
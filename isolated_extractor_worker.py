@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Extraction worker process for TuneForge
+
+Started by IsolatedFeatureExtractor as `python -m isolated_extractor_worker <fd>`.
+Running as its own main module keeps the child from re-importing the parent's
+main module (run.py), which would otherwise build the whole Flask app in every
+extraction process.
+"""
+
+import sys
+from multiprocessing.connection import Connection
+
+
+def main(argv=None) -> int:
+    """Analyze files received over the connection until told to stop."""
+    argv = sys.argv[1:] if argv is None else argv
+    conn = Connection(int(argv[0]))
+
+    try:
+        analyzer_kwargs = conn.recv()
+        from audio_analyzer import AudioAnalyzer
+        analyzer = AudioAnalyzer(**analyzer_kwargs)
+        conn.send('ready')
+    except Exception as e:
+        try:
+            conn.send(f"init_failed: {e}")
+        except OSError:
+            pass
+        return 1
+
+    while True:
+        try:
+            file_path = conn.recv()
+        except (EOFError, OSError):
+            break
+        if file_path is None:
+            break
+
+        try:
+            result = analyzer.extract_all_features(file_path)
+        except Exception as e:
+            result = {
+                'file_path': file_path,
+                'success': False,
+                'error_message': f"Feature extraction failed: {str(e)}",
+                'features': {}
+            }
+        conn.send(result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+"""
+Library Scanner for TuneForge
+
+This module indexes a local music folder into the tracks table:
+- Incremental mode: loads (file_path, last_modified, file_size) once and skips
+  files whose modification time and size are unchanged
+- Tags are only parsed for new or changed files
+- Rows of files that vanished from the scanned folder are deleted or flagged
+- Single-pass os.scandir walk feeding a thread pool for stat calls and tag reads
+- Results written in batches (executemany UPSERT on file_path), one
+  transaction per batch so readers see new tracks during the scan
+- Live progress reporting (with an estimated total while the walk is running)
+- Deterministic (name-sorted) walk order with a checkpoint after every
+  committed batch, so an interrupted scan can resume where it stopped
+- Cooperative cancellation between files
+- Targeted sync of individual paths for the filesystem watcher
+- Normalized title/artist match keys written with each row, and new artists
+  recorded in the artist alias table
+
+Tag parsing is injected as a callable so the scanner stays independent of the
+Flask routes (which own `extract_track_metadata`).
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Any, Callable, Tuple, Iterator, List
+
+from track_matching import normalize_string
+from artist_aliases import RECORD_ALIAS_SQL, alias_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {'.mp3', '.flac', '.m4a', '.ogg', '.wav', '.aac'}
+
+# What to do with rows whose file disappeared from the scanned folder:
+# - delete: remove the row (audio features cascade)
+# - flag (default): set analysis_status = 'missing' until the file comes back;
+#   searches and matches skip flagged rows
+# - keep: leave the row untouched
+MISSING_ACTIONS = ('delete', 'flag', 'keep')
+
+UPSERT_TRACK_SQL = '''
+    INSERT INTO tracks (file_path, title, artist, album, genre,
+                        year, track_number, duration, file_size, last_modified,
+                        title_key, artist_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(file_path) DO UPDATE SET
+        title = excluded.title, artist = excluded.artist, album = excluded.album,
+        genre = excluded.genre, year = excluded.year, track_number = excluded.track_number,
+        duration = excluded.duration, file_size = excluded.file_size,
+        last_modified = excluded.last_modified,
+        title_key = excluded.title_key, artist_key = excluded.artist_key
+'''
+
+RESTORE_FLAGGED_SQL = '''
+    UPDATE tracks SET analysis_status = CASE
+        WHEN EXISTS (SELECT 1 FROM audio_features af WHERE af.track_id = tracks.id) THEN 'analyzed'
+        ELSE 'pending'
+    END
+    WHERE id = ? AND analysis_status = 'missing'
+'''
+
+
+def walk_order_key(folder_path: str, file_path: str) -> Tuple:
+    """
+    Sort key matching the scanner's walk order below a folder.
+
+    Files of a directory come before its subdirectories, both sorted by name,
+    so comparing keys tells whether a file was reached before a checkpoint.
+    """
+    parts = os.path.relpath(file_path, folder_path).split(os.sep)
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+@dataclass
+class ScanStats:
+    """Counters for one library scan"""
+    total_files: int = 0
+    indexed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    errors: int = 0
+    skipped: int = 0
+    committed: int = 0
+    resumed: int = 0
+
+
+class LibraryScanner:
+    """
+    Scans a music folder and keeps the tracks table in sync with it.
+    """
+
+    def __init__(self, db_path: str, metadata_reader: Callable[[str], Optional[Dict[str, Any]]],
+                 incremental: bool = True, missing_action: str = 'flag',
+                 progress: Dict[str, Any] = None, scan_threads: int = 8,
+                 batch_size: int = 500, cancel_event: threading.Event = None,
+                 resume_after: str = None,
+                 on_batch_committed: Callable[[Optional[str]], None] = None):
+        """
+        Initialize the LibraryScanner.
+
+        Args:
+            db_path: Path to the local music database
+            metadata_reader: Callable returning the metadata dict for a file (or None)
+            incremental: Skip files whose mtime and size match the database
+            missing_action: 'delete', 'flag' or 'keep' rows of vanished files
+            progress: Optional dictionary updated with live progress
+            scan_threads: Threads for stat calls and tag reads (I/O-bound)
+            batch_size: Rows written and committed per transaction
+            cancel_event: Stops the scan (after committing finished files) when set
+            resume_after: Checkpoint of an interrupted scan; indexed files up to
+                it in walk order are not read again
+            on_batch_committed: Called with the current checkpoint after each
+                committed batch (every file up to it is in the database) and
+                after removals of vanished files are committed
+        """
+        if missing_action not in MISSING_ACTIONS:
+            logger.warning(f"Unknown missing-file action '{missing_action}', using 'keep'")
+            missing_action = 'keep'
+
+        self.db_path = db_path
+        self.metadata_reader = metadata_reader
+        self.incremental = incremental
+        self.missing_action = missing_action
+        self.progress = progress if progress is not None else {}
+        self.scan_threads = max(1, scan_threads)
+        self.batch_size = max(1, batch_size)
+        self.cancel_event = cancel_event
+        self.resume_after = resume_after
+        self.on_batch_committed = on_batch_committed
+        self.stats = ScanStats()
+
+        # Last file such that it and every file before it in walk order is applied
+        self.checkpoint: Optional[str] = resume_after
+
+        # Walk state used for the progress estimate and missing-file safety
+        self._top_dirs_total = 0
+        self._top_dirs_done = 0
+        self._unreadable_dirs: List[str] = []
+
+        # Buffered writes, flushed every batch_size rows
+        self._batch_rows: List[Tuple] = []
+        self._batch_restore: List[Tuple[int]] = []
+
+    def _update_progress(self, **values):
+        """Copy counters and extra values into the progress dictionary."""
+        self.progress.update(asdict(self.stats))
+        self.progress.update(values)
+
+    def _status_column(self, cursor) -> str:
+        """Return the analysis status column expression for known-file queries."""
+        cursor.execute('PRAGMA table_info(tracks)')
+        has_status = 'analysis_status' in {row[1] for row in cursor.fetchall()}
+        if self.missing_action == 'flag' and not has_status:
+            logger.warning("tracks.analysis_status is missing, vanished files will be kept instead of flagged")
+            self.missing_action = 'keep'
+        return 'analysis_status' if has_status else 'NULL'
+
+    def _load_known_files(self, cursor, folder_path: str) -> Dict[str, Tuple[int, Optional[float], Optional[int], Optional[str]]]:
+        """
+        Load the indexed files below a folder in a single query.
+
+        Returns:
+            Mapping of file_path to (id, last_modified, file_size, analysis_status)
+        """
+        status_column = self._status_column(cursor)
+        prefix = os.path.join(folder_path, '')
+        # Range on the file_path index: every path starting with the prefix
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        cursor.execute(f'''
+            SELECT id, file_path, last_modified, file_size, {status_column}
+            FROM tracks WHERE file_path >= ? AND file_path < ?
+        ''', (prefix, upper))
+        return {row[1]: (row[0], row[2], row[3], row[4]) for row in cursor.fetchall()}
+
+    def _scan_dir(self, path: str):
+        """List one directory, returning (files, subdirectories) as DirEntry lists."""
+        files, subdirs = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        # Like os.walk, symlinked directories are not followed
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry)
+                        elif not entry.is_dir():
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Cannot read directory {path}: {e}")
+            self._unreadable_dirs.append(os.path.join(path, ''))
+        # Sorted so the walk order (and resume checkpoints) is stable across runs
+        files.sort(key=lambda e: e.name)
+        subdirs.sort(key=lambda e: e.name)
+        return files, subdirs
+
+    def _walk_music_files(self, folder_path: str) -> Iterator[os.DirEntry]:
+        """
+        Walk the folder once with os.scandir, yielding supported audio files.
+
+        Top-level directories are counted so the total can be estimated
+        before the walk finishes.
+        """
+        files, top_dirs = self._scan_dir(folder_path)
+        self._top_dirs_total = len(top_dirs)
+        self._top_dirs_done = 0
+
+        for entry in files:
+            if os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield entry
+            else:
+                self.stats.skipped += 1
+
+        for top_dir in top_dirs:
+            stack = [top_dir.path]
+            while stack:
+                files, subdirs = self._scan_dir(stack.pop())
+                for entry in files:
+                    if os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        yield entry
+                    else:
+                        self.stats.skipped += 1
+                # Reverse so directories are visited in listing order
+                stack.extend(d.path for d in reversed(subdirs))
+            self._top_dirs_done += 1
+
+    def _estimate_total(self, discovered: int, known_count: int, walk_complete: bool) -> int:
+        """Estimate the number of music files while the walk is still running."""
+        if walk_complete:
+            return discovered
+        estimate = max(discovered, known_count)
+        if self._top_dirs_done > 0 and self._top_dirs_total > 0:
+            estimate = max(estimate, int(discovered * self._top_dirs_total / self._top_dirs_done))
+        return estimate
+
+    def _inspect_file(self, file_path: str, entry: Optional[Tuple],
+                      dir_entry: os.DirEntry = None) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Stat a file and read its tags if needed (runs in the thread pool).
+
+        Returns:
+            (outcome, metadata, error) where outcome is 'unchanged', 'indexed' or 'error'
+        """
+        try:
+            if entry and self.incremental:
+                st = dir_entry.stat() if dir_entry is not None else os.stat(file_path)
+                if entry[1] == st.st_mtime and entry[2] == st.st_size:
+                    return 'unchanged', None, None
+            metadata = self.metadata_reader(file_path)
+            if metadata:
+                return 'indexed', metadata, None
+            return 'error', None, 'No metadata'
+        except Exception as e:
+            return 'error', None, str(e)
+
+    def _apply_result(self, conn, file_path: str, entry: Optional[Tuple], outcome: str,
+                      metadata: Optional[Dict[str, Any]], error: Optional[str]):
+        """Buffer the outcome of one file for the next batch (main thread only)."""
+        if outcome == 'indexed':
+            self._batch_rows.append((
+                file_path, metadata.get('title'), metadata.get('artist'), metadata.get('album'),
+                metadata.get('genre'), metadata.get('year'), metadata.get('track_number'),
+                metadata.get('duration'), metadata.get('file_size'), metadata.get('last_modified'),
+                normalize_string(metadata.get('title')), normalize_string(metadata.get('artist'))
+            ))
+            self.stats.indexed += 1
+        elif outcome == 'unchanged':
+            self.stats.unchanged += 1
+        else:
+            if error != 'No metadata':
+                logger.error(f"Error indexing {file_path}: {error}")
+            self.stats.errors += 1
+            return
+
+        if entry and entry[3] == 'missing':
+            self._batch_restore.append((entry[0],))
+
+        if len(self._batch_rows) + len(self._batch_restore) >= self.batch_size:
+            self._flush_batch(conn)
+
+    def _flush_batch(self, conn):
+        """Write buffered rows in one transaction and commit."""
+        rows, restore = self._batch_rows, self._batch_restore
+        self._batch_rows, self._batch_restore = [], []
+        if not rows and not restore:
+            return
+
+        aliases = alias_rows((row[11], row[2]) for row in rows)
+        try:
+            with conn:
+                conn.executemany(UPSERT_TRACK_SQL, rows)
+                conn.executemany(RECORD_ALIAS_SQL, aliases)
+                if restore:
+                    conn.executemany(RESTORE_FLAGGED_SQL, restore)
+        except sqlite3.Error as e:
+            # Isolate the offending rows instead of losing the whole batch
+            logger.warning(f"Batch write failed ({e}), retrying {len(rows)} rows individually")
+            for row in rows:
+                try:
+                    with conn:
+                        conn.execute(UPSERT_TRACK_SQL, row)
+                except sqlite3.Error as row_error:
+                    logger.error(f"Error indexing {row[0]}: {row_error}")
+                    self.stats.indexed -= 1
+                    self.stats.errors += 1
+            with conn:
+                conn.executemany(RECORD_ALIAS_SQL, aliases)
+                if restore:
+                    conn.executemany(RESTORE_FLAGGED_SQL, restore)
+
+        self.stats.committed += len(rows)
+        self._update_progress(checkpoint=self.checkpoint)
+        if self.on_batch_committed:
+            self.on_batch_committed(self.checkpoint)
+
+    def _handle_missing(self, cursor, missing_ids):
+        """Delete or flag rows of files that are no longer on disk."""
+        if not missing_ids or self.missing_action == 'keep':
+            return
+        ids = list(missing_ids)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            if self.missing_action == 'delete':
+                cursor.execute(f'DELETE FROM tracks WHERE id IN ({placeholders})', chunk)
+            else:
+                cursor.execute(f"UPDATE tracks SET analysis_status = 'missing' WHERE id IN ({placeholders})", chunk)
+        self.stats.removed += len(ids)
+
+    def scan(self, folder_path: str) -> Dict[str, Any]:
+        """
+        Scan a folder and sync the tracks table.
+
+        Args:
+            folder_path: Music folder to scan
+
+        Returns:
+            Dictionary with 'success' and 'stats' (or 'error'); 'cancelled' is
+            True when the scan was stopped through the cancel event
+        """
+        if not os.path.exists(folder_path):
+            return {'success': False, 'error': 'Folder does not exist'}
+
+        # Short per-batch transactions; wait for other writers instead of failing
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA foreign_keys = ON')
+        cursor = conn.cursor()
+
+        resume_key = None
+        if self.resume_after and self.resume_after.startswith(os.path.join(folder_path, '')):
+            resume_key = walk_order_key(folder_path, self.resume_after)
+        self.checkpoint = self.resume_after if resume_key else None
+
+        try:
+            known = self._load_known_files(cursor, folder_path)
+            seen_ids = set()
+
+            self._update_progress(status='scanning', current_file='Scanning folder...',
+                                  files_processed=0, total_files=len(known), total_estimated=True)
+            logger.info(f"Scanning {folder_path} ({len(known)} already indexed, "
+                        f"incremental={self.incremental}, {self.scan_threads} threads"
+                        f"{', resuming after ' + self.resume_after if resume_key else ''})")
+
+            discovered = 0
+            processed = 0
+            max_in_flight = self.scan_threads * 8
+
+            # Submitted files in walk order; the checkpoint advances over the
+            # leading files whose results have been applied
+            submitted = deque()
+            applied = set()
+
+            def collect(futures):
+                nonlocal processed
+                for future in futures:
+                    file_path, entry, sequence = in_flight.pop(future)
+                    applied.add(sequence)
+                    while submitted and submitted[0][0] in applied:
+                        applied.discard(submitted[0][0])
+                        path = submitted.popleft()[1]
+                        # New files before a resume checkpoint must not move it back
+                        if not resume_key or walk_order_key(folder_path, path) > resume_key:
+                            self.checkpoint = path
+                    result = future.result()
+                    self._apply_result(conn, file_path, entry, *result)
+                    processed += 1
+                    if processed % 100 == 0 or result[0] == 'indexed':
+                        self._update_progress(
+                            files_processed=processed,
+                            total_files=self._estimate_total(discovered, len(known), walk_complete),
+                            current_file=f'Processing {processed}: {os.path.basename(file_path)}'
+                        )
+
+            walk_complete = False
+            cancelled = False
+            in_flight = {}
+            with ThreadPoolExecutor(max_workers=self.scan_threads, thread_name_prefix='scan') as pool:
+                for dir_entry in self._walk_music_files(folder_path):
+                    if self.cancel_event is not None and self.cancel_event.is_set():
+                        cancelled = True
+                        break
+                    discovered += 1
+                    entry = known.get(dir_entry.path)
+                    if entry:
+                        seen_ids.add(entry[0])
+                        if resume_key and walk_order_key(folder_path, dir_entry.path) <= resume_key:
+                            # Committed by the interrupted run
+                            self.stats.resumed += 1
+                            processed += 1
+                            continue
+                    in_flight[pool.submit(self._inspect_file, dir_entry.path, entry, dir_entry)] = \
+                        (dir_entry.path, entry, discovered)
+                    submitted.append((discovered, dir_entry.path))
+                    if len(in_flight) >= max_in_flight:
+                        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                        collect(done)
+
+                walk_complete = not cancelled
+                if walk_complete:
+                    self.stats.total_files = discovered
+                    self._update_progress(total_files=discovered, total_estimated=False)
+                collect(list(in_flight))
+            self._flush_batch(conn)
+
+            if cancelled:
+                # Without a complete walk, unseen rows are not known to be missing
+                conn.commit()
+                self._update_progress(
+                    files_processed=processed,
+                    current_file=f'Cancelled after {processed} music files'
+                )
+                logger.info(f"Scan of {folder_path} cancelled after {processed} files "
+                            f"({self.stats.indexed} indexed)")
+                return {'success': False, 'cancelled': True, 'error': 'Scan cancelled',
+                        'stats': asdict(self.stats)}
+
+            missing_ids = {entry[0] for entry in known.values() if entry[3] != 'missing'} - seen_ids
+            if self._unreadable_dirs:
+                # Files below unreadable directories may still exist
+                missing_ids = {entry[0] for path, entry in known.items()
+                               if entry[0] in missing_ids and not path.startswith(tuple(self._unreadable_dirs))}
+            if missing_ids and processed == 0:
+                # An empty folder usually means an unmounted drive, not a deleted library
+                logger.warning(f"No music files found in {folder_path}; keeping {len(missing_ids)} indexed tracks")
+            else:
+                self._handle_missing(cursor, missing_ids)
+
+            conn.commit()
+            if self.stats.removed and self.on_batch_committed:
+                self.on_batch_committed(self.checkpoint)
+            self._update_progress(
+                files_processed=processed,
+                current_file=f'Completed! Processed {processed} music files'
+            )
+            logger.info(f"Scan completed: {processed} files, {self.stats.indexed} indexed, "
+                        f"{self.stats.unchanged} unchanged, {self.stats.removed} removed, "
+                        f"{self.stats.errors} errors")
+            return {'success': True, 'stats': asdict(self.stats)}
+
+        except Exception as e:
+            logger.error(f"Scan of {folder_path} failed: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            conn.close()
+
+    def sync_paths(self, paths: List[str]) -> Dict[str, Any]:
+        """
+        Sync individual files or directories that changed on disk.
+
+        Existing directories are scanned (incrementally if enabled), existing
+        audio files are re-read, and paths that no longer exist have their rows
+        (including everything below a removed directory) deleted or flagged.
+
+        Args:
+            paths: Changed file or directory paths
+
+        Returns:
+            Dictionary with 'success' and 'stats' (or 'error')
+        """
+        directories = [p for p in paths if os.path.isdir(p)]
+        files = [p for p in paths if p not in directories and os.path.isfile(p)
+                 and os.path.splitext(p)[1].lower() in SUPPORTED_EXTENSIONS]
+        gone = [p for p in paths if not os.path.exists(p)]
+
+        for directory in directories:
+            result = self.scan(directory)
+            if not result.get('success'):
+                logger.warning(f"Sync of {directory} failed: {result.get('error')}")
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA foreign_keys = ON')
+        cursor = conn.cursor()
+        try:
+            status_column = self._status_column(cursor)
+
+            for file_path in files:
+                cursor.execute(f'''
+                    SELECT id, last_modified, file_size, {status_column}
+                    FROM tracks WHERE file_path = ?
+                ''', (file_path,))
+                row = cursor.fetchone()
+                entry = tuple(row) if row else None
+                self._apply_result(conn, file_path, entry, *self._inspect_file(file_path, entry))
+            self._flush_batch(conn)
+
+            missing_ids = set()
+            for path in gone:
+                missing_ids.update(self._load_known_ids(cursor, path))
+            if missing_ids:
+                self._handle_missing(cursor, missing_ids)
+            conn.commit()
+            if missing_ids and self.on_batch_committed:
+                self.on_batch_committed(None)
+            return {'success': True, 'stats': asdict(self.stats)}
+
+        except Exception as e:
+            logger.error(f"Sync of {len(paths)} paths failed: {e}")
+            return {'success': False, 'error': str(e)}
+        finally:
+            conn.close()
+
+    def _load_known_ids(self, cursor, path: str) -> List[int]:
+        """Track ids stored for a path or anywhere below it, excluding flagged rows."""
+        condition = "AND (analysis_status IS NULL OR analysis_status != 'missing')" \
+            if self.missing_action == 'flag' else ''
+        cursor.execute(f'SELECT id FROM tracks WHERE file_path = ? {condition}', (path,))
+        ids = [row[0] for row in cursor.fetchall()]
+        below = self._load_known_files(cursor, path)
+        ids.extend(entry[0] for entry in below.values()
+                   if self.missing_action != 'flag' or entry[3] != 'missing')
+        return ids
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Library Statistics for TuneForge
+
+This module keeps materialized statistics of the tracks table:
+- Totals (tracks, size, duration, distinct artists) in a single-row table
+- Per-genre, per-artist and per-analysis-status track counts
+- Maintained incrementally by triggers, so scanner writes, deletes and
+  analysis status updates keep them current inside the same transaction
+- Built (or rebuilt) with one GROUP BY pass per dimension
+- Rows flagged 'missing' by the scanner (vanished files) are left out of the
+  totals, genre, artist and analysis status counts
+
+Reading the statistics is then a handful of primary-key lookups instead of
+aggregating the whole tracks table on every page load.
+"""
+
+import sqlite3
+import logging
+from typing import Dict, Any
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_STATS_TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS library_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_tracks INTEGER NOT NULL DEFAULT 0,
+        total_size INTEGER NOT NULL DEFAULT 0,
+        total_duration REAL NOT NULL DEFAULT 0,
+        artists INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    'CREATE TABLE IF NOT EXISTS library_genre_counts (genre TEXT PRIMARY KEY, track_count INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS library_artist_counts (artist TEXT PRIMARY KEY, track_count INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS library_status_counts (status TEXT PRIMARY KEY, track_count INTEGER NOT NULL)'
+)
+
+# Statements adding (new.) or removing (old.) one track from the statistics;
+# each only applies to rows that are not flagged missing
+_ADD_TRACK = '''
+    UPDATE library_stats SET total_tracks = total_tracks + 1,
+        total_size = total_size + COALESCE(new.file_size, 0),
+        total_duration = total_duration + COALESCE(new.duration, 0)
+    WHERE id = 1 AND new.analysis_status IS NOT 'missing';
+    INSERT INTO library_genre_counts (genre, track_count) SELECT new.genre, 1
+        WHERE new.genre IS NOT NULL AND new.analysis_status IS NOT 'missing'
+        ON CONFLICT(genre) DO UPDATE SET track_count = track_count + 1;
+    INSERT INTO library_artist_counts (artist, track_count) SELECT new.artist, 1
+        WHERE new.artist IS NOT NULL AND new.analysis_status IS NOT 'missing'
+        ON CONFLICT(artist) DO UPDATE SET track_count = track_count + 1;
+'''
+
+_REMOVE_TRACK = '''
+    UPDATE library_stats SET total_tracks = total_tracks - 1,
+        total_size = total_size - COALESCE(old.file_size, 0),
+        total_duration = total_duration - COALESCE(old.duration, 0)
+    WHERE id = 1 AND old.analysis_status IS NOT 'missing';
+    UPDATE library_genre_counts SET track_count = track_count - 1
+        WHERE genre = old.genre AND old.analysis_status IS NOT 'missing';
+    DELETE FROM library_genre_counts WHERE genre = old.genre AND track_count <= 0;
+    UPDATE library_artist_counts SET track_count = track_count - 1
+        WHERE artist = old.artist AND old.analysis_status IS NOT 'missing';
+    DELETE FROM library_artist_counts WHERE artist = old.artist AND track_count <= 0;
+'''
+
+# Triggers written before flagged rows were excluded lack this in their SQL
+_STATS_TRIGGER_MARKER = "IS NOT 'missing'"
+
+_STATS_TRIGGER_NAMES = ('library_stats_ai', 'library_stats_ad', 'library_stats_au')
+
+_STATS_TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS library_stats_ai AFTER INSERT ON tracks BEGIN {_ADD_TRACK} END',
+    f'CREATE TRIGGER IF NOT EXISTS library_stats_ad AFTER DELETE ON tracks BEGIN {_REMOVE_TRACK} END',
+    # Also fires when a row is flagged missing or restored; analysis progress
+    # updates that leave the missing flag alone are skipped
+    f'''CREATE TRIGGER IF NOT EXISTS library_stats_au
+        AFTER UPDATE OF genre, artist, file_size, duration, analysis_status ON tracks
+        WHEN old.genre IS NOT new.genre OR old.artist IS NOT new.artist
+            OR old.file_size IS NOT new.file_size OR old.duration IS NOT new.duration
+            OR (old.analysis_status IS 'missing') != (new.analysis_status IS 'missing')
+        BEGIN {_REMOVE_TRACK} {_ADD_TRACK} END''',
+    # Distinct artists follow the rows of library_artist_counts
+    '''CREATE TRIGGER IF NOT EXISTS library_artist_counts_ai AFTER INSERT ON library_artist_counts
+        BEGIN UPDATE library_stats SET artists = artists + 1 WHERE id = 1; END''',
+    '''CREATE TRIGGER IF NOT EXISTS library_artist_counts_ad AFTER DELETE ON library_artist_counts
+        BEGIN UPDATE library_stats SET artists = artists - 1 WHERE id = 1; END'''
+)
+
+# analysis_status is added to tracks by AudioAnalysisService, so these are created once it exists
+_STATUS_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS library_status_ai AFTER INSERT ON tracks BEGIN
+        INSERT INTO library_status_counts (status, track_count) VALUES (COALESCE(new.analysis_status, 'pending'), 1)
+            ON CONFLICT(status) DO UPDATE SET track_count = track_count + 1;
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS library_status_ad AFTER DELETE ON tracks BEGIN
+        UPDATE library_status_counts SET track_count = track_count - 1
+            WHERE status = COALESCE(old.analysis_status, 'pending');
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS library_status_au AFTER UPDATE OF analysis_status ON tracks
+        WHEN old.analysis_status IS NOT new.analysis_status BEGIN
+        UPDATE library_status_counts SET track_count = track_count - 1
+            WHERE status = COALESCE(old.analysis_status, 'pending');
+        INSERT INTO library_status_counts (status, track_count) VALUES (COALESCE(new.analysis_status, 'pending'), 1)
+            ON CONFLICT(status) DO UPDATE SET track_count = track_count + 1;
+    END'''
+)
+
+
+def _has_status_column(cursor) -> bool:
+    cursor.execute('PRAGMA table_info(tracks)')
+    return 'analysis_status' in {row[1] for row in cursor.fetchall()}
+
+
+def _trigger_exists(cursor, name: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _stats_triggers_outdated(cursor) -> bool:
+    """Whether the track triggers predate excluding flagged rows."""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'library_stats_au'")
+    row = cursor.fetchone()
+    return row is not None and _STATS_TRIGGER_MARKER not in row[0]
+
+
+def ensure_stats_tables(conn: sqlite3.Connection):
+    """
+    Create the statistics tables and triggers, filling them on first creation.
+
+    Args:
+        conn: Connection to the local music database (tracks table must exist)
+    """
+    cursor = conn.cursor()
+    if not _has_status_column(cursor):
+        # The track triggers read analysis_status to leave flagged rows out
+        cursor.execute("ALTER TABLE tracks ADD COLUMN analysis_status TEXT DEFAULT 'pending'")
+    if _stats_triggers_outdated(cursor):
+        for name in _STATS_TRIGGER_NAMES:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+    created = not _trigger_exists(cursor, 'library_stats_ai')
+    status_created = False
+
+    if created:
+        for statement in _STATS_TABLES + _STATS_TRIGGERS:
+            cursor.execute(statement)
+    if _has_status_column(cursor) and not _trigger_exists(cursor, 'library_status_au'):
+        for statement in _STATUS_TRIGGERS:
+            cursor.execute(statement)
+        status_created = True
+
+    if created:
+        rebuild_library_stats(conn)
+        logger.info("Created materialized library statistics")
+    elif status_created:
+        _rebuild_status_counts(cursor)
+        conn.commit()
+
+
+def _rebuild_status_counts(cursor):
+    cursor.execute('DELETE FROM library_status_counts')
+    if _has_status_column(cursor):
+        cursor.execute('''
+            INSERT INTO library_status_counts (status, track_count)
+            SELECT COALESCE(analysis_status, 'pending'), COUNT(*) FROM tracks
+            GROUP BY COALESCE(analysis_status, 'pending')
+        ''')
+
+
+def rebuild_library_stats(conn: sqlite3.Connection):
+    """Recompute all statistics from the tracks table (one GROUP BY pass per dimension)."""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM library_genre_counts')
+    cursor.execute('''
+        INSERT INTO library_genre_counts (genre, track_count)
+        SELECT genre, COUNT(*) FROM tracks
+        WHERE genre IS NOT NULL AND analysis_status IS NOT 'missing' GROUP BY genre
+    ''')
+    # Triggers on library_artist_counts would count artists one by one
+    cursor.execute('DELETE FROM library_stats')
+    cursor.execute('DELETE FROM library_artist_counts')
+    cursor.execute('''
+        INSERT INTO library_artist_counts (artist, track_count)
+        SELECT artist, COUNT(*) FROM tracks
+        WHERE artist IS NOT NULL AND analysis_status IS NOT 'missing' GROUP BY artist
+    ''')
+    cursor.execute('''
+        INSERT INTO library_stats (id, total_tracks, total_size, total_duration, artists)
+        SELECT 1, COUNT(*), COALESCE(SUM(file_size), 0), COALESCE(SUM(duration), 0),
+               (SELECT COUNT(*) FROM library_artist_counts)
+        FROM tracks WHERE analysis_status IS NOT 'missing'
+    ''')
+    _rebuild_status_counts(cursor)
+    conn.commit()
+
+
+def read_library_stats(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Read the materialized statistics.
+
+    Returns:
+        Dictionary with total_tracks, total_size, total_duration, artists,
+        genres, genre_counts and analysis_status_counts
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT total_tracks, total_size, total_duration, artists FROM library_stats WHERE id = 1')
+    row = cursor.fetchone() or (0, 0, 0, 0)
+
+    cursor.execute('SELECT genre, track_count FROM library_genre_counts ORDER BY genre')
+    genre_counts = dict(cursor.fetchall())
+
+    cursor.execute("SELECT status, track_count FROM library_status_counts WHERE track_count > 0 AND status != 'missing'")
+    status_counts = dict(cursor.fetchall())
+
+    return {
+        'total_tracks': row[0],
+        'total_size': row[1],
+        'total_duration': row[2],
+        'artists': row[3],
+        'genres': list(genre_counts),
+        'genre_counts': genre_counts,
+        'analysis_status_counts': status_counts
+    }
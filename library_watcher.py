@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Library Watcher for TuneForge
+
+This module keeps the tracks table in sync with the music folder continuously:
+- inotify/FSEvents notifications through watchdog when it is installed
+- Polling fallback (periodic incremental scan) when watchdog is missing or the
+  platform watch limit is exhausted
+- Debounces create/modify/move/delete events until a path has been quiet
+- Applies changes incrementally through LibraryScanner.sync_paths
+- Reports newly indexed tracks so they can be queued for audio analysis
+- Holds changes back while a manual scan of the same folder is running
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Callable
+
+from library_scanner import LibraryScanner, SUPPORTED_EXTENSIONS
+
+try:
+    from watchdog.observers import Observer  # Optional dependency
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _LibraryEventHandler(FileSystemEventHandler):
+    """Forwards watchdog events to the watcher's pending set"""
+
+    def __init__(self, watcher: 'LibraryWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed_no_write'):
+            return
+        # Files inside a directory report their own events
+        if event.is_directory and event.event_type == 'modified':
+            return
+        self.watcher.notify(event.src_path, event.is_directory)
+        dest_path = getattr(event, 'dest_path', None)
+        if dest_path:
+            self.watcher.notify(dest_path, event.is_directory)
+
+
+class LibraryWatcher:
+    """
+    Watches a music folder and applies changes to the tracks table.
+    """
+
+    def __init__(self, root: str, db_path: str, metadata_reader: Callable[[str], Optional[Dict[str, Any]]],
+                 missing_action: str = 'flag', debounce_seconds: float = 2.0,
+                 poll_interval: int = 300, force_polling: bool = False,
+                 on_tracks_added: Callable[[List[Dict[str, Any]]], None] = None,
+                 is_scan_active: Callable[[str], bool] = None,
+                 on_tracks_changed: Callable[[], None] = None):
+        """
+        Initialize the LibraryWatcher.
+
+        Args:
+            root: Music folder to watch
+            db_path: Path to the local music database
+            metadata_reader: Callable returning the metadata dict for a file (or None)
+            missing_action: 'delete', 'flag' or 'keep' rows of removed files
+            debounce_seconds: Quiet time before a changed path is processed
+            poll_interval: Seconds between incremental scans in polling mode
+            force_polling: Use polling even when watchdog is available
+            on_tracks_added: Called with [{'id', 'file_path', 'analysis_status'}]
+                for tracks indexed from events and still pending analysis
+            is_scan_active: Returns True while another scan covers a path; changes
+                are then kept pending until it finishes
+            on_tracks_changed: Called after every sync that wrote to the tracks table
+        """
+        self.root = root
+        self.db_path = db_path
+        self.metadata_reader = metadata_reader
+        self.missing_action = missing_action
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self.on_tracks_added = on_tracks_added
+        self.is_scan_active = is_scan_active
+        self.on_tracks_changed = on_tracks_changed
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, float] = {}
+        self._stop_event = threading.Event()
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+        self.mode: Optional[str] = None
+
+        # Statistics
+        self.events_received = 0
+        self.paths_synced = 0
+        self.tracks_indexed = 0
+        self.tracks_removed = 0
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def _create_scanner(self, incremental: bool = True) -> LibraryScanner:
+        """Create a scanner for applying changes."""
+        return LibraryScanner(
+            db_path=self.db_path,
+            metadata_reader=self.metadata_reader,
+            incremental=incremental,
+            missing_action=self.missing_action,
+            scan_threads=2
+        )
+
+    def start(self) -> bool:
+        """
+        Start watching the library folder.
+
+        Returns:
+            True if the watcher started
+        """
+        if self.is_running():
+            return False
+        if not os.path.isdir(self.root):
+            logger.error(f"Cannot watch {self.root}: folder does not exist")
+            return False
+
+        self._stop_event.clear()
+        self.mode = 'polling'
+        if WATCHDOG_AVAILABLE and not self.force_polling:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_LibraryEventHandler(self), self.root, recursive=True)
+                self._observer.start()
+                self.mode = 'events'
+            except OSError as e:
+                # Typically the inotify watch limit on very large libraries
+                logger.warning(f"Filesystem notifications unavailable ({e}), falling back to polling")
+                self._observer = None
+
+        target = self._event_loop if self.mode == 'events' else self._poll_loop
+        self._thread = threading.Thread(target=target, name='library-watcher', daemon=True)
+        self._thread.start()
+        logger.info(f"Watching {self.root} ({self.mode} mode)")
+        return True
+
+    def stop(self):
+        """Stop watching."""
+        self._stop_event.set()
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=5)
+            except Exception as e:
+                logger.warning(f"Error stopping filesystem observer: {e}")
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        logger.info(f"Stopped watching {self.root}")
+
+    def is_running(self) -> bool:
+        """Check whether the watcher thread is active."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def notify(self, path: str, is_directory: bool = False):
+        """
+        Record a changed path; it is processed once it has been quiet.
+
+        Args:
+            path: Changed file or directory
+            is_directory: Whether the path is (or was) a directory
+        """
+        if not is_directory and os.path.splitext(path)[1].lower() not in SUPPORTED_EXTENSIONS:
+            return
+        with self._lock:
+            self._pending[path] = time.time()
+            self.events_received += 1
+
+    def _take_settled_paths(self) -> List[str]:
+        """Remove and return paths that have been quiet for the debounce period."""
+        cutoff = time.time() - self.debounce_seconds
+        with self._lock:
+            settled = [path for path, ts in self._pending.items() if ts <= cutoff]
+            for path in settled:
+                del self._pending[path]
+
+        # A directory sync covers everything below it
+        directories = sorted(p for p in settled if os.path.isdir(p))
+        return [p for p in settled
+                if not any(p != d and p.startswith(os.path.join(d, '')) for d in directories)]
+
+    def _event_loop(self):
+        """Process debounced filesystem events."""
+        while not self._stop_event.wait(0.5):
+            paths = self._take_settled_paths()
+            if paths:
+                self._sync(paths)
+
+    def _poll_loop(self):
+        """Run an incremental scan every poll interval."""
+        while not self._stop_event.wait(self.poll_interval):
+            self._sync([self.root])
+
+    def _sync(self, paths: List[str]):
+        """Apply changed paths to the database and report new tracks."""
+        try:
+            if self.is_scan_active and self.is_scan_active(self.root):
+                # The running scan picks up most changes; retry the rest afterwards
+                if paths != [self.root]:
+                    with self._lock:
+                        now = time.time()
+                        for path in paths:
+                            self._pending.setdefault(path, now)
+                return
+
+            scanner = self._create_scanner()
+            if paths == [self.root]:
+                result = scanner.scan(self.root)
+            else:
+                result = scanner.sync_paths(paths)
+            if not result.get('success'):
+                self.last_error = result.get('error')
+                return
+
+            stats = result['stats']
+            self.paths_synced += len(paths)
+            self.tracks_indexed += stats['indexed']
+            self.tracks_removed += stats['removed']
+            self.last_sync = time.time()
+            self.last_error = None
+            if stats['indexed'] or stats['removed']:
+                logger.info(f"Library watcher: {stats['indexed']} indexed, {stats['removed']} removed "
+                            f"from {len(paths)} changed paths")
+                if self.on_tracks_changed:
+                    self.on_tracks_changed()
+
+            if stats['indexed'] and self.on_tracks_added:
+                tracks = self._pending_tracks(paths)
+                if tracks:
+                    self.on_tracks_added(tracks)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Library watcher sync failed: {e}")
+
+    def _pending_tracks(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """Tracks at or below the given paths that still need analysis."""
+        tracks = []
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('PRAGMA table_info(tracks)')
+            if 'analysis_status' not in {row[1] for row in cursor.fetchall()}:
+                return []
+            for path in paths:
+                prefix = os.path.join(path, '')
+                upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                cursor.execute('''
+                    SELECT id, file_path, analysis_status FROM tracks
+                    WHERE analysis_status = 'pending'
+                    AND (file_path = ? OR (file_path >= ? AND file_path < ?))
+                ''', (path, prefix, upper))
+                tracks.extend({'id': row[0], 'file_path': row[1], 'analysis_status': row[2]}
+                              for row in cursor.fetchall())
+        finally:
+            conn.close()
+        return tracks
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get watcher state and counters"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            'running': self.is_running(),
+            'root': self.root,
+            'mode': self.mode,
+            'watchdog_available': WATCHDOG_AVAILABLE,
+            'pending_paths': pending,
+            'events_received': self.events_received,
+            'paths_synced': self.paths_synced,
+            'tracks_indexed': self.tracks_indexed,
+            'tracks_removed': self.tracks_removed,
+            'last_sync': self.last_sync,
+            'last_error': self.last_error
+        }
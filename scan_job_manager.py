@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Scan Job Manager for TuneForge
+
+This module runs library scans as background jobs:
+- Job state (progress, checkpoint, result) persisted in the scan_jobs table
+- Cancellation, also for jobs started by another process on the same database
+- At most one active scan per music folder (nested folders count as the same root)
+- Jobs interrupted by a restart resume after their last committed batch
+- Bounded history of finished jobs
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Callable
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('starting', 'scanning')
+FINISHED_STATUSES = ('completed', 'error', 'cancelled', 'interrupted')
+
+# Seconds between checks for cancel requests made by other processes
+CANCEL_POLL_INTERVAL = 2.0
+
+
+def _process_start_token(pid: int) -> Optional[str]:
+    """
+    Identify one run of a process: boot id plus start time.
+
+    Unlike the PID alone, this changes when a restarted container hands the
+    same PID to another process. Returns None if it cannot be determined.
+    """
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            # Field 22 (starttime); the command name in field 2 may contain spaces
+            start_time = f.read().rsplit(')', 1)[1].split()[19]
+        with open('/proc/sys/kernel/random/boot_id', 'r') as f:
+            boot_id = f.read().strip()
+        return f"{boot_id}:{start_time}"
+    except (OSError, IndexError):
+        pass
+    try:
+        import psutil  # Optional dependency
+        return f"psutil:{psutil.Process(pid).create_time():.3f}"
+    except Exception:
+        return None
+
+
+def _process_alive(pid: Optional[int], start_token: Optional[str] = None) -> bool:
+    """
+    Check whether the process owning a job is still running.
+
+    With a start token the process must also be the same run that created
+    the token, so a reused PID does not keep a job alive.
+    """
+    if not pid:
+        return False
+    if start_token:
+        current = _process_start_token(pid)
+        if current is not None:
+            return current == start_token
+    if pid == os.getpid():
+        return True
+    try:
+        import psutil  # Optional dependency
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+
+
+class ScanJobManager:
+    """
+    Starts, tracks, cancels and resumes library scan jobs.
+    """
+
+    def __init__(self, db_path: str, scanner_factory: Callable[..., Any], history_limit: int = 50):
+        """
+        Initialize the ScanJobManager.
+
+        Args:
+            db_path: Path to the local music database (holds the scan_jobs table)
+            scanner_factory: Callable accepting LibraryScanner keyword arguments
+                (incremental, progress, cancel_event, resume_after,
+                on_batch_committed) and returning a scanner
+            history_limit: Finished jobs kept in the database
+        """
+        self.db_path = db_path
+        self.scanner_factory = scanner_factory
+        self.history_limit = max(1, history_limit)
+
+        self._lock = threading.Lock()
+        # Jobs running in this process: scan_id -> {'root', 'progress', 'cancel_event', 'thread'}
+        self._active: Dict[str, Dict[str, Any]] = {}
+
+        self._ensure_table()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _ensure_table(self):
+        """Create the scan_jobs table if needed."""
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS scan_jobs (
+                    id TEXT PRIMARY KEY,
+                    root TEXT NOT NULL,
+                    incremental INTEGER NOT NULL DEFAULT 1,
+                    status TEXT NOT NULL,
+                    owner_pid INTEGER,
+                    owner_token TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    checkpoint TEXT,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL,
+                    updated_at REAL,
+                    finished_at REAL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs(status)')
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(scan_jobs)')}
+            if 'owner_token' not in columns:
+                conn.execute('ALTER TABLE scan_jobs ADD COLUMN owner_token TEXT')
+
+    @staticmethod
+    def _same_root(a: str, b: str) -> bool:
+        """Whether two folders are equal or one contains the other."""
+        a = os.path.join(os.path.realpath(a), '')
+        b = os.path.join(os.path.realpath(b), '')
+        return a.startswith(b) or b.startswith(a)
+
+    def _find_active_job(self, root: str) -> Optional[str]:
+        """Return the id of an active job scanning the same root, in any process."""
+        for scan_id, job in self._active.items():
+            if self._same_root(job['root'], root):
+                return scan_id
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, root, owner_pid, owner_token FROM scan_jobs "
+                f"WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES
+            ).fetchall()
+        for scan_id, job_root, owner_pid, owner_token in rows:
+            if scan_id not in self._active and owner_pid != os.getpid() \
+                    and _process_alive(owner_pid, owner_token) and self._same_root(job_root, root):
+                return scan_id
+        return None
+
+    def has_active_scan(self, path: str) -> bool:
+        """Check whether a scan covering or below a path is running."""
+        with self._lock:
+            return self._find_active_job(path) is not None
+
+    def start_scan(self, root: str, incremental: bool = True) -> Dict[str, Any]:
+        """
+        Start a background scan of a music folder.
+
+        Args:
+            root: Music folder to scan
+            incremental: Skip files whose mtime and size are unchanged
+
+        Returns:
+            Dictionary with 'success' and 'scan_id' (or 'error'; 'scan_id' then
+            names the scan already running for this folder)
+        """
+        if not os.path.isdir(root):
+            return {'success': False, 'error': 'Folder does not exist'}
+
+        with self._lock:
+            running = self._find_active_job(root)
+            if running:
+                return {'success': False, 'scan_id': running,
+                        'error': f'A scan of this folder is already running ({running})'}
+
+            scan_id = f"scan_{int(time.time())}_{uuid.uuid4().hex[:6]}"
+            now = time.time()
+            progress = self._new_progress(scan_id, root, incremental, now)
+            with self._connect() as conn:
+                conn.execute('''
+                    INSERT INTO scan_jobs (id, root, incremental, status, owner_pid, owner_token, progress,
+                                           created_at, updated_at)
+                    VALUES (?, ?, ?, 'starting', ?, ?, ?, ?, ?)
+                ''', (scan_id, root, int(incremental), os.getpid(), _process_start_token(os.getpid()),
+                      json.dumps(progress), now, now))
+            self._launch(scan_id, root, incremental, progress, resume_after=None)
+
+        logger.info(f"Started scan {scan_id} of {root} (incremental={incremental})")
+        return {'success': True, 'scan_id': scan_id}
+
+    @staticmethod
+    def _new_progress(scan_id: str, root: str, incremental: bool, start_time: float) -> Dict[str, Any]:
+        return {
+            'scan_id': scan_id,
+            'folder_path': root,
+            'incremental': incremental,
+            'status': 'starting',
+            'current_file': '',
+            'files_processed': 0,
+            'total_files': 0,
+            'indexed': 0,
+            'errors': 0,
+            'skipped': 0,
+            'unchanged': 0,
+            'removed': 0,
+            'resumed': 0,
+            'checkpoint': None,
+            'start_time': start_time
+        }
+
+    def _launch(self, scan_id: str, root: str, incremental: bool, progress: Dict[str, Any],
+                resume_after: Optional[str]):
+        """Start the scan thread (caller holds the lock)."""
+        cancel_event = threading.Event()
+        thread = threading.Thread(
+            target=self._run, args=(scan_id, root, incremental, progress, cancel_event, resume_after),
+            name=f'scan-job-{scan_id}', daemon=True
+        )
+        self._active[scan_id] = {'root': root, 'progress': progress,
+                                 'cancel_event': cancel_event, 'thread': thread}
+        thread.start()
+
+    def _run(self, scan_id: str, root: str, incremental: bool, progress: Dict[str, Any],
+             cancel_event: threading.Event, resume_after: Optional[str]):
+        """Run one scan job and record its outcome."""
+        # Batches can take minutes on slow mounts; don't wait for a commit to see a cancel
+        finished = threading.Event()
+        threading.Thread(target=self._watch_cancel, args=(scan_id, cancel_event, finished),
+                         name=f'scan-cancel-{scan_id}', daemon=True).start()
+        try:
+            scanner = self.scanner_factory(
+                incremental=incremental,
+                progress=progress,
+                cancel_event=cancel_event,
+                resume_after=resume_after,
+                on_batch_committed=lambda checkpoint: self._save_checkpoint(scan_id, checkpoint,
+                                                                            progress, cancel_event)
+            )
+            result = scanner.scan(root)
+        except Exception as e:
+            logger.error(f"Scan {scan_id} failed: {e}")
+            result = {'success': False, 'error': str(e)}
+        finally:
+            finished.set()
+
+        if result.get('cancelled'):
+            status = 'cancelled'
+        elif result.get('success'):
+            status = 'completed'
+        else:
+            status = 'error'
+        progress['status'] = status
+
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.execute('''
+                    UPDATE scan_jobs SET status = ?, progress = ?, result = ?, error = ?,
+                        updated_at = ?, finished_at = ?
+                    WHERE id = ?
+                ''', (status, json.dumps(progress), json.dumps(result),
+                      None if status == 'completed' else result.get('error'), now, now, scan_id))
+                self._prune_history(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Could not record outcome of scan {scan_id}: {e}")
+        finally:
+            with self._lock:
+                self._active.pop(scan_id, None)
+        logger.info(f"Scan {scan_id} {status}")
+
+    def _save_checkpoint(self, scan_id: str, checkpoint: Optional[str], progress: Dict[str, Any],
+                         cancel_event: threading.Event):
+        """Persist progress after a committed batch and pick up cancel requests from other processes."""
+        try:
+            with self._connect() as conn:
+                conn.execute('''
+                    UPDATE scan_jobs SET status = 'scanning', checkpoint = ?, progress = ?, updated_at = ?
+                    WHERE id = ?
+                ''', (checkpoint, json.dumps(progress), time.time(), scan_id))
+                if self._cancel_requested(conn, scan_id):
+                    cancel_event.set()
+        except sqlite3.Error as e:
+            # A missed checkpoint only means more work on resume
+            logger.warning(f"Could not save checkpoint of scan {scan_id}: {e}")
+
+    def _cancel_requested(self, conn: sqlite3.Connection, scan_id: str) -> bool:
+        row = conn.execute('SELECT cancel_requested FROM scan_jobs WHERE id = ?', (scan_id,)).fetchone()
+        return bool(row and row[0])
+
+    def _watch_cancel(self, scan_id: str, cancel_event: threading.Event, finished: threading.Event):
+        """Poll the database for cancel requests from other processes until the scan ends."""
+        while not finished.wait(CANCEL_POLL_INTERVAL):
+            if cancel_event.is_set():
+                return
+            try:
+                with self._connect() as conn:
+                    requested = self._cancel_requested(conn, scan_id)
+            except sqlite3.Error as e:
+                logger.debug(f"Could not check cancel flag of scan {scan_id}: {e}")
+                continue
+            if requested:
+                logger.info(f"Scan {scan_id} cancelled by another process")
+                cancel_event.set()
+                return
+
+    def _prune_history(self, conn: sqlite3.Connection):
+        """Keep only the most recent finished jobs."""
+        placeholders = ','.join('?' * len(FINISHED_STATUSES))
+        conn.execute(f'''
+            DELETE FROM scan_jobs WHERE status IN ({placeholders}) AND id NOT IN (
+                SELECT id FROM scan_jobs WHERE status IN ({placeholders})
+                ORDER BY created_at DESC LIMIT ?
+            )
+        ''', FINISHED_STATUSES + FINISHED_STATUSES + (self.history_limit,))
+
+    def cancel_scan(self, scan_id: str) -> Dict[str, Any]:
+        """
+        Request cancellation of a running scan.
+
+        Files already read are committed; rows of files the scan did not reach
+        are left untouched.
+
+        Returns:
+            Dictionary with 'success' (or 'error')
+        """
+        with self._lock:
+            job = self._active.get(scan_id)
+            if job:
+                job['cancel_event'].set()
+                job['progress']['current_file'] = 'Cancelling...'
+
+        with self._connect() as conn:
+            row = conn.execute('SELECT status FROM scan_jobs WHERE id = ?', (scan_id,)).fetchone()
+            if not row:
+                return {'success': False, 'error': 'Scan ID not found'}
+            if row[0] == 'interrupted':
+                conn.execute("UPDATE scan_jobs SET status = 'cancelled', finished_at = ? WHERE id = ?",
+                             (time.time(), scan_id))
+                return {'success': True, 'message': 'Interrupted scan discarded'}
+            if row[0] not in ACTIVE_STATUSES:
+                return {'success': False, 'error': f'Scan is already {row[0]}'}
+            # Seen by the owning process within CANCEL_POLL_INTERVAL seconds
+            conn.execute('UPDATE scan_jobs SET cancel_requested = 1 WHERE id = ?', (scan_id,))
+
+        return {'success': True, 'message': 'Cancellation requested'}
+
+    def get_job(self, scan_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the state of a scan job.
+
+        Returns:
+            Progress dictionary (with 'result'/'error' for finished jobs), or None
+        """
+        with self._lock:
+            job = self._active.get(scan_id)
+            if job:
+                return dict(job['progress'])
+
+        with self._connect() as conn:
+            row = conn.execute('''
+                SELECT id, root, incremental, status, progress, result, error,
+                       created_at, updated_at, finished_at
+                FROM scan_jobs WHERE id = ?
+            ''', (scan_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """List recent scan jobs, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute('''
+                SELECT id, root, incremental, status, progress, result, error,
+                       created_at, updated_at, finished_at
+                FROM scan_jobs ORDER BY created_at DESC LIMIT ?
+            ''', (limit,)).fetchall()
+
+        jobs = []
+        for row in rows:
+            job = self._row_to_job(row)
+            with self._lock:
+                active = self._active.get(row[0])
+                if active:
+                    job.update(active['progress'])
+            job.pop('result', None)
+            jobs.append(job)
+        return jobs
+
+    @staticmethod
+    def _row_to_job(row) -> Dict[str, Any]:
+        scan_id, root, incremental, status, progress, result, error, created_at, updated_at, finished_at = row
+        job = json.loads(progress) if progress else {}
+        job.update({
+            'scan_id': scan_id,
+            'folder_path': root,
+            'incremental': bool(incremental),
+            'status': status,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'finished_at': finished_at
+        })
+        if result:
+            job['result'] = json.loads(result)
+        if error:
+            job['error'] = error
+        return job
+
+    def recover_interrupted(self, auto_resume: bool = True) -> List[str]:
+        """
+        Handle jobs left active by a process that is no longer running.
+
+        Args:
+            auto_resume: Resume them after their checkpoint; otherwise mark
+                them 'interrupted' (resumable through resume_scan)
+
+        Returns:
+            Ids of the resumed jobs
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, owner_pid, owner_token FROM scan_jobs "
+                f"WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                ACTIVE_STATUSES
+            ).fetchall()
+
+        resumed = []
+        for scan_id, owner_pid, owner_token in rows:
+            # A PID reused after a restart does not count: the start token differs
+            if scan_id in self._active or _process_alive(owner_pid, owner_token):
+                continue
+            with self._connect() as conn:
+                conn.execute(
+                    f"UPDATE scan_jobs SET status = 'interrupted', updated_at = ? "
+                    f"WHERE id = ? AND status IN ({','.join('?' * len(ACTIVE_STATUSES))})",
+                    (time.time(), scan_id) + ACTIVE_STATUSES
+                )
+            logger.warning(f"Scan {scan_id} was interrupted")
+            if auto_resume and self.resume_scan(scan_id).get('success'):
+                resumed.append(scan_id)
+        return resumed
+
+    def resume_scan(self, scan_id: str) -> Dict[str, Any]:
+        """
+        Resume an interrupted scan after its last committed batch.
+
+        Returns:
+            Dictionary with 'success' and 'scan_id' (or 'error')
+        """
+        with self._lock:
+            with self._connect() as conn:
+                row = conn.execute('''
+                    SELECT root, incremental, status, checkpoint, created_at
+                    FROM scan_jobs WHERE id = ?
+                ''', (scan_id,)).fetchone()
+            if not row:
+                return {'success': False, 'error': 'Scan ID not found'}
+            root, incremental, status, checkpoint, created_at = row
+            if status != 'interrupted':
+                return {'success': False, 'error': f'Scan is {status}, not interrupted'}
+            if not os.path.isdir(root):
+                return {'success': False, 'error': 'Folder does not exist'}
+            running = self._find_active_job(root)
+            if running:
+                return {'success': False, 'scan_id': running,
+                        'error': f'A scan of this folder is already running ({running})'}
+
+            with self._connect() as conn:
+                # Claim the job; another process may be resuming it at the same time
+                claimed = conn.execute('''
+                    UPDATE scan_jobs SET status = 'starting', owner_pid = ?, owner_token = ?,
+                                         cancel_requested = 0, updated_at = ?
+                    WHERE id = ? AND status = 'interrupted'
+                ''', (os.getpid(), _process_start_token(os.getpid()), time.time(), scan_id)).rowcount
+            if not claimed:
+                return {'success': False, 'error': 'Scan was resumed elsewhere'}
+
+            progress = self._new_progress(scan_id, root, bool(incremental), created_at)
+            progress['checkpoint'] = checkpoint
+            self._launch(scan_id, root, bool(incremental), progress, resume_after=checkpoint)
+
+        logger.info(f"Resuming scan {scan_id} of {root} after {checkpoint or 'the beginning'}")
+        return {'success': True, 'scan_id': scan_id}
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Suggestion Resolution Cache for TuneForge
+
+This module remembers how LLM-suggested tracks resolved against the local
+library, shared by Ask-a-Friend and Sonic Traveller:
+- Keyed by the suggested (title, artist) ignoring case and surrounding
+  spaces, so "Wonderwall - Oasis" and "wonderwall - OASIS" share one entry;
+  the match itself depends on the rest of the spelling (e.g. "(Remastered)")
+- Entries are kept per rule set: callers with different acceptance rules
+  (e.g. Sonic Traveller accepting live and remastered versions) never see
+  each other's results
+- Stores the matched track, or a negative result (no acceptable match)
+- Repeat suggestions are answered from memory with no database work
+- Persisted in the suggestion_resolutions table and loaded on first use, so
+  resolutions survive restarts
+- Invalidated whenever the library changes: invalidate() is called after
+  scan batches and watcher syncs, and triggers on tracks clear the table for
+  changes made outside this process
+- Negative results expire after a TTL, positives live until invalidated
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_TABLE = 'suggestion_resolutions'
+
+_CLEAR_ON_CHANGE = f'''
+    BEGIN DELETE FROM {CACHE_TABLE}; END
+'''
+
+_CACHE_SCHEMA = (
+    f'''
+    CREATE TABLE IF NOT EXISTS {CACHE_TABLE} (
+        rules TEXT NOT NULL,
+        title_key TEXT NOT NULL,
+        artist_key TEXT NOT NULL,
+        track_id INTEGER,
+        title TEXT,
+        artist TEXT,
+        album TEXT,
+        resolved_at REAL NOT NULL,
+        PRIMARY KEY (rules, title_key, artist_key)
+    ) WITHOUT ROWID
+    ''',
+    f'''CREATE TRIGGER IF NOT EXISTS {CACHE_TABLE}_tracks_ai AFTER INSERT ON tracks
+        WHEN EXISTS (SELECT 1 FROM {CACHE_TABLE}) {_CLEAR_ON_CHANGE}''',
+    f'''CREATE TRIGGER IF NOT EXISTS {CACHE_TABLE}_tracks_ad AFTER DELETE ON tracks
+        WHEN EXISTS (SELECT 1 FROM {CACHE_TABLE}) {_CLEAR_ON_CHANGE}''',
+    f'''CREATE TRIGGER IF NOT EXISTS {CACHE_TABLE}_tracks_au AFTER UPDATE OF title, artist, album ON tracks
+        WHEN EXISTS (SELECT 1 FROM {CACHE_TABLE}) {_CLEAR_ON_CHANGE}'''
+)
+
+
+def suggestion_key(title: str, artist: str) -> Tuple[str, str]:
+    """Cache key of a suggested track"""
+    return (title or '').strip().lower(), (artist or '').strip().lower()
+
+
+class SuggestionCache:
+    """
+    In-memory suggestion resolution cache backed by a SQLite table.
+    """
+
+    def __init__(self, db_path: str, negative_ttl: float = 3600.0):
+        """
+        Initialize the SuggestionCache.
+
+        Args:
+            db_path: Path to the local music database
+            negative_ttl: Seconds a "no local match" result is trusted
+        """
+        self.db_path = db_path
+        self.negative_ttl = negative_ttl
+
+        self._lock = threading.Lock()
+        # (rules, title_key, artist_key) -> (track or None, resolved_at)
+        self._entries: Dict[Tuple[str, str, str], Tuple[Optional[Dict[str, Any]], float]] = {}
+        self._loaded = False
+        self._generation = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        """Changes on every invalidation; pass it back to put_many"""
+        return self._generation
+
+    def _load(self):
+        """Create the table and load stored resolutions (caller holds the lock)."""
+        self._loaded = True
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                columns = [r[1] for r in conn.execute(f'PRAGMA table_info({CACHE_TABLE})')]
+                if columns and 'rules' not in columns:
+                    # Entries of the old normalized-key layout; it is only a cache
+                    conn.execute(f'DROP TABLE {CACHE_TABLE}')
+                for statement in _CACHE_SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+                rows = conn.execute(f'''
+                    SELECT rules, title_key, artist_key, track_id, title, artist, album, resolved_at
+                    FROM {CACHE_TABLE} WHERE track_id IS NOT NULL OR resolved_at > ?
+                ''', (time.time() - self.negative_ttl,)).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load suggestion resolutions: {e}")
+            return
+
+        for rules, title_key, artist_key, track_id, title, artist, album, resolved_at in rows:
+            track = None
+            if track_id is not None:
+                track = {'id': track_id, 'title': title or '', 'artist': artist or '', 'album': album or ''}
+            self._entries[(rules, title_key, artist_key)] = (track, resolved_at)
+        if rows:
+            logger.info(f"Loaded {len(rows)} cached suggestion resolutions")
+
+    def get_many(self, pairs: Iterable[Tuple[str, str]], rules: str = '') -> Tuple[Dict[Tuple[str, str], Optional[Dict[str, Any]]],
+                                                                                 List[Tuple[str, str]]]:
+        """
+        Look up suggested (title, artist) pairs.
+
+        Args:
+            pairs: (title, artist) pairs as suggested
+            rules: Name of the acceptance rules the caller resolves with
+
+        Returns:
+            (resolved, misses): resolved maps cached pairs to a copy of their
+            track dict, or None for a cached negative result; misses lists the
+            pairs that still need resolving
+        """
+        resolved, misses = {}, []
+        now = time.time()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for pair in pairs:
+                entry = self._entries.get((rules,) + suggestion_key(*pair))
+                if entry is None or (entry[0] is None and now - entry[1] > self.negative_ttl):
+                    misses.append(pair)
+                    continue
+                resolved[pair] = dict(entry[0]) if entry[0] is not None else None
+            self.hits += len(resolved)
+            self.misses += len(misses)
+        return resolved, misses
+
+    def put_many(self, results: Dict[Tuple[str, str], Optional[Dict[str, Any]]], generation: int, rules: str = ''):
+        """
+        Store resolutions.
+
+        Args:
+            results: (title, artist) -> matched track dict, or None for no match
+            generation: self.generation read before resolving; results computed
+                against a library that changed since then are dropped
+            rules: Name of the acceptance rules the results were resolved with
+        """
+        now = time.time()
+        rows = []
+        with self._lock:
+            if generation != self._generation:
+                return
+            for pair, track in results.items():
+                key = suggestion_key(*pair)
+                if not key[0] or not key[1]:
+                    continue
+                track = {k: track[k] for k in ('id', 'title', 'artist', 'album')} if track else None
+                self._entries[(rules,) + key] = (track, now)
+                rows.append((rules, key[0], key[1], track['id'] if track else None, track['title'] if track else None,
+                             track['artist'] if track else None, track['album'] if track else None, now))
+
+        if not rows:
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    conn.executemany(f'''
+                        INSERT OR REPLACE INTO {CACHE_TABLE}
+                            (rules, title_key, artist_key, track_id, title, artist, album, resolved_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', rows)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            # The in-memory entries still serve this process
+            logger.warning(f"Could not persist suggestion resolutions: {e}")
+
+    def invalidate(self):
+        """Drop all resolutions (the library changed)."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+            loaded = self._loaded
+        if not loaded:
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    conn.execute(f'DELETE FROM {CACHE_TABLE}')
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not clear suggestion resolutions: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            negatives = sum(1 for track, _ in self._entries.values() if track is None)
+            return {
+                'entries': len(self._entries),
+                'negative_entries': negatives,
+                'negative_ttl': self.negative_ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations
+            }
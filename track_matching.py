@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Track Matching for TuneForge
+
+This module holds the string normalization and scoring used to match
+suggested tracks against the local library:
+- normalize_string: lowercase, drop (...) / [...] suffixes, punctuation to spaces
+  (precompiled patterns, LRU-memoized: the same suggestions and library
+  titles are normalized over and over)
+- calculate_similarity: max of word Jaccard and SequenceMatcher ratio, skipping
+  the ratio when its length bound shows it cannot exceed the Jaccard score;
+  ratios are memoized per normalized pair (suggestions repeat across batches)
+- similarity_upper_bound: the same score with the ratio replaced by its
+  length bound, so matching loops can reject candidates against their
+  thresholds before any SequenceMatcher work
+- Stored match keys: tracks.title_key / tracks.artist_key hold the normalized
+  title and artist, written by the scanner, with a composite index so an exact
+  match is one index lookup instead of a lower() scan of the whole table
+- Batch resolution: a whole batch of suggestions is matched with one join
+  of a VALUES CTE against the key index
+- ensure_match_keys: migration adding the columns and backfilling existing rows
+- present_condition: SQL filter keeping rows of vanished files (flagged
+  'missing' by the scanner) out of every match and search
+"""
+
+import re
+import difflib
+import sqlite3
+import logging
+from functools import lru_cache
+from typing import List, Dict, Any, Iterable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MATCH_KEY_INDEX = 'idx_match_key'
+
+# analysis_status of rows whose file vanished (scanner MissingTrackAction = flag)
+MISSING_STATUS = 'missing'
+
+# Rows are backfilled in chunks so a large library does not build one huge list
+BACKFILL_CHUNK_SIZE = 5000
+
+# Keys resolved per query (two bound parameters each)
+LOOKUP_CHUNK_SIZE = 400
+
+# Normalized strings kept by the normalize_string LRU cache
+NORMALIZE_CACHE_SIZE = 65536
+# SequenceMatcher ratios kept per normalized pair
+RATIO_CACHE_SIZE = 65536
+
+_PARENTHESES_RE = re.compile(r'\s*\([^)]*\)')  # (Live), (Remastered), etc.
+_BRACKETS_RE = re.compile(r'\s*\[[^\]]*\]')    # [Remix], [Album Version], etc.
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def present_condition(table: str = 'tracks') -> str:
+    """SQL condition excluding rows flagged as missing (table: name or alias of tracks)"""
+    return f"{table}.analysis_status IS NOT '{MISSING_STATUS}'"
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_string(text):
+    """Normalize a string for better comparison by removing common suffixes and special characters"""
+    if not text:
+        return ""
+
+    # Convert to lowercase
+    normalized = text.lower()
+
+    # Remove common suffixes in parentheses and brackets
+    normalized = _PARENTHESES_RE.sub('', normalized)
+    normalized = _BRACKETS_RE.sub('', normalized)
+
+    # Remove special characters and extra whitespace
+    normalized = _SPECIAL_CHARS_RE.sub(' ', normalized)  # Replace special chars with spaces
+    normalized = _WHITESPACE_RE.sub(' ', normalized)     # Multiple spaces to single space
+    normalized = normalized.strip()
+
+    return normalized
+
+
+@lru_cache(maxsize=RATIO_CACHE_SIZE)
+def _sequence_ratio(norm1, norm2):
+    """SequenceMatcher ratio of two normalized strings (memoized)"""
+    matcher = difflib.SequenceMatcher(None, norm1, norm2)
+    # quick_ratio is a cheaper upper bound; equal to ratio when nothing matches out of order
+    if matcher.quick_ratio() == 0.0:
+        return 0.0
+    return matcher.ratio()
+
+
+def _similarity_parts(str1, str2):
+    """
+    The cheap parts of calculate_similarity.
+
+    Returns:
+        (score, None, None) when the score is decided without a ratio, else
+        (word similarity, ratio upper bound, (norm1, norm2))
+    """
+    if not str1 or not str2:
+        return 0.0, None, None
+
+    # Normalize both strings
+    norm1 = normalize_string(str1)
+    norm2 = normalize_string(str2)
+
+    # Exact match after normalization
+    if norm1 == norm2:
+        return 1.0, None, None
+
+    # Word-based similarity
+    words1 = set(norm1.split())
+    words2 = set(norm2.split())
+
+    if not words1 or not words2:
+        return 0.0, None, None
+
+    # Jaccard similarity
+    intersection = len(words1 & words2)
+    union = len(words1 | words2)
+    word_similarity = intersection / union if union > 0 else 0.0
+
+    # 2 * shorter / total length bounds the ratio (SequenceMatcher.real_quick_ratio),
+    # so the O(n*m) ratio only runs when it could still beat the word score.
+    ratio_bound = 2.0 * min(len(norm1), len(norm2)) / (len(norm1) + len(norm2))
+    if ratio_bound <= word_similarity:
+        return word_similarity, None, None
+    return word_similarity, ratio_bound, (norm1, norm2)
+
+
+def calculate_similarity(str1, str2):
+    """Calculate similarity between two strings using multiple methods"""
+    word_similarity, ratio_bound, norms = _similarity_parts(str1, str2)
+    if ratio_bound is None:
+        return word_similarity
+
+    # Character-based similarity (for handling typos), the higher of the two wins
+    return max(word_similarity, _sequence_ratio(*norms))
+
+
+def similarity_upper_bound(str1, str2):
+    """
+    Cheap upper bound of calculate_similarity (no SequenceMatcher).
+
+    Never less than calculate_similarity(str1, str2), and equal to it whenever
+    the score does not depend on the SequenceMatcher ratio, so a candidate
+    whose bound misses a threshold would also miss it with the full score.
+    """
+    word_similarity, ratio_bound, _ = _similarity_parts(str1, str2)
+    if ratio_bound is None:
+        return word_similarity
+    return max(word_similarity, ratio_bound)
+
+
+def clear_match_caches():
+    """Drop the memoized normalized strings and similarity ratios."""
+    normalize_string.cache_clear()
+    _sequence_ratio.cache_clear()
+
+
+def ensure_match_keys(conn: sqlite3.Connection):
+    """
+    Add the match key columns and index to tracks and fill rows that lack keys.
+
+    Args:
+        conn: Connection to the local music database (tracks table must exist)
+    """
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA table_info(tracks)')
+    columns = {row[1] for row in cursor.fetchall()}
+    for column in ('title_key', 'artist_key'):
+        if column not in columns:
+            cursor.execute(f'ALTER TABLE tracks ADD COLUMN {column} TEXT')
+    cursor.execute(f'CREATE INDEX IF NOT EXISTS {MATCH_KEY_INDEX} ON tracks(title_key, artist_key)')
+    conn.commit()
+
+    # Every keyed row has non-NULL keys ('' for missing tags), so this finds only unkeyed rows
+    backfilled = 0
+    while True:
+        cursor.execute('SELECT id, title, artist FROM tracks WHERE title_key IS NULL LIMIT ?',
+                       (BACKFILL_CHUNK_SIZE,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        cursor.executemany('UPDATE tracks SET title_key = ?, artist_key = ? WHERE id = ?',
+                           [(normalize_string(title), normalize_string(artist), track_id)
+                            for track_id, title, artist in rows])
+        conn.commit()
+        backfilled += len(rows)
+    if backfilled:
+        logger.info(f"Backfilled match keys for {backfilled} tracks")
+
+
+def find_by_match_keys(cursor, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """
+    Resolve many (title, artist) pairs with one indexed join per chunk.
+
+    The normalized keys are loaded into a VALUES CTE and joined against the
+    match key index. Several rows can share a key ("Song" and "Song (Live)");
+    rows whose title and artist are equal to the pair ignoring case come first.
+
+    Args:
+        cursor: Cursor on the local music database
+        pairs: (title, artist) pairs as suggested
+
+    Returns:
+        Dictionary of pair -> list of track dicts (id, title, artist, album);
+        pairs without an exact match are absent
+    """
+    pairs_by_key: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    for title, artist in pairs:
+        key = (normalize_string(title), normalize_string(artist))
+        if key[0] and key[1]:
+            pairs_by_key.setdefault(key, []).append((title, artist))
+
+    rows_by_key: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    keys = list(pairs_by_key)
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        cursor.execute(f'''
+            WITH wanted(title_key, artist_key) AS (VALUES {', '.join('(?, ?)' for _ in chunk)})
+            SELECT t.id, t.title, t.artist, t.album, t.title_key, t.artist_key
+            FROM wanted JOIN tracks t ON t.title_key = wanted.title_key AND t.artist_key = wanted.artist_key
+            WHERE {present_condition('t')}
+            ORDER BY t.id
+        ''', [part for key in chunk for part in key])
+        for r in cursor.fetchall():
+            rows_by_key.setdefault((r[4], r[5]), []).append(
+                {'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''})
+
+    matches = {}
+    for key, rows in rows_by_key.items():
+        for title, artist in pairs_by_key[key]:
+            wanted = (title.strip().lower(), artist.strip().lower())
+            matches[(title, artist)] = sorted(
+                rows, key=lambda r: (r['title'].lower(), r['artist'].lower()) != wanted)
+    return matches
+
+
+def find_by_match_key(cursor, title: str, artist: str) -> List[Dict[str, Any]]:
+    """
+    Indexed lookup of local tracks whose normalized title and artist equal the given ones.
+
+    Returns:
+        List of track dicts (id, title, artist, album); empty if nothing matches
+    """
+    return find_by_match_keys(cursor, [(title, artist)]).get((title, artist), [])
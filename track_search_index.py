@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Track Search Index for TuneForge
+
+This module maintains a SQLite FTS5 index over the tracks table:
+- External-content FTS5 table (tracks_fts) over title, artist, album and genre
+- Kept in sync by triggers, so scanner UPSERTs, deletes and cascades need no
+  extra code
+- unicode61 tokenizer with remove_diacritics, so "Beyonce" finds "Beyoncé"
+- Prefix indexes for fast typeahead prefix queries
+- BM25 ranking weighted towards title and artist (the table's rank function)
+- Batched per-column searches (title AND artist) for resolving many
+  suggested tracks in one query
+- Unspecific queries skip ranking: a short or very common prefix matches a
+  large part of the library, and scoring every match costs far more than it
+  helps; the first matches are returned in title order instead
+
+Builds without FTS5 keep working: callers check `search_index_available`
+and fall back to LIKE queries.
+"""
+
+import re
+import sqlite3
+import logging
+from typing import Optional, Dict, List, Any
+
+from track_matching import present_condition
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'tracks_fts'
+
+# BM25 column weights for title, artist, album, genre
+BM25_WEIGHTS = (10.0, 6.0, 3.0, 1.0)
+
+# Queries are ranked once a word is at least this long...
+MIN_RANKED_WORD_LENGTH = 3
+# ...and they match at most this many tracks
+MAX_RANKED_MATCHES = 20000
+
+# Field searches combined into one compound query (SQLite allows 500 terms)
+FIELD_SEARCH_CHUNK_SIZE = 100
+# Matches of a field search that are ranked; the rest of a common prefix is not read
+FIELD_SEARCH_WINDOW = 200
+
+_FTS_TRIGGERS = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tracks_fts_ai AFTER INSERT ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, artist, album, genre)
+        VALUES (new.id, new.title, new.artist, new.album, new.genre);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tracks_fts_ad AFTER DELETE ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, artist, album, genre)
+        VALUES ('delete', old.id, old.title, old.artist, old.album, old.genre);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS tracks_fts_au AFTER UPDATE OF title, artist, album, genre ON tracks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, artist, album, genre)
+        VALUES ('delete', old.id, old.title, old.artist, old.album, old.genre);
+        INSERT INTO {FTS_TABLE}(rowid, title, artist, album, genre)
+        VALUES (new.id, new.title, new.artist, new.album, new.genre);
+    END
+    '''
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create the FTS5 index and its triggers if needed.
+
+    The index is filled from the existing tracks the first time it is created.
+
+    Args:
+        conn: Connection to the local music database (tracks table must exist)
+
+    Returns:
+        True if the index is available
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+    if cursor.fetchone():
+        return True
+
+    try:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+                title, artist, album, genre,
+                content='tracks', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='1 2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 is not available in this SQLite build ({e}); track search uses LIKE")
+        return False
+
+    # ORDER BY rank uses the weighted BM25 score
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', ?)",
+                   (f"bm25({', '.join(str(w) for w in BM25_WEIGHTS)})",))
+    for trigger in _FTS_TRIGGERS:
+        cursor.execute(trigger)
+    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    conn.commit()
+    logger.info("Created full-text search index for local tracks")
+    return True
+
+
+def search_index_available(conn: sqlite3.Connection) -> bool:
+    """Check whether the FTS5 index exists in this database."""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+    return cursor.fetchone() is not None
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match the start of a word in any indexed column
+    ("beat abb" finds "The Beatles - Abbey Road").
+
+    Returns:
+        MATCH expression, or None if the text contains no searchable words
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    # Quoted so FTS5 operators (AND, OR, NEAR, column:) in user input stay literal
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def should_rank(conn: sqlite3.Connection, text: str, match_query: str) -> bool:
+    """Whether a query is specific enough to be worth ranking by relevance."""
+    if not any(len(token) >= MIN_RANKED_WORD_LENGTH for token in _TOKEN_RE.findall(text or '')):
+        return False
+    # Bounded count: stops reading the doclists after MAX_RANKED_MATCHES + 1 rows
+    cursor = conn.execute(f'''
+        SELECT COUNT(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? LIMIT ?)
+    ''', (match_query, MAX_RANKED_MATCHES + 1))
+    return cursor.fetchone()[0] <= MAX_RANKED_MATCHES
+
+
+def build_field_match_query(fields: Dict[str, str]) -> Optional[str]:
+    """
+    Turn per-column text into an FTS5 MATCH expression.
+
+    {'title': 'wonder wall', 'artist': 'oasis'} requires both words in the title
+    and "oasis" in the artist. Columns without searchable words are ignored.
+
+    Returns:
+        MATCH expression, or None if no column contains searchable words
+    """
+    terms = []
+    for column, text in fields.items():
+        column_query = build_match_query(text)
+        if column_query:
+            terms.append(f'{column} : ({column_query})')
+    return ' AND '.join(terms) or None
+
+
+def search_fields_batch(conn: sqlite3.Connection, queries: List[Dict[str, str]],
+                        limit: int = 10) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Run several per-column searches in one query per chunk.
+
+    Args:
+        conn: Connection to the local music database
+        queries: Column -> text dicts (see build_field_match_query)
+        limit: Matches returned per query, best BM25 rank first
+
+    Returns:
+        Dictionary of query index -> list of track dicts (id, title, artist, album);
+        queries without matches are absent
+    """
+    match_queries = [(i, build_field_match_query(fields)) for i, fields in enumerate(queries)]
+    match_queries = [(i, q) for i, q in match_queries if q]
+
+    results: Dict[int, List[Dict[str, Any]]] = {}
+    for start in range(0, len(match_queries), FIELD_SEARCH_CHUNK_SIZE):
+        chunk = match_queries[start:start + FIELD_SEARCH_CHUNK_SIZE]
+        # Each term is a subquery so its own ORDER BY rank LIMIT applies; only the
+        # first FIELD_SEARCH_WINDOW matches are scored
+        compound = ' UNION ALL '.join(
+            f'SELECT * FROM (SELECT query_index, track_id, rank FROM ('
+            f'SELECT ? AS query_index, rowid AS track_id, rank FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH ? LIMIT {FIELD_SEARCH_WINDOW}) ORDER BY rank LIMIT ?)'
+            for _ in chunk)
+        params = [value for i, q in chunk for value in (i, q, limit)]
+        cursor = conn.execute(f'''
+            SELECT m.query_index, t.id, t.title, t.artist, t.album
+            FROM ({compound}) AS m JOIN tracks t ON t.id = m.track_id
+            WHERE {present_condition('t')}
+            ORDER BY m.query_index, m.rank
+        ''', params)
+        for r in cursor.fetchall():
+            results.setdefault(r[0], []).append(
+                {'id': r[1], 'title': r[2] or '', 'artist': r[3] or '', 'album': r[4] or ''})
+    return results
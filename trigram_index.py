@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Trigram Index for TuneForge
+
+This module keeps an in-memory trigram index over the normalized title and
+artist of every local track, for fuzzy matching of LLM-suggested tracks:
+- Trigrams of the stored match keys (tracks.title_key / artist_key), so case,
+  punctuation and (Live)/[Remix] suffixes are already folded away
+- Posting lists as numpy arrays; a query counts shared trigrams per track
+  with one bincount per field instead of scanning the table with LIKE
+- Candidates ranked by 0.7 * title similarity + 0.3 * artist similarity
+  (trigram Jaccard), the same weighting the match scoring uses
+- Built in a background thread at startup and rebuilt (debounced) after
+  scans change the library; searches keep using the previous snapshot
+  while a rebuild runs
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Set
+
+import numpy as np
+
+from track_matching import normalize_string, present_condition
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TITLE_WEIGHT = 0.7
+ARTIST_WEIGHT = 0.3
+
+# Tracks whose title similarity is below this are never candidates. Jaccard
+# s / (|q| + |d| - s) >= t needs s >= t * |q| shared trigrams, so they are
+# dropped before any scoring.
+MIN_TITLE_SIMILARITY = 0.3
+
+
+def trigrams(key: str) -> Set[str]:
+    """Trigrams of a normalized string, padded so word starts and ends count."""
+    if not key:
+        return set()
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Immutable trigram index snapshot of the tracks table.
+    """
+
+    def __init__(self, rows: List[tuple]):
+        """
+        Build the index.
+
+        Args:
+            rows: (id, title, artist, album, title_key, artist_key) tuples; missing
+                keys are computed with normalize_string
+        """
+        self.tracks = [{'id': r[0], 'title': r[1] or '', 'artist': r[2] or '', 'album': r[3] or ''}
+                       for r in rows]
+        count = len(rows)
+        self.title_sizes = np.zeros(count, dtype=np.int32)
+        self.artist_sizes = np.zeros(count, dtype=np.int32)
+
+        title_postings: Dict[str, List[int]] = {}
+        artist_postings: Dict[str, List[int]] = {}
+        for doc, r in enumerate(rows):
+            title_grams = trigrams(r[4] if r[4] is not None else normalize_string(r[1]))
+            artist_grams = trigrams(r[5] if r[5] is not None else normalize_string(r[2]))
+            self.title_sizes[doc] = len(title_grams)
+            self.artist_sizes[doc] = len(artist_grams)
+            for gram in title_grams:
+                title_postings.setdefault(gram, []).append(doc)
+            for gram in artist_grams:
+                artist_postings.setdefault(gram, []).append(doc)
+
+        self.title_postings = {g: np.array(docs, dtype=np.int32) for g, docs in title_postings.items()}
+        self.artist_postings = {g: np.array(docs, dtype=np.int32) for g, docs in artist_postings.items()}
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _shared_counts(self, postings: Dict[str, np.ndarray], grams: Set[str]) -> Optional[np.ndarray]:
+        """Number of query trigrams each track shares, or None if none match"""
+        lists = [postings[g] for g in grams if g in postings]
+        if not lists:
+            return None
+        return np.bincount(np.concatenate(lists), minlength=len(self.tracks))
+
+    def search(self, title: str, artist: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find the tracks most similar to a suggested title and artist.
+
+        Args:
+            title: Suggested title (normalized here)
+            artist: Suggested artist (normalized here)
+            limit: Maximum number of candidates
+
+        Returns:
+            Track dicts (id, title, artist, album, similarity), most similar
+            first; only tracks with a title similarity of at least
+            MIN_TITLE_SIMILARITY are considered
+        """
+        title_grams = trigrams(normalize_string(title))
+        artist_grams = trigrams(normalize_string(artist))
+        shared_title = self._shared_counts(self.title_postings, title_grams)
+        if shared_title is None:
+            return []
+
+        min_shared = max(1, int(np.ceil(MIN_TITLE_SIMILARITY * len(title_grams))))
+        docs = np.flatnonzero(shared_title >= min_shared)
+        if len(docs) == 0:
+            return []
+        shared = shared_title[docs]
+        score = TITLE_WEIGHT * shared / (len(title_grams) + self.title_sizes[docs] - shared)
+
+        shared_artist = self._shared_counts(self.artist_postings, artist_grams)
+        if shared_artist is not None:
+            shared = shared_artist[docs]
+            score += ARTIST_WEIGHT * shared / (len(artist_grams) + self.artist_sizes[docs] - shared)
+
+        if len(docs) > limit:
+            top = np.argpartition(-score, limit - 1)[:limit]
+            docs, score = docs[top], score[top]
+        # Most similar first; ties by track order (id) so results are stable
+        order = np.lexsort((docs, -score))
+
+        results = []
+        for i in order:
+            track = dict(self.tracks[docs[i]])
+            track['similarity'] = round(float(score[i]), 4)
+            results.append(track)
+        return results
+
+
+class TrigramMatcher:
+    """
+    Owns the current TrigramIndex of a database and rebuilds it in the background.
+    """
+
+    def __init__(self, db_path: str, rebuild_delay: float = 5.0):
+        """
+        Initialize the TrigramMatcher.
+
+        Args:
+            db_path: Path to the local music database
+            rebuild_delay: Seconds to wait after a change before rebuilding, so
+                the batches of a running scan cause one rebuild instead of many
+        """
+        self.db_path = db_path
+        self.rebuild_delay = rebuild_delay
+
+        self._index: Optional[TrigramIndex] = None
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._builder: Optional[threading.Thread] = None
+
+        # Statistics
+        self.builds = 0
+        self.last_build_seconds = 0.0
+
+    def _load_rows(self) -> List[tuple]:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(
+                f'SELECT id, title, artist, album, title_key, artist_key FROM tracks '
+                f'WHERE {present_condition()} ORDER BY id'
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _build_loop(self, delay: float):
+        """Rebuild until no change arrived during the last build (builder thread)."""
+        try:
+            while True:
+                if delay:
+                    time.sleep(delay)
+                with self._lock:
+                    self._dirty = False
+                start = time.time()
+                index = TrigramIndex(self._load_rows())
+                with self._lock:
+                    self._index = index
+                    self.builds += 1
+                    self.last_build_seconds = time.time() - start
+                    if not self._dirty:
+                        self._builder = None
+                        break
+                delay = self.rebuild_delay
+            logger.info(f"Trigram index built: {len(index)} tracks in {self.last_build_seconds:.2f}s")
+        except Exception as e:
+            logger.error(f"Error building trigram index: {e}")
+            with self._lock:
+                self._builder = None
+
+    def _start_builder(self, delay: float):
+        # Caller holds self._lock
+        if self._builder is None:
+            self._builder = threading.Thread(target=self._build_loop, args=(delay,),
+                                             name='trigram-index', daemon=True)
+            self._builder.start()
+
+    def refresh(self):
+        """Build the index now (in the background) if no build is running."""
+        with self._lock:
+            self._start_builder(0)
+
+    def invalidate(self):
+        """The library changed; rebuild after the rebuild delay."""
+        with self._lock:
+            self._dirty = True
+            self._start_builder(self.rebuild_delay)
+
+    def is_ready(self) -> bool:
+        return self._index is not None
+
+    def search(self, title: str, artist: str, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fuzzy candidates for a suggested track.
+
+        Returns:
+            Candidate track dicts (see TrigramIndex.search), or None while the
+            first build has not finished (callers fall back to SQL)
+        """
+        index = self._index
+        if index is None:
+            self.refresh()
+            return None
+        return index.search(title, artist, limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        index = self._index
+        return {
+            'ready': index is not None,
+            'tracks': len(index) if index is not None else 0,
+            'builds': self.builds,
+            'last_build_seconds': round(self.last_build_seconds, 3),
+            'rebuild_pending': self._dirty or self._builder is not None
+        }
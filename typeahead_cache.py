@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Typeahead Cache for TuneForge
+
+This module caches typeahead search results in memory:
+- LRU cache keyed by the normalized query prefix (plus page and limit)
+- Identical in-flight queries are coalesced: one request runs the search,
+  concurrent duplicates wait for its result
+- invalidate() drops everything when the library changes; searches that
+  started before the invalidation do not repopulate the cache
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Callable, Hashable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _PendingQuery:
+    """Result slot shared by coalesced requests"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TypeaheadCache:
+    """
+    LRU result cache with request coalescing.
+    """
+
+    def __init__(self, max_entries: int = 512, wait_timeout: float = 10.0):
+        """
+        Initialize the TypeaheadCache.
+
+        Args:
+            max_entries: Cached queries kept before the least recently used is evicted
+            wait_timeout: Seconds a coalesced request waits for the running one
+        """
+        self.max_entries = max(1, max_entries)
+        self.wait_timeout = wait_timeout
+
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._in_flight: Dict[Hashable, _PendingQuery] = {}
+        self._generation = 0
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Return the cached result for a key, computing it at most once at a time.
+
+        Args:
+            key: Cache key (normalized query, page, limit)
+            compute: Runs the search when the key is neither cached nor in flight
+
+        Returns:
+            (result, source) where source is 'cache', 'coalesced' or 'database'
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], 'cache'
+
+            pending = self._in_flight.get(key)
+            leader = pending is None
+            if leader:
+                pending = _PendingQuery()
+                self._in_flight[key] = pending
+                generation = self._generation
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if not pending.event.wait(self.wait_timeout):
+                # The running search is stuck; search independently
+                return compute(), 'database'
+            if pending.error is not None:
+                raise pending.error
+            return pending.value, 'coalesced'
+
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if pending.error is None and generation == self._generation:
+                    self._entries[key] = pending.value
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            pending.event.set()
+
+        return pending.value, 'database'
+
+    def invalidate(self):
+        """Drop all cached results (the library changed)."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'in_flight': len(self._in_flight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Version Filter for TuneForge
+
+This module decides which tracks are unwanted versions (live, karaoke,
+covers, remixes, demos, ...), for both places that filter them:
+- LLM suggestions before matching (is_undesirable_suggestion), by title/album
+  patterns and artist keywords
+- Library candidates during matching (is_unwanted_version), by keywords
+- Each rule set is one precompiled alternation, so a check is a single regex
+  search instead of a loop over ~30 patterns
+- The individual rules that matched are only worked out on request
+  (undesirable_reasons), for debug logging
+"""
+
+import re
+from typing import Dict, List
+
+# Title/album patterns of suggestions we do not want (matched on lowercase text)
+UNDESIRABLE_PATTERNS = [
+    r"\(live\b", r"\[live\b", r"- live\b", r"\blive at\b", r"\blive from\b",
+    r"\(instrumental\b", r"\[instrumental\b", r"- instrumental\b",
+    r"\(karaoke\b", r"\[karaoke\b", r"- karaoke\b", r"karaoke version\b",
+    r"\(cover\b", r"\[cover\b", r"- cover\b", r" tribute\b",
+    r"\(remix\b", r"\[remix\b", r"- remix\b",
+    r"\(acoustic\b", r"\[acoustic\b", r"- acoustic\b",
+    r"\(edit\b", r"\[edit\b", r"- radio edit\b", r"single version\b",
+    r"\(demo\b", r"\[demo\b", r"- demo\b", r"\(session\b", r"\[session\b",
+]
+UNDESIRABLE_ARTIST_KEYWORDS = ["karaoke", "tribute band", "the karaoke crew", "various artists", "soundtrack"]
+
+# Keywords of library versions to avoid; matched on " <lowercase text> " so a
+# keyword can sit at the very start or end
+UNWANTED_VERSION_KEYWORDS = [
+    ' live ', ' live-', ' live_', '(live', '[live',
+    ' remaster', '(remaster', '[remaster', ' remastered',
+    ' acoustic', '(acoustic', '[acoustic',
+    ' demo', '(demo', '[demo',
+    ' edit', '(edit', '[edit',
+    ' karaoke', ' instrumental'
+]
+
+_UNDESIRABLE_RE = re.compile('|'.join(f'(?:{p})' for p in UNDESIRABLE_PATTERNS))
+_UNDESIRABLE_ARTIST_RE = re.compile('|'.join(re.escape(k) for k in UNDESIRABLE_ARTIST_KEYWORDS))
+_UNWANTED_VERSION_RE = re.compile('|'.join(re.escape(k) for k in UNWANTED_VERSION_KEYWORDS))
+
+
+def is_undesirable_suggestion(title, artist, album=None):
+    """Return True if a suggested track is a version we should not search for."""
+    title_l, artist_l, album_l = (title or '').lower(), (artist or '').lower(), (album or '').lower()
+    return bool(_UNDESIRABLE_RE.search(title_l) or _UNDESIRABLE_RE.search(album_l)
+                or _UNDESIRABLE_ARTIST_RE.search(artist_l))
+
+
+def undesirable_reasons(title, artist, album=None) -> Dict[str, List[str]]:
+    """
+    Which rules reject a suggested track (slow path, for logging only).
+
+    Returns:
+        Dictionary with the matching 'patterns' and 'artist_keywords'
+    """
+    title_l, artist_l, album_l = (title or '').lower(), (artist or '').lower(), (album or '').lower()
+    return {
+        'patterns': [p for p in UNDESIRABLE_PATTERNS if re.search(p, title_l) or re.search(p, album_l)],
+        'artist_keywords': [k for k in UNDESIRABLE_ARTIST_KEYWORDS if k in artist_l]
+    }
+
+
+def is_unwanted_version(title, album=None):
+    """Return True if the track looks like a live/remaster/demo/acoustic/etc. version we should avoid."""
+    return any(text and _UNWANTED_VERSION_RE.search(f" {text.lower()} ") for text in (title, album))
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Worker Autoscaler for TuneForge
+
+This module sizes the audio analysis worker pool at runtime:
+- Samples throughput, CPU utilization and I/O wait on a fixed interval
+- Grows the pool while added workers still raise throughput
+- Shrinks the pool when the host is saturated (CPU or I/O wait)
+- Backs off while interactive requests (playlist generation) are running
+- Allows a higher ceiling during the configured overnight window when a
+  daytime limit is set
+
+It is deliberately free of audio dependencies so that the web routes can
+import the interactive activity helpers without loading librosa.
+"""
+
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Any, Callable, List
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Interactive activity tracking ---
+_interactive_lock = threading.Lock()
+_interactive_count = 0
+_last_interactive_ts = 0.0
+
+
+def begin_interactive():
+    """Record that an interactive request (playlist generation) has started."""
+    global _interactive_count, _last_interactive_ts
+    with _interactive_lock:
+        _interactive_count += 1
+        _last_interactive_ts = time.time()
+
+
+def end_interactive():
+    """Record that an interactive request has finished."""
+    global _interactive_count, _last_interactive_ts
+    with _interactive_lock:
+        _interactive_count = max(0, _interactive_count - 1)
+        _last_interactive_ts = time.time()
+
+
+@contextmanager
+def interactive_session():
+    """Context manager marking the enclosed block as interactive work."""
+    begin_interactive()
+    try:
+        yield
+    finally:
+        end_interactive()
+
+
+def interactive_request(func: Callable) -> Callable:
+    """Decorator marking a route or job function as interactive work."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with interactive_session():
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def is_interactive_active(grace_seconds: float = 0.0) -> bool:
+    """
+    Check whether interactive work is running or finished recently.
+
+    Args:
+        grace_seconds: Treat requests that ended within this window as active
+
+    Returns:
+        True if analysis should yield resources to interactive requests
+    """
+    with _interactive_lock:
+        if _interactive_count > 0:
+            return True
+        return grace_seconds > 0 and (time.time() - _last_interactive_ts) < grace_seconds
+
+
+# --- System sampling ---
+class CpuSampler:
+    """Computes CPU utilization and I/O wait percentages between calls."""
+
+    def __init__(self):
+        self._last_times: Optional[List[float]] = None
+        try:
+            import psutil  # Optional dependency, /proc/stat is used when missing
+            self._psutil = psutil
+        except ImportError:
+            self._psutil = None
+
+    def _read_cpu_times(self) -> Optional[List[float]]:
+        """Return [busy, idle, iowait] cumulative CPU times, or None if unavailable."""
+        try:
+            with open('/proc/stat', 'r') as f:
+                parts = f.readline().split()
+            # cpu user nice system idle iowait irq softirq steal ...
+            values = [float(v) for v in parts[1:9]]
+            idle, iowait = values[3], values[4]
+            busy = sum(values) - idle - iowait
+            return [busy, idle, iowait]
+        except (OSError, ValueError, IndexError):
+            pass
+
+        if self._psutil is not None:
+            try:
+                times = self._psutil.cpu_times()
+                idle = getattr(times, 'idle', 0.0)
+                iowait = getattr(times, 'iowait', 0.0)
+                busy = sum(times) - idle - iowait
+                return [busy, idle, iowait]
+            except Exception:
+                pass
+        return None
+
+    def sample(self) -> Dict[str, Optional[float]]:
+        """
+        Sample CPU usage since the previous call.
+
+        Returns:
+            Dictionary with 'cpu_percent' and 'iowait_percent' (None when unknown)
+        """
+        current = self._read_cpu_times()
+        previous, self._last_times = self._last_times, current
+
+        if current is None or previous is None:
+            return {'cpu_percent': None, 'iowait_percent': None}
+
+        deltas = [c - p for c, p in zip(current, previous)]
+        total = sum(deltas)
+        if total <= 0:
+            return {'cpu_percent': None, 'iowait_percent': None}
+
+        return {
+            'cpu_percent': round(deltas[0] / total * 100, 1),
+            'iowait_percent': round(deltas[2] / total * 100, 1)
+        }
+
+
+@dataclass
+class AutoscaleConfig:
+    """Configuration for adaptive worker sizing"""
+    min_workers: int = 1
+    max_workers: int = 1
+    daytime_max_workers: Optional[int] = None  # None = max_workers
+    interactive_max_workers: int = 1
+    overnight_start_hour: int = 1
+    overnight_end_hour: int = 7
+    interval: int = 15                 # seconds between scaling decisions
+    interactive_grace_seconds: int = 30
+    cpu_high_percent: float = 90.0     # shrink above this
+    cpu_low_percent: float = 75.0      # only grow below this
+    iowait_high_percent: float = 30.0  # shrink above this
+    min_gain_ratio: float = 1.05       # throughput gain required to keep a new worker
+
+
+@dataclass
+class AutoscaleSample:
+    """One measurement interval used for a scaling decision"""
+    timestamp: datetime = field(default_factory=datetime.now)
+    workers: int = 0
+    throughput: float = 0.0            # jobs per minute
+    cpu_percent: Optional[float] = None
+    iowait_percent: Optional[float] = None
+    decode_fraction: Optional[float] = None  # share of job time spent loading audio
+    ceiling: int = 0
+    decision: str = 'hold'
+    reason: str = ''
+
+
+class WorkerAutoscaler:
+    """
+    Decides the target worker count for the batch processor.
+
+    The processor calls `evaluate()` once per interval with the number of jobs
+    finished so far; the autoscaler returns the worker count to run next.
+    """
+
+    def __init__(self, config: AutoscaleConfig = None):
+        """
+        Initialize the WorkerAutoscaler.
+
+        Args:
+            config: Autoscaling bounds and thresholds
+        """
+        self.config = config or AutoscaleConfig()
+        self.config.min_workers = max(1, self.config.min_workers)
+        self.config.max_workers = max(self.config.min_workers, self.config.max_workers)
+
+        self.cpu_sampler = CpuSampler()
+        self.cpu_sampler.sample()  # Prime the baseline
+
+        self.last_sample: Optional[AutoscaleSample] = None
+        self.history: List[AutoscaleSample] = []
+        self._last_eval_time = time.time()
+        self._last_finished = 0
+        self._throughput_before_grow: Optional[float] = None
+        self._hold_until = 0.0
+
+        logger.info(f"WorkerAutoscaler initialized with bounds {self.config.min_workers}-"
+                   f"{self.config.max_workers}, interval {self.config.interval}s")
+
+    def _is_overnight(self, now: datetime = None) -> bool:
+        """Check whether the current hour falls in the overnight window."""
+        hour = (now or datetime.now()).hour
+        start, end = self.config.overnight_start_hour, self.config.overnight_end_hour
+        if start == end:
+            return False
+        if start < end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    def current_ceiling(self) -> int:
+        """
+        Get the highest worker count allowed right now.
+
+        Returns:
+            Worker ceiling based on interactive load and time of day
+        """
+        cfg = self.config
+        if is_interactive_active(cfg.interactive_grace_seconds):
+            ceiling = cfg.interactive_max_workers
+        elif self._is_overnight():
+            ceiling = cfg.max_workers
+        elif cfg.daytime_max_workers is not None:
+            ceiling = cfg.daytime_max_workers
+        else:
+            ceiling = cfg.max_workers
+        return max(cfg.min_workers, min(cfg.max_workers, ceiling))
+
+    def initial_workers(self) -> int:
+        """Get the worker count to start with."""
+        return self.config.min_workers
+
+    def evaluate(self, current_workers: int, finished_jobs: int,
+                 queue_size: int, decode_fraction: Optional[float] = None) -> int:
+        """
+        Evaluate the last interval and return the worker count to use next.
+
+        Args:
+            current_workers: Workers currently running
+            finished_jobs: Total jobs finished (completed, failed or skipped)
+            queue_size: Jobs still waiting in the queue
+            decode_fraction: Share of recent job time spent loading audio
+
+        Returns:
+            Target worker count
+        """
+        cfg = self.config
+        now = time.time()
+        elapsed = max(1e-6, now - self._last_eval_time)
+        throughput = (finished_jobs - self._last_finished) / elapsed * 60
+        self._last_eval_time = now
+        self._last_finished = finished_jobs
+
+        usage = self.cpu_sampler.sample()
+        cpu, iowait = usage['cpu_percent'], usage['iowait_percent']
+        ceiling = self.current_ceiling()
+
+        target = current_workers
+        decision, reason = 'hold', 'steady'
+
+        if current_workers > ceiling:
+            target, decision = ceiling, 'shrink'
+            reason = 'interactive requests active' if is_interactive_active(cfg.interactive_grace_seconds) else 'above time-of-day ceiling'
+            self._throughput_before_grow = None
+        elif cpu is not None and cpu > cfg.cpu_high_percent and current_workers > cfg.min_workers:
+            target, decision, reason = current_workers - 1, 'shrink', f'CPU at {cpu}%'
+            self._throughput_before_grow = None
+        elif iowait is not None and iowait > cfg.iowait_high_percent and current_workers > cfg.min_workers:
+            target, decision, reason = current_workers - 1, 'shrink', f'I/O wait at {iowait}%'
+            self._throughput_before_grow = None
+        elif self._throughput_before_grow is not None:
+            # Judge the worker added in the previous interval
+            if throughput < self._throughput_before_grow * cfg.min_gain_ratio:
+                target, decision = current_workers - 1, 'shrink'
+                reason = (f'no throughput gain ({throughput:.1f} vs '
+                          f'{self._throughput_before_grow:.1f} jobs/min)')
+                self._hold_until = now + cfg.interval * 4
+            else:
+                reason = f'throughput improved to {throughput:.1f} jobs/min'
+            self._throughput_before_grow = None
+        elif (now >= self._hold_until and current_workers < ceiling
+              and queue_size > current_workers
+              and (cpu is None or cpu < cfg.cpu_low_percent)):
+            target, decision, reason = current_workers + 1, 'grow', 'headroom available'
+            self._throughput_before_grow = throughput
+
+        target = max(cfg.min_workers, min(ceiling, target))
+
+        sample = AutoscaleSample(
+            workers=current_workers,
+            throughput=round(throughput, 2),
+            cpu_percent=cpu,
+            iowait_percent=iowait,
+            decode_fraction=round(decode_fraction, 3) if decode_fraction is not None else None,
+            ceiling=ceiling,
+            decision=decision,
+            reason=reason
+        )
+        self.last_sample = sample
+        self.history.append(sample)
+        if len(self.history) > 100:
+            self.history = self.history[-100:]
+
+        if target != current_workers:
+            logger.info(f"Autoscaler: {decision} {current_workers} -> {target} workers ({reason})")
+        return target
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the latest autoscaling measurements"""
+        sample = self.last_sample
+        return {
+            'min_workers': self.config.min_workers,
+            'max_workers': self.config.max_workers,
+            'ceiling': self.current_ceiling(),
+            'overnight': self._is_overnight(),
+            'interactive_active': is_interactive_active(self.config.interactive_grace_seconds),
+            'throughput_per_minute': sample.throughput if sample else None,
+            'cpu_percent': sample.cpu_percent if sample else None,
+            'iowait_percent': sample.iowait_percent if sample else None,
+            'decode_fraction': sample.decode_fraction if sample else None,
+            'last_decision': sample.decision if sample else None,
+            'last_reason': sample.reason if sample else None
+        }